@@ -0,0 +1,130 @@
+"""
+Measure the button controller's idle CPU and its press-to-action latency.
+
+Usage:
+
+    venv/bin/python -m benchmarks.buttons [--presses 50] [--idle 5]
+
+Runs on the simulation backend, whose mock pins call the edge callbacks from the
+thread that drives them, like a GPIO interrupt thread would. The latency of an
+action is from the edge that decided it (the chord's last press, or the end of a
+long press's hold time) to the action being started. For comparison, the CPU of
+the old loop that polled `Button.is_pressed` is measured too.
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import threading
+import time
+
+import numpy as np
+from gpiozero import Button
+
+from pi_robot.controller import Controller
+from pi_robot.eyes import Eyes
+from pi_robot.gestures import GestureRegistry
+from pi_robot.hardware import SIMULATION_BACKEND
+from pi_robot.hardware import get_hardware
+from pi_robot.simulation import SimulatedPinFactory
+
+
+BUTTONS = {"a": 13, "b": 19, "x": 5, "y": 6}
+ACTIONS: dict[str, str | list[str]] = {
+    "a": "blink_eyes",
+    "b": "blink_eyes",
+    "b:long": "blink_eyes",
+    "x+y": "blink_eyes",
+}
+TAP_DURATION = 0.05
+
+
+class TimedController(Controller):
+    latencies: dict[str, list[float]]
+
+    def dispatch(self, key: str, since: float) -> None:
+        super().dispatch(key, since)
+        self.latencies.setdefault(key, []).append(time.monotonic() - since)
+
+
+def cpu_percent(seconds: float, work) -> float:
+    start_cpu, start = time.process_time(), time.perf_counter()
+    work(seconds)
+    return (time.process_time() - start_cpu) / (time.perf_counter() - start) * 100
+
+
+def press_buttons(pin_factory: SimulatedPinFactory, presses: int, long_press: float) -> None:
+    """Tap "a", hold "b", and press "x" and "y" together, in random order with gaps between."""
+    for _ in range(presses):
+        time.sleep(random.uniform(0.1, 0.2))
+        kind = random.choice(["tap", "long", "chord"])
+        if kind == "tap":
+            pin_factory.press(BUTTONS["a"])
+            time.sleep(TAP_DURATION)
+            pin_factory.release(BUTTONS["a"])
+        elif kind == "long":
+            pin_factory.press(BUTTONS["b"])
+            time.sleep(long_press + 0.1)
+            pin_factory.release(BUTTONS["b"])
+        else:
+            pin_factory.press(BUTTONS["x"])
+            time.sleep(random.uniform(0.0, 0.03))
+            pin_factory.press(BUTTONS["y"])
+            time.sleep(TAP_DURATION)
+            pin_factory.release(BUTTONS["x"])
+            pin_factory.release(BUTTONS["y"])
+
+
+def poll(seconds: float, button: Button) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        button.is_pressed
+
+
+async def run(args: argparse.Namespace) -> None:
+    pin_factory = get_hardware().pin_factory
+    assert isinstance(pin_factory, SimulatedPinFactory)
+
+    controller = TimedController(
+        gestures=GestureRegistry(ears=None, eyes=Eyes(17, 27), eyebrows=None),
+        mouth=None,
+        buttons=BUTTONS,
+        actions=ACTIONS,
+    )
+    controller.latencies = {}
+    task = asyncio.create_task(controller.run())
+    await asyncio.sleep(0)
+
+    idle_cpu = await asyncio.to_thread(cpu_percent, args.idle, time.sleep)
+    print(f"idle CPU, event driven: {idle_cpu:.1f}% of one core")
+    poll_cpu = cpu_percent(1.0, lambda seconds: poll(seconds, controller.buttons["a"]))
+    print(f"idle CPU, polling is_pressed: {poll_cpu:.1f}% of one core")
+
+    presser = threading.Thread(target=press_buttons, args=(pin_factory, args.presses, controller.long_press))
+    presser.start()
+    await asyncio.to_thread(presser.join)
+    await asyncio.sleep(controller.long_press)
+    task.cancel()
+
+    print(f"{'input':8} {'n':>4} {'p50':>8} {'p95':>8} {'max':>8}")
+    for key, latencies in sorted(controller.latencies.items()):
+        p50, p95, worst = np.percentile(np.array(latencies) * 1000, [50, 95, 100])
+        print(f"{key:8} {len(latencies):4} {p50:6.2f} ms {p95:6.2f} ms {worst:6.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--presses", type=int, default=50)
+    parser.add_argument("--idle", type=float, default=5.0, help="seconds to measure idle CPU for")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        get_hardware().use_backend(SIMULATION_BACKEND, state_log_path=f"{tmp}/state.jsonl")
+        try:
+            asyncio.run(run(args))
+        finally:
+            get_hardware().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Measure how long a config change takes to apply while the robot keeps running,
+against restarting the robot.
+
+Usage:
+
+    venv/bin/python -m benchmarks.config_reload [--poll-interval 0.1]
+
+Runs a `Robot` on the simulation backend against a local stand-in for the
+realtime API, and edits its config file one section at a time: the name, the
+eye pins, the ear channels, the listening thresholds and the button actions.
+For each edit, it reports the time from the file being saved to the change
+being applied, which includes waiting for the next check of the file, and
+the time spent applying it. It also counts the `session.update` messages the
+server got, which only the name change should send, and checks that the
+microphone stream and the realtime connection are still the ones the robot
+started with. For comparison, a restart is timed as a new process that
+imports the robot, builds it from the same config, opens the microphone
+and connects.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import openai
+import yaml
+from websockets.asyncio.server import ServerConnection
+from websockets.asyncio.server import serve
+
+from pi_robot.hardware import get_hardware
+from pi_robot.logging import logger
+from pi_robot.realtime_session import RealtimeSession
+from pi_robot.robot import Robot
+
+
+CONNECTIONS = {
+    "mouth": 22,
+    "eyes": {"left": 17, "right": 27},
+    "eyebrows": {"left": 0, "right": 1},
+    "ears": {"left": 2, "right": 3},
+    "controller": {"button_a": 13, "button_b": 19},
+}
+
+EDITS = {
+    "name": lambda config: config.update(name="Reloaded"),
+    "eyes": lambda config: config["connections"].update(eyes={"left": 23, "right": 27}),
+    "ears": lambda config: config["connections"].update(ears={"left": 4, "right": 5}),
+    "listening": lambda config: config.update(listening={"silence_duration_ms": 600}),
+    "controller": lambda config: config.update(controller={"actions": {"a": "wiggle_ears", "a+b": "blink_eyes"}}),
+}
+
+
+class SessionServer:
+    """Accepts realtime connections and counts the `session.update` messages sent over them."""
+
+    def __init__(self) -> None:
+        self.connections = 0
+        self.session_updates = 0
+
+    async def handle(self, websocket: ServerConnection) -> None:
+        self.connections += 1
+        await websocket.send(json.dumps({"type": "session.created", "event_id": "e0", "session": {}}))
+        async for message in websocket:
+            if json.loads(message)["type"] == "session.update":
+                self.session_updates += 1
+
+
+class TimedRobot(Robot):
+    """A `Robot` that notes how long each reload took, from the save and to apply."""
+
+    reloads: list[tuple[list[str], float, float]]
+    reloaded: asyncio.Event
+
+    async def reload_config(self) -> list[str]:
+        assert self.pending_config is not None
+        modified_at = self.pending_config[1]
+        start = time.perf_counter()
+        changed = await super().reload_config()
+        self.reloads.append((changed, time.perf_counter() - start, time.time() - modified_at))
+        self.reloaded.set()
+        return changed
+
+
+def write_config(path: str, config: dict) -> None:
+    with open(path, "w") as config_file:
+        yaml.safe_dump(config, config_file)
+
+
+async def start_robot(config_path: str) -> None:
+    """What a restart does before the robot can listen again."""
+    robot = Robot(config_path)
+    robot.realtime = RealtimeSession(client=openai.AsyncOpenAI(websocket_base_url=robot.websocket_base_url))
+    async with robot.ears:
+        await robot.connect()
+        await robot.realtime.close()
+
+
+def time_restart(config_path: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.config_reload", "--start", config_path],
+        check=True,
+        env={**os.environ, "PI_ROBOT_BACKEND": "simulation"},
+    )
+    return time.perf_counter() - start
+
+
+async def run(args: argparse.Namespace, workdir: str) -> None:
+    server = SessionServer()
+    async with serve(server.handle, "127.0.0.1", 0) as websocket_server:
+        port = websocket_server.server.sockets[0].getsockname()[1]
+        config_path = os.path.join(workdir, "config.yaml")
+        config = {
+            "name": "Benchmark",
+            "openai_api_key": "mock",
+            "openai_websocket_base_url": f"ws://127.0.0.1:{port}/v1",
+            "backend": "simulation",
+            "connections": CONNECTIONS,
+        }
+        write_config(config_path, config)
+
+        robot = TimedRobot(config_path)
+        robot.reloads = []
+        robot.reloaded = asyncio.Event()
+        robot.config_poll_interval = args.poll_interval
+        task = asyncio.create_task(robot.run())
+        while robot.ears.stream is None or robot.realtime.applied_session_hash is None:
+            await asyncio.sleep(0.05)
+        stream, connection = robot.ears.stream, robot.realtime.connection
+
+        print(f"{'edit':12} {'changed':12} {'saved to applied':>17} {'applying':>10} {'session.update':>15}")
+        for name, edit in EDITS.items():
+            updates = server.session_updates
+            robot.reloaded.clear()
+            edit(config)
+            write_config(config_path, config)
+            await asyncio.wait_for(robot.reloaded.wait(), timeout=10.0)
+
+            changed, applying, effective_after = robot.reloads[-1]
+            print(
+                f"{name:12} {','.join(changed):12} {effective_after * 1000:14.0f} ms {applying * 1000:7.1f} ms"
+                f" {server.session_updates - updates:15}"
+            )
+
+        kept = robot.ears.stream is stream and robot.realtime.connection is connection and server.connections == 1
+        print(f"microphone stream and realtime connection kept: {'yes' if kept else 'no'}")
+
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        robot.mouth.stop()
+        await robot.realtime.close()
+
+        restart = await asyncio.to_thread(time_restart, config_path)
+        print(f"restart to listening and connected: {restart * 1000:.0f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--poll-interval", type=float, default=0.1, help="seconds between checks of the file")
+    parser.add_argument("--start", metavar="CONFIG", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    try:
+        if args.start:
+            asyncio.run(start_robot(args.start))
+            return
+        with tempfile.TemporaryDirectory() as workdir:
+            asyncio.run(run(args, workdir))
+    finally:
+        get_hardware().close()
+
+
+if __name__ == "__main__":
+    main()
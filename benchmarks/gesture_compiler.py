@@ -0,0 +1,70 @@
+"""
+Measure how long a model-written gesture takes to start, exec per call vs. the compiled-gesture cache.
+
+Usage:
+
+    venv/bin/python -m benchmarks.gesture_compiler [--calls N]
+
+The body parts are stubs, so this times only getting from the tool call's
+source to the first body part call.
+"""
+import argparse
+import textwrap
+import time
+
+from pi_robot.gesture_compiler import compile_gesture
+from pi_robot.movement import Speed
+
+
+LAUGH = textwrap.dedent(
+    """\
+    def laugh(ears, eyes, eyebrows):
+        eyes.blink(speed=Speed.FAST)
+        eyebrows.wiggle()
+    """
+)
+
+
+class StubPart:
+    def wiggle(self, repeat_n: int = 4, speed: Speed = Speed.FAST) -> None:
+        pass
+
+    def blink(self, repeat_n: int = 4, speed: Speed = Speed.FAST) -> None:
+        pass
+
+
+def legacy_invoke(function_definition: str, part: StubPart) -> None:
+    """What `Brain.invoke_api` used to do on every tool call."""
+    func_name = function_definition.split('(')[0].split('def ')[1]
+    invocation_func = f"{function_definition}\nretval = {func_name}(ears, eyes, eyebrows)\n"
+    exec(invocation_func, {'__builtins__': None, 'Speed': Speed}, {'ears': part, 'eyes': part, 'eyebrows': part})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=10000)
+    args = parser.parse_args()
+
+    part = StubPart()
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        legacy_invoke(LAUGH, part)
+    legacy = (time.perf_counter() - start) / args.calls
+
+    start = time.perf_counter()
+    compile_gesture(LAUGH).function(part, part, part)
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        compile_gesture(LAUGH).function(part, part, part)
+    cached = (time.perf_counter() - start) / args.calls
+
+    print(f"exec per call:         {legacy * 1e6:.1f} us")
+    print(f"compile + validate:    {first * 1e6:.1f} us (first call)")
+    print(f"cached compiled:       {cached * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
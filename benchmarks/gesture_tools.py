@@ -0,0 +1,139 @@
+"""
+Compare named gesture tools against free-form Python for tokens generated and time to first motion.
+
+Usage:
+
+    venv/bin/python -m benchmarks.gesture_tools [--tokens-per-second N]
+
+A local stand-in for the realtime API streams each tool call's arguments at a
+fixed token rate (estimated at 4 characters per token). The client dispatches
+the call the way `Robot.reply` does, as soon as the arguments are done, and
+records how long after `response.create` the first body part moved.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import openai
+from websockets.asyncio.server import ServerConnection
+from websockets.asyncio.server import serve
+
+from pi_robot.gesture_compiler import compile_gesture
+from pi_robot.gestures import GestureRegistry
+from pi_robot.tool_calls import ToolCallAssembler
+
+
+CHARS_PER_TOKEN = 4
+
+SCENARIOS: dict[str, list[tuple[str, dict]]] = {
+    "blink": [
+        ("blink_eyes", {}),
+        ("invoke_api_to_move_your_face", {"function_definition": (
+            "def blink_eyes(ears, eyes, eyebrows):\n"
+            "    eyes.blink()\n"
+        )}),
+    ],
+    "laugh": [
+        ("move_face", {"gestures": [{"gesture": "blink_eyes", "speed": "fast"}, {"gesture": "wiggle_eyebrows"}]}),
+        ("invoke_api_to_move_your_face", {"function_definition": (
+            "def laugh(ears, eyes, eyebrows):\n"
+            "    eyes.blink(speed=Speed.FAST)\n"
+            "    eyebrows.wiggle()\n"
+        )}),
+    ],
+}
+
+
+class StubPart:
+    moved_at: float | None = None
+
+    def wiggle(self, **kwargs: object) -> None:
+        self.moved_at = self.moved_at or time.monotonic()
+
+    def blink(self, **kwargs: object) -> None:
+        self.moved_at = self.moved_at or time.monotonic()
+
+
+class MockRealtimeServer:
+    def __init__(self, tokens_per_second: float) -> None:
+        self.token_interval = 1.0 / tokens_per_second
+        self.call: tuple[str, str] = ("", "{}")
+
+    async def handle(self, websocket: ServerConnection) -> None:
+        await websocket.send(json.dumps({"type": "session.created", "event_id": "e0", "session": {}}))
+        async for message in websocket:
+            if json.loads(message)["type"] != "response.create":
+                continue
+
+            name, arguments = self.call
+            await websocket.send(json.dumps({
+                "type": "response.output_item.added",
+                "event_id": "e1", "response_id": "r", "output_index": 0,
+                "item": {"id": "i", "object": "realtime.item", "type": "function_call",
+                         "call_id": "c", "name": name, "arguments": ""},
+            }))
+            for i in range(0, len(arguments), CHARS_PER_TOKEN):
+                await asyncio.sleep(self.token_interval)
+                await websocket.send(json.dumps({
+                    "type": "response.function_call_arguments.delta",
+                    "event_id": "e1", "response_id": "r", "item_id": "i", "output_index": 0, "call_id": "c",
+                    "delta": arguments[i:i + CHARS_PER_TOKEN],
+                }))
+            await websocket.send(json.dumps({
+                "type": "response.function_call_arguments.done",
+                "event_id": "e1", "response_id": "r", "item_id": "i", "output_index": 0, "call_id": "c",
+                "arguments": arguments,
+            }))
+            await websocket.send(json.dumps({
+                "type": "response.done",
+                "event_id": "e2",
+                "response": {
+                    "id": "r", "object": "realtime.response", "status": "completed",
+                    "output": [{
+                        "id": "i", "object": "realtime.item", "type": "function_call",
+                        "call_id": "c", "name": name, "arguments": arguments,
+                    }],
+                },
+            }))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    args = parser.parse_args()
+
+    server = MockRealtimeServer(args.tokens_per_second)
+    async with serve(server.handle, "127.0.0.1", 0) as websocket_server:
+        port = websocket_server.server.sockets[0].getsockname()[1]
+        client = openai.AsyncOpenAI(api_key="mock", websocket_base_url=f"ws://127.0.0.1:{port}/v1")
+
+        async with client.beta.realtime.connect(model="mock") as conn:
+            for scenario, calls in SCENARIOS.items():
+                print(f"{scenario}:")
+                for name, arguments in calls:
+                    part = StubPart()
+                    registry = GestureRegistry(ears=part, eyes=part, eyebrows=part)  # type: ignore[arg-type]
+                    server.call = (name, json.dumps(arguments))
+
+                    tool_calls = ToolCallAssembler()
+                    start = time.monotonic()
+                    await conn.response.create()
+                    async for event in conn:
+                        if (tool_call := tool_calls.feed(event)) is not None:
+                            func_args = json.loads(tool_call.arguments)
+                            if tool_call.name in registry:
+                                registry.invoke(tool_call.name, func_args)
+                            else:
+                                compile_gesture(func_args["function_definition"]).function(part, part, part)
+                        elif event.type == "response.done":
+                            break
+
+                    assert part.moved_at is not None
+                    tokens = -(-len(server.call[1]) // CHARS_PER_TOKEN)
+                    print(f"  {name:30} ~{tokens:3d} tokens, first motion after "
+                          f"{(part.moved_at - start) * 1000:4.0f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
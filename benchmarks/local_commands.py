@@ -0,0 +1,104 @@
+"""
+Measure how fast and how accurately the local command recognizer spots face commands.
+
+Usage:
+
+    venv/bin/python -m benchmarks.local_commands recordings/ [--min-confidence 0.8] [--stable-chunks 4]
+
+Each recording is a 16-bit mono WAV, trimmed to the speech, named after the
+gesture it asks for (e.g. `blink_eyes_03.wav`), or starting with `other` if it
+isn't a command. Recordings are fed to a `CommandRecognizer` in the chunks
+`Ears` reads, followed by a second of silence, as fast as the CPU allows. The
+latency of a command is the audio time from the end of the recording to the
+chunk that completed the command, plus the CPU time spent on that chunk.
+Commands taken from a stable partial result skip the confidence check, so
+they're counted separately.
+"""
+import argparse
+import os
+import time
+import wave
+
+import numpy as np
+
+from pi_robot.ears import Ears
+from pi_robot.ears import get_vosk_model
+from pi_robot.local_commands import COMMAND_PHRASES
+from pi_robot.local_commands import CommandRecognizer
+
+
+TRAILING_SILENCE = 1.0
+
+
+def expected_gesture(path: str) -> str | None:
+    name = os.path.basename(path)
+    return next((gesture for gesture in set(COMMAND_PHRASES.values()) if name.startswith(gesture)), None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("recordings", help="directory of WAV files")
+    parser.add_argument("--min-confidence", type=float, default=0.8)
+    parser.add_argument("--stable-chunks", type=int, default=4)
+    args = parser.parse_args()
+
+    model = get_vosk_model()
+    latencies = []
+    correct = wrong = missed = false_accepts = others = 0
+    # Commands taken from partial results, and how many of those were false accepts.
+    partials = partial_false_accepts = 0
+    cpu_seconds = audio_seconds = 0.0
+
+    for name in sorted(f for f in os.listdir(args.recordings) if f.endswith(".wav")):
+        path = os.path.join(args.recordings, name)
+        with wave.open(path, "rb") as wav:
+            rate = wav.getframerate()
+            audio = wav.readframes(wav.getnframes()) + bytes(int(TRAILING_SILENCE * rate) * 2)
+        speech_end = (len(audio) / 2 - TRAILING_SILENCE * rate) / rate
+
+        recognizer = CommandRecognizer(
+            model, rate, min_confidence=args.min_confidence, stable_chunks=args.stable_chunks
+        )
+        chunk_bytes = int(rate * Ears.CHUNK_DURATION) * 2
+        command = None
+        for offset in range(0, len(audio), chunk_bytes):
+            start = time.process_time()
+            command = recognizer.accept(audio[offset:offset + chunk_bytes])
+            elapsed = time.process_time() - start
+            cpu_seconds += elapsed
+            audio_seconds += chunk_bytes / 2 / rate
+            if command:
+                latency = (offset + chunk_bytes) / 2 / rate - speech_end + elapsed
+                break
+
+        partial = command is not None and command.confidence is None
+        partials += partial
+        expected = expected_gesture(path)
+        if expected is None:
+            others += 1
+            false_accepts += command is not None
+            partial_false_accepts += partial
+        elif command is None:
+            missed += 1
+        elif command.gesture != expected:
+            wrong += 1
+        else:
+            correct += 1
+            latencies.append(latency)
+
+        heard = f"{command.phrase!r} ({command.confidence or 'partial'})" if command else "nothing"
+        print(f"  {name:32} heard {heard}")
+
+    commands = correct + wrong + missed
+    print(f"commands: {correct}/{commands} correct, {wrong} wrong, {missed} missed")
+    print(f"other speech: {false_accepts}/{others} false accepts")
+    print(f"from partial results, with no confidence check: {partials} ({partial_false_accepts} false accepts)")
+    if latencies:
+        p50, p95 = np.percentile(np.array(latencies) * 1000, [50, 95])
+        print(f"end of speech to command: p50 {p50:.0f} ms, p95 {p95:.0f} ms (negative: before the speech ended)")
+    if audio_seconds:
+        print(f"CPU: {cpu_seconds / audio_seconds * 100:.1f}% of one core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Measure motion timing with fake servo/LED drivers, with and without GIL contention.
+
+Usage:
+
+    venv/bin/python -m benchmarks.motion [--busy-threads N]
+
+Compares the old per-gesture `time.sleep(duration / steps / 2)` loops against the
+shared MotionEngine, reporting how far each gesture overran its nominal duration
+and the engine's per-tick lateness.
+"""
+import argparse
+import threading
+import time
+
+from pi_robot.motion import Gesture
+from pi_robot.motion import Keyframes
+from pi_robot.motion import MotionEngine
+
+
+class FakeServo:
+    angle: float | None = None
+
+
+class FakeLED:
+    value: float = 0.0
+
+
+def legacy_wiggle(left: FakeServo, right: FakeServo, repeat_n: int, duration: float) -> None:
+    """The loop `Ears.wiggle` and `Eyebrows.wiggle` used to run."""
+    steps = 100
+    for _ in range(repeat_n):
+        for angle in [x * (45 / steps) for x in range(steps + 1)]:
+            left.angle = angle
+            right.angle = angle
+            time.sleep(duration / steps / 2.0)
+        for angle in [x * (45 / steps) for x in range(steps, -1, -1)]:
+            left.angle = angle
+            right.angle = angle
+            time.sleep(duration / steps / 2.0)
+
+
+def busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(i * i for i in range(10000))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--busy-threads", type=int, default=2)
+    parser.add_argument("--gestures", type=int, default=10)
+    args = parser.parse_args()
+
+    stop = threading.Event()
+    for _ in range(args.busy_threads):
+        threading.Thread(target=busy_loop, args=(stop,), daemon=True).start()
+
+    repeat_n, duration = 4, 0.2
+    nominal = repeat_n * duration
+
+    overruns = []
+    for _ in range(args.gestures):
+        start = time.monotonic()
+        legacy_wiggle(FakeServo(), FakeServo(), repeat_n, duration)
+        overruns.append(time.monotonic() - start - nominal)
+    print(f"legacy sleep loops ({args.busy_threads} busy threads):")
+    print(f"  overrun per {nominal:.1f}s gesture: mean {sum(overruns) / len(overruns) * 1000:.0f} ms, "
+          f"max {max(overruns) * 1000:.0f} ms")
+
+    engine = MotionEngine()
+    servos = [FakeServo() for _ in range(4)]
+    leds = [FakeLED() for _ in range(2)]
+    keyframes = Keyframes.oscillate(0.0, 45.0, duration, repeat_n)
+    blink = Keyframes.oscillate(0.0, 1.0, duration, repeat_n)
+
+    overruns = []
+    for _ in range(args.gestures):
+        start = time.monotonic()
+        handles = [
+            engine.play(Gesture("wiggle_ears", {(servos[0], "angle"): keyframes, (servos[1], "angle"): keyframes})),
+            engine.play(Gesture("wiggle_eyebrows", {(servos[2], "angle"): keyframes, (servos[3], "angle"): keyframes})),
+            engine.play(Gesture("blink", {(leds[0], "value"): blink, (leds[1], "value"): blink})),
+        ]
+        for handle in handles:
+            handle.wait()
+        overruns.append(time.monotonic() - start - nominal)
+
+    stats = engine.timing_stats()
+    print(f"MotionEngine at {engine.tick_rate:.0f} Hz, three concurrent gestures ({args.busy_threads} busy threads):")
+    print(f"  overrun per {nominal:.1f}s gesture: mean {sum(overruns) / len(overruns) * 1000:.0f} ms, "
+          f"max {max(overruns) * 1000:.0f} ms")
+    print(f"  tick lateness: p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms, "
+          f"max {stats['max_ms']:.2f} ms, {stats['missed_ticks']:.0f} missed ticks")
+
+    stop.set()
+
+
+if __name__ == "__main__":
+    main()
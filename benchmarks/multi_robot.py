@@ -0,0 +1,166 @@
+"""
+Measure how memory and CPU grow with the number of robots run by one host
+process, against running each robot in a process of its own. Run it on the Pi
+for numbers that matter.
+
+Usage:
+
+    venv/bin/python -m benchmarks.multi_robot [--robots 1 2 4 8] [--duration 10]
+
+Robots run on the simulation backend, listening to silence, against a local
+stand-in for the realtime API. For each count, a `RobotHost` with that many
+robots runs in a new process, and so does each robot on its own. After the
+robots have started, each process's RSS and CPU are measured over
+`--duration` seconds. Each robot has its own eye pins and four servo channels,
+four robots to a PCA9685.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+from websockets.asyncio.server import ServerConnection
+from websockets.asyncio.server import serve
+
+from pi_robot.hardware import get_hardware
+from pi_robot.host import RobotHost
+from pi_robot.host import rss_bytes
+from pi_robot.logging import logger
+
+
+STARTUP = 3.0
+ROBOTS_PER_DRIVER = 4
+
+
+async def accept_session(websocket: ServerConnection) -> None:
+    """Stands in for the realtime API, for robots that never hear anything to send."""
+    await websocket.send(json.dumps({"type": "session.created", "event_id": "e0", "session": {}}))
+    async for _ in websocket:
+        pass
+
+
+def robot_entry(i: int) -> dict:
+    first_channel = i % ROBOTS_PER_DRIVER * 4
+    return {
+        "config": "config.yaml",
+        "name": f"Robot{i}",
+        "connections": {
+            "eyes": {"left": 2 + i * 2, "right": 3 + i * 2},
+            "servo_driver": {
+                "address": 0x40 + i // ROBOTS_PER_DRIVER,
+                "channels": [first_channel, first_channel + 4],
+            },
+        },
+    }
+
+
+def write_host_config(path: str, entries: list[dict]) -> None:
+    with open(path, "w") as host_config_file:
+        yaml.safe_dump({"backend": "simulation", "robots": entries}, host_config_file)
+
+
+async def measure_host(host_config_path: str, duration: float) -> dict:
+    host = RobotHost(host_config_path)
+    task = asyncio.create_task(host.run())
+    await asyncio.sleep(STARTUP)
+
+    start, start_cpu, cpu_seconds = time.perf_counter(), time.process_time(), dict(host.cpu_seconds)
+    await asyncio.sleep(duration)
+    elapsed = time.perf_counter() - start
+    result = {
+        "rss": rss_bytes(),
+        "cpu": (time.process_time() - start_cpu) / elapsed * 100,
+        "loop_cpu": max(host.cpu_seconds[name] - cpu_seconds[name] for name in host.robots) / elapsed * 100,
+    }
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    for robot in host.robots.values():
+        robot.mouth.stop()
+        await robot.realtime.close()
+    host.close()
+    return result
+
+
+async def run_hosts(host_config_paths: list[str], duration: float) -> list[dict]:
+    """Run a process for each host config at the same time, and collect their measurements."""
+    processes = [
+        await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "benchmarks.multi_robot", "--host", path, "--duration", str(duration),
+            stdout=asyncio.subprocess.PIPE,
+        )
+        for path in host_config_paths
+    ]
+    outputs = await asyncio.gather(*(process.communicate() for process in processes))
+    return [json.loads(stdout) for stdout, _ in outputs]
+
+
+async def run(args: argparse.Namespace, workdir: str) -> None:
+    async with serve(accept_session, "127.0.0.1", 0) as websocket_server:
+        port = websocket_server.server.sockets[0].getsockname()[1]
+        with open(os.path.join(workdir, "config.yaml"), "w") as config_file:
+            yaml.safe_dump({
+                "name": "Benchmark",
+                "openai_api_key": "mock",
+                "openai_websocket_base_url": f"ws://127.0.0.1:{port}/v1",
+                "connections": {},
+            }, config_file)
+
+        print(
+            f"{'robots':>6} {'one process RSS':>16} {'per robot':>10} {'CPU':>7} {'max loop CPU':>13}"
+            f" {'separate RSS':>13} {'CPU':>7}"
+        )
+        first = None
+        for count in args.robots:
+            host_config_path = os.path.join(workdir, f"host_{count}.yaml")
+            write_host_config(host_config_path, [robot_entry(i) for i in range(count)])
+            single_paths = []
+            for i in range(count):
+                single_paths.append(os.path.join(workdir, f"single_{i}.yaml"))
+                write_host_config(single_paths[-1], [robot_entry(i)])
+
+            [host] = await run_hosts([host_config_path], args.duration)
+            singles = await run_hosts(single_paths, args.duration)
+
+            if first is None:
+                first = (count, host["rss"])
+            per_robot = (host["rss"] - first[1]) / (count - first[0]) if count > first[0] else host["rss"] / count
+            print(
+                f"{count:6} {host['rss'] / 2**20:12.1f} MiB {per_robot / 2**20:6.1f} MiB {host['cpu']:6.1f}%"
+                f" {host['loop_cpu']:12.1f}%"
+                f" {sum(s['rss'] for s in singles) / 2**20:9.1f} MiB {sum(s['cpu'] for s in singles):6.1f}%"
+            )
+        print(
+            "per robot: the RSS each robot added to the first row's; CPU: % of one core;"
+            " max loop CPU: the busiest robot's event loop tasks"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--robots", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to measure each run for")
+    parser.add_argument("--host", metavar="HOST_CONFIG", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    try:
+        if args.host:
+            print(json.dumps(asyncio.run(measure_host(args.host, args.duration))))
+            return
+        with tempfile.TemporaryDirectory() as workdir:
+            asyncio.run(run(args, workdir))
+    finally:
+        get_hardware().close()
+
+
+if __name__ == "__main__":
+    main()
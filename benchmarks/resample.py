@@ -0,0 +1,75 @@
+"""
+Compare CPU time of whole-buffer FFT resampling against the streaming polyphase resampler.
+
+Usage:
+
+    venv/bin/python -m benchmarks.resample recording.wav
+
+The WAV file must be 16-bit mono, typically captured from the robot's microphone
+at 44100 Hz. Without a file, ten seconds of noise is used instead.
+"""
+import sys
+import time
+import wave
+
+import numpy as np
+from scipy.signal import resample
+
+from pi_robot.resampler import StreamingResampler
+
+
+CHUNK_SIZE = 8192
+MIC_RATE = 44100
+TARGET_RATE = 24000
+
+
+def load_wav(path: str) -> tuple[bytes, int]:
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            raise ValueError(f"{path} must be 16-bit mono")
+        return wav.readframes(wav.getnframes()), wav.getframerate()
+
+
+def fft_resample(audio_data: bytes, orig_rate: int) -> None:
+    audio_np = np.frombuffer(audio_data, dtype=np.int16)
+    resample(audio_np, int(len(audio_np) * TARGET_RATE / orig_rate)).astype(np.int16).tobytes()
+
+
+def streaming_resample(audio_data: bytes, orig_rate: int) -> float:
+    """Resample chunk by chunk and return the slowest chunk's CPU time."""
+    resampler = StreamingResampler(orig_rate, TARGET_RATE)
+    chunk_bytes = CHUNK_SIZE * 2
+    slowest = 0.0
+
+    for i in range(0, len(audio_data), chunk_bytes):
+        start = time.process_time()
+        resampler.process(audio_data[i:i + chunk_bytes])
+        slowest = max(slowest, time.process_time() - start)
+
+    return slowest
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        audio_data, orig_rate = load_wav(sys.argv[1])
+    else:
+        orig_rate = MIC_RATE
+        audio_data = (np.random.default_rng(0).normal(0, 3000, orig_rate * 10)).astype(np.int16).tobytes()
+
+    duration = len(audio_data) / 2 / orig_rate
+    print(f"{duration:.1f}s of audio at {orig_rate} Hz -> {TARGET_RATE} Hz")
+
+    start = time.process_time()
+    fft_resample(audio_data, orig_rate)
+    fft_time = time.process_time() - start
+    print(f"  scipy.signal.resample, whole buffer: {fft_time * 1000:8.1f} ms CPU after end of speech")
+
+    start = time.process_time()
+    slowest = streaming_resample(audio_data, orig_rate)
+    streaming_time = time.process_time() - start
+    print(f"  StreamingResampler, {CHUNK_SIZE}-frame chunks: {streaming_time * 1000:8.1f} ms CPU total, "
+          f"{slowest * 1000:.1f} ms worst chunk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Measure I2C traffic for the servo gestures, per-write vs. through the coalescing ServoBus.
+
+Usage:
+
+    venv/bin/python -m benchmarks.servo_bus [--gestures N]
+
+Runs the ear and eyebrow wiggles on a fake PCA9685 that counts transactions
+and bytes. The per-write baseline is what `adafruit_motor.servo.Servo` does:
+one 4-byte register write (plus address) per angle assignment.
+"""
+import argparse
+import time
+
+from pi_robot.motion import Gesture
+from pi_robot.motion import Keyframes
+from pi_robot.motion import MotionEngine
+from pi_robot.servo_driver import ServoBus
+
+
+class FakeI2CDevice:
+    transactions: int = 0
+    bytes_written: int = 0
+
+    def __enter__(self) -> "FakeI2CDevice":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        pass
+
+    def write(self, buffer: bytearray) -> None:
+        self.transactions += 1
+        self.bytes_written += len(buffer)
+
+
+class FakePCA9685:
+    frequency = 50.0
+
+    def __init__(self) -> None:
+        self.i2c_device = FakeI2CDevice()
+
+
+class FakeServoKit:
+    def __init__(self) -> None:
+        self._pca = FakePCA9685()
+
+
+class CountingServo:
+    """Stands in for adafruit_motor's Servo: every assignment is an I2C write."""
+
+    def __init__(self, i2c: FakeI2CDevice) -> None:
+        self.i2c = i2c
+
+    @property
+    def angle(self) -> float:
+        return 0.0
+
+    @angle.setter
+    def angle(self, angle: float) -> None:
+        self.i2c.write(bytearray(5))
+
+
+def run_gestures(engine: MotionEngine, servos: list, n: int) -> float:
+    keyframes = Keyframes.oscillate(0.0, 45.0, 0.2, 4)
+    start = time.monotonic()
+    for _ in range(n):
+        handles = [
+            engine.play(Gesture("wiggle_ears", {(servos[0], "angle"): keyframes, (servos[1], "angle"): keyframes})),
+            engine.play(Gesture("wiggle_eyebrows", {(servos[2], "angle"): keyframes, (servos[3], "angle"): keyframes})),
+        ]
+        for handle in handles:
+            handle.wait()
+    return time.monotonic() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gestures", type=int, default=5)
+    args = parser.parse_args()
+
+    i2c = FakeI2CDevice()
+    elapsed = run_gestures(MotionEngine(), [CountingServo(i2c) for _ in range(4)], args.gestures)
+    print("per-write servos:")
+    print(f"  {i2c.transactions} transactions, {i2c.bytes_written} bytes, "
+          f"{i2c.transactions / elapsed:.0f} transactions/s")
+
+    engine = MotionEngine()
+    kit = FakeServoKit()
+    bus = ServoBus(kit, motion_engine=engine)  # type: ignore[arg-type]
+    # Eyebrows on channels 0-1 as in sample_config.yaml, and ears next to them on 2-3.
+    elapsed = run_gestures(engine, [bus.servo(channel) for channel in (2, 3, 0, 1)], args.gestures)
+    time.sleep(0.05)
+    stats = bus.stats()
+    i2c = kit._pca.i2c_device
+    print("ServoBus:")
+    print(f"  {i2c.transactions} transactions, {i2c.bytes_written} bytes, "
+          f"{i2c.transactions / elapsed:.0f} transactions/s")
+    print(f"  {stats['requested_writes']:.0f} angle writes requested, {stats['dropped_writes']:.0f} dropped "
+          f"as redundant, mean flush {stats['mean_flush_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
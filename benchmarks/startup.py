@@ -0,0 +1,78 @@
+"""
+Report cold-start time per module import and per hardware component.
+
+Usage:
+
+    venv/bin/python -m benchmarks.startup
+
+Each import is timed in a fresh interpreter so nothing is already loaded. The
+components are then brought up through the shared HardwareRegistry in this
+process, in the order `Robot` needs them before it can listen. Components that
+aren't available on this machine (e.g. no I2C bus) are reported as such.
+"""
+import subprocess
+import sys
+import time
+
+from pi_robot.ears import get_vosk_model
+from pi_robot.hardware import get_hardware
+from pi_robot.resampler import StreamingResampler
+
+
+IMPORTS = [
+    ("pi_robot.eyes", "import pi_robot.eyes"),
+    ("pi_robot.eyebrows", "import pi_robot.eyebrows"),
+    ("pi_robot.ears", "import pi_robot.ears"),
+    ("pi_robot.mouth", "import pi_robot.mouth"),
+    # What simple_robot.py imports, without running its loop.
+    ("simple_robot's imports", "import pi_robot.ears, pi_robot.eyebrows, pi_robot.eyes, pi_robot.mouth"),
+    ("pi_robot.robot", "import pi_robot.robot"),
+]
+
+
+def time_import(statement: str) -> str:
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode:
+        return f"failed ({result.stderr.strip().splitlines()[-1]})"
+    return f"{float(result.stdout) * 1000:6.0f} ms"
+
+
+def main() -> None:
+    print("imports (fresh interpreter each):")
+    for label, statement in IMPORTS:
+        print(f"  {label:24} {time_import(statement)}")
+
+    hardware = get_hardware()
+    components = [
+        ("servokit", lambda: hardware.servokit),
+        ("pin_factory", lambda: hardware.pin_factory),
+        ("pyaudio", lambda: hardware.pyaudio),
+        ("audio_devices", lambda: hardware.audio_devices),
+        ("vosk_model", get_vosk_model),
+    ]
+
+    print("components (time to ready):")
+    total = 0.0
+    for name, create in components:
+        try:
+            create()
+        except Exception as e:
+            print(f"  {name:24} unavailable ({type(e).__name__}: {e})")
+            continue
+        total += hardware.startup_times[name]
+        print(f"  {name:24} {hardware.startup_times[name] * 1000:6.0f} ms")
+
+    start = time.perf_counter()
+    StreamingResampler(44100, 24000)
+    print(f"  {'resampler (if needed)':24} {(time.perf_counter() - start) * 1000:6.0f} ms")
+    print(f"  {'total':24} {total * 1000:6.0f} ms, excluding the resampler")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Measure end-to-end turn latency: from the end of speech to the turn being detected,
+the first response audio arriving, the first audio out and the first motion.
+
+Usage:
+
+    venv/bin/python -m benchmarks.turn_latency utterances/ [--repeat N] [--server-delay S]
+        [--save results.json] [--baseline results.json] [--tolerance 0.1]
+
+The utterances (16-bit mono WAVs at one sample rate, trimmed to the speech) are
+joined with silence into one recording, which the simulation backend's
+microphone plays into a real `Robot` in real time. The robot talks to a local
+stand-in for the realtime API that answers each committed turn after
+`--server-delay` with spoken audio and a gesture call mid-sentence.
+
+Times are taken on one monotonic clock: end of speech from where each utterance
+ends in the recording, the turn and first response audio from `Robot.reply`,
+and audio out and motion from the simulation's state recorder. With
+`--baseline`, the run fails if any stage's p50 or p95 got slower than in the
+baseline by more than `--tolerance`.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import wave
+from dataclasses import dataclass
+
+import numpy as np
+import yaml
+from openai.resources.beta.realtime.realtime import AsyncRealtimeConnection
+from websockets.asyncio.server import ServerConnection
+from websockets.asyncio.server import serve
+
+from pi_robot.hardware import get_hardware
+from pi_robot.logging import logger
+from pi_robot.robot import OPENAI_AUDIO_SAMPLE_RATE
+from pi_robot.robot import Robot
+
+
+# Long enough for the adaptive VAD to settle on the noise floor before the first utterance.
+LEAD_IN_DURATION = 1.0
+
+CONNECTIONS = {
+    "mouth": 22,
+    "eyes": {"left": 17, "right": 27},
+    "eyebrows": {"left": 0, "right": 1},
+    "ears": {"left": 2, "right": 3},
+}
+# Everything that moves, as named by the state recorder. The mouth LED only follows the audio.
+MOTION_DEVICES = {"GPIO17", "GPIO27", "servo0", "servo1", "servo2", "servo3"}
+
+STAGES = ("end_of_turn", "first_audio_delta", "first_audio_out", "first_motion")
+
+
+@dataclass
+class Turn:
+    started_at: float
+    first_audio_delta_at: float | None = None
+
+
+class InstrumentedRobot(Robot):
+    """A `Robot` that notes when each turn starts and when its first response audio arrives."""
+
+    turns: list[Turn]
+
+    def __init__(self, config_file_path: str) -> None:
+        super().__init__(config_file_path)
+        self.turns = []
+
+        speak = self.mouth.speak
+
+        async def timed_speak(audio_data: bytes) -> None:
+            turn = self.turns[-1]
+            turn.first_audio_delta_at = turn.first_audio_delta_at or time.monotonic()
+            await speak(audio_data)
+
+        setattr(self.mouth, "speak", timed_speak)
+
+    async def reply(
+        self,
+        openai_conn: AsyncRealtimeConnection,
+        audio_message: bytes | memoryview | None = None,
+        performed_gesture: str | None = None,
+    ) -> None:
+        self.turns.append(Turn(time.monotonic()))
+        await super().reply(openai_conn, audio_message, performed_gesture)
+
+
+class MockRealtimeServer:
+    """Answers each `response.create` with `reply_duration` of tone, calling `blink_eyes` halfway through."""
+
+    CHUNK_DURATION = 0.1
+
+    def __init__(self, server_delay: float, reply_duration: float, generation_speed: float) -> None:
+        self.server_delay = server_delay
+        self.reply_duration = reply_duration
+        self.generation_speed = generation_speed
+
+        t = np.arange(int(OPENAI_AUDIO_SAMPLE_RATE * self.CHUNK_DURATION)) / OPENAI_AUDIO_SAMPLE_RATE
+        tone = (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16)
+        self.chunk = base64.b64encode(tone.tobytes()).decode("utf-8")
+
+    async def handle(self, websocket: ServerConnection) -> None:
+        await websocket.send(json.dumps({"type": "session.created", "event_id": "e0", "session": {}}))
+        turn = 0
+        async for message in websocket:
+            if json.loads(message)["type"] != "response.create":
+                continue
+
+            turn += 1
+            response_id = f"r{turn}"
+            await asyncio.sleep(self.server_delay)
+
+            n_chunks = max(1, round(self.reply_duration / self.CHUNK_DURATION))
+            for i in range(n_chunks):
+                if i == n_chunks // 2:
+                    await self.send_tool_call(websocket, response_id, f"c{turn}")
+                await websocket.send(json.dumps({
+                    "type": "response.audio.delta",
+                    "event_id": "e1", "response_id": response_id, "item_id": "a",
+                    "output_index": 0, "content_index": 0, "delta": self.chunk,
+                }))
+                await asyncio.sleep(self.CHUNK_DURATION / self.generation_speed)
+
+            await websocket.send(json.dumps({
+                "type": "response.done",
+                "event_id": "e2",
+                "response": {"id": response_id, "object": "realtime.response", "status": "completed", "output": []},
+            }))
+
+    async def send_tool_call(self, websocket: ServerConnection, response_id: str, call_id: str) -> None:
+        await websocket.send(json.dumps({
+            "type": "response.output_item.added",
+            "event_id": "e3", "response_id": response_id, "output_index": 1,
+            "item": {"id": call_id, "object": "realtime.item", "type": "function_call",
+                     "call_id": call_id, "name": "blink_eyes", "arguments": ""},
+        }))
+        await websocket.send(json.dumps({
+            "type": "response.function_call_arguments.done",
+            "event_id": "e4", "response_id": response_id, "item_id": call_id, "output_index": 1,
+            "call_id": call_id, "arguments": json.dumps({"repeat_n": 2}),
+        }))
+
+
+def list_utterances(paths: list[str]) -> list[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(".wav")))
+        else:
+            files.append(path)
+    return files
+
+
+def build_recording(utterance_paths: list[str], repeat: int, gap: float, output_path: str) -> list[float]:
+    """Join the utterances with `gap` of silence after each. Returns where each utterance ends, in seconds."""
+    rate = None
+    utterances = []
+    for path in utterance_paths:
+        with wave.open(path, "rb") as wav:
+            if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+                sys.exit(f"{path} must be 16-bit mono")
+            if rate not in (None, wav.getframerate()):
+                sys.exit(f"{path} is {wav.getframerate()} Hz, but the other utterances are {rate} Hz")
+            rate = wav.getframerate()
+            utterances.append(wav.readframes(wav.getnframes()))
+    assert rate is not None
+
+    speech_ends = []
+    with wave.open(output_path, "wb") as recording:
+        recording.setnchannels(1)
+        recording.setsampwidth(2)
+        recording.setframerate(rate)
+        recording.writeframes(bytes(int(LEAD_IN_DURATION * rate) * 2))
+        for _ in range(repeat):
+            for audio_data in utterances:
+                recording.writeframes(audio_data)
+                speech_ends.append(recording.tell() / rate)
+                recording.writeframes(bytes(int(gap * rate) * 2))
+    return speech_ends
+
+
+def write_config(path: str, port: int, recording_path: str, output_path: str) -> None:
+    config = {
+        "name": "Benchmark",
+        "openai_api_key": "mock",
+        "openai_websocket_base_url": f"ws://127.0.0.1:{port}/v1",
+        "backend": "simulation",
+        "simulation": {"input_wav": recording_path, "output_wav": output_path},
+        "connections": CONNECTIONS,
+    }
+    with open(path, "w") as config_file:
+        yaml.safe_dump(config, config_file)
+
+
+def measure(robot: InstrumentedRobot, speech_ends: list[float], gap: float) -> dict[str, list[float]]:
+    """Match each utterance to the turn that followed it and return each stage's latencies in seconds."""
+    simulation = get_hardware().simulation
+    assert simulation is not None
+    recorder = simulation.recorder
+    changes = [(recorder.start + change.timestamp, change) for change in recorder.changes]
+
+    mic_start = next(t for t, change in changes if change.device == "microphone" and change.value == 1.0)
+    latencies: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    missed = 0
+    for speech_end_offset in speech_ends:
+        speech_end = mic_start + speech_end_offset
+        turn = next((t for t in robot.turns if speech_end <= t.started_at < speech_end + gap), None)
+        if turn is None:
+            missed += 1
+            continue
+
+        audio_out = next((t for t, c in changes if c.device == "speaker" and t >= turn.started_at), None)
+        motion = next((t for t, c in changes if c.device in MOTION_DEVICES and t >= turn.started_at), None)
+        for stage, at in [
+            ("end_of_turn", turn.started_at),
+            ("first_audio_delta", turn.first_audio_delta_at),
+            ("first_audio_out", audio_out),
+            ("first_motion", motion),
+        ]:
+            if at is not None:
+                latencies[stage].append(at - speech_end)
+
+    if missed:
+        print(f"{missed} of {len(speech_ends)} utterances didn't start a turn")
+    return latencies
+
+
+def summarize(latencies: dict[str, list[float]]) -> dict[str, dict[str, float]]:
+    summary = {}
+    for stage, values in latencies.items():
+        if values:
+            p50, p95, p99 = np.percentile(np.array(values) * 1000, [50, 95, 99])
+            summary[stage] = {"n": len(values), "p50": float(p50), "p95": float(p95), "p99": float(p99)}
+    return summary
+
+
+def find_regressions(
+    summary: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+) -> list[str]:
+    regressions = []
+    for stage, stats in summary.items():
+        for percentile in ("p50", "p95"):
+            before = baseline.get(stage, {}).get(percentile)
+            if before is not None and stats[percentile] > before * (1 + tolerance):
+                regressions.append(f"{stage} {percentile}: {before:.0f} ms -> {stats[percentile]:.0f} ms")
+    return regressions
+
+
+async def run_turns(args: argparse.Namespace, workdir: str) -> dict[str, list[float]]:
+    recording_path = os.path.join(workdir, "recording.wav")
+    speech_ends = build_recording(list_utterances(args.utterances), args.repeat, args.gap, recording_path)
+
+    server = MockRealtimeServer(args.server_delay, args.reply_duration, args.generation_speed)
+    async with serve(server.handle, "127.0.0.1", 0) as websocket_server:
+        port = websocket_server.server.sockets[0].getsockname()[1]
+        config_path = os.path.join(workdir, "config.yaml")
+        write_config(config_path, port, recording_path, os.path.join(workdir, "robot_speech.wav"))
+
+        robot = InstrumentedRobot(config_path)
+        run = asyncio.create_task(robot.run())
+        # The microphone starts with the robot, so this covers the whole recording plus the last reply.
+        await asyncio.sleep(LEAD_IN_DURATION + speech_ends[-1] + args.gap + 1.0)
+        run.cancel()
+        try:
+            await run
+        except asyncio.CancelledError:
+            pass
+        robot.mouth.stop()
+        await robot.realtime.close()
+
+    return measure(robot, speech_ends, args.gap)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("utterances", nargs="+", help="WAV files, or directories of them")
+    parser.add_argument("--repeat", type=int, default=1, help="play the utterances this many times")
+    parser.add_argument("--gap", type=float, default=5.0, help="seconds of silence after each utterance")
+    parser.add_argument("--server-delay", type=float, default=0.3, help="seconds before the server answers")
+    parser.add_argument("--reply-duration", type=float, default=1.0, help="seconds of audio in each reply")
+    parser.add_argument("--generation-speed", type=float, default=4.0, help="reply audio sent at N x real time")
+    parser.add_argument("--save", help="write the summary to this JSON file")
+    parser.add_argument("--baseline", help="compare against a summary saved with --save")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed slowdown vs. the baseline")
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            latencies = asyncio.run(run_turns(args, workdir))
+        finally:
+            get_hardware().close()
+
+    summary = summarize(latencies)
+    print(f"{'stage':20} {'n':>4} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for stage, stats in summary.items():
+        print(f"{stage:20} {stats['n']:4.0f} {stats['p50']:5.0f} ms {stats['p95']:5.0f} ms {stats['p99']:5.0f} ms")
+
+    if args.save:
+        with open(args.save, "w") as summary_file:
+            json.dump(summary, summary_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = find_regressions(summary, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Compare the fixed-RMS and adaptive voice activity detectors on a labelled WAV corpus.
+
+Usage:
+
+    venv/bin/python -m benchmarks.vad corpus_dir/
+
+Each `name.wav` (16-bit mono) in the directory needs a `name.txt` label file in
+Audacity's format, one labelled speech region per line: `start<TAB>end[<TAB>label]`,
+in seconds.
+
+For each detector this reports false triggers (speech onsets outside any labelled
+region), missed utterances, and the end-of-turn latency, measured from the labelled
+end of speech to the moment `Ears` would decide the turn is over.
+"""
+import os
+import sys
+import wave
+from dataclasses import dataclass
+
+import numpy as np
+
+from pi_robot.vad import AdaptiveVAD
+from pi_robot.vad import RmsVAD
+from pi_robot.vad import VoiceActivityDetector
+
+
+ONSET_TOLERANCE = 0.3
+
+
+@dataclass
+class DetectorConfig:
+    name: str
+    vad: VoiceActivityDetector
+    chunk_duration: float
+    silence_duration: float
+    min_speech_duration: float = 0.5
+
+
+@dataclass
+class Turn:
+    start: float
+    end_of_turn: float
+
+
+def load_corpus(corpus_dir: str) -> list[tuple[str, np.ndarray, int, list[tuple[float, float]]]]:
+    corpus = []
+    for filename in sorted(os.listdir(corpus_dir)):
+        if not filename.endswith(".wav"):
+            continue
+
+        path = os.path.join(corpus_dir, filename)
+        with wave.open(path, "rb") as wav:
+            if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+                raise ValueError(f"{path} must be 16-bit mono")
+            audio_np = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+            sample_rate = wav.getframerate()
+
+        labels = []
+        with open(path[:-len(".wav")] + ".txt") as label_file:
+            for line in label_file:
+                fields = line.split("\t")
+                if len(fields) >= 2:
+                    labels.append((float(fields[0]), float(fields[1])))
+
+        corpus.append((filename, audio_np, sample_rate, labels))
+    return corpus
+
+
+def detect_turns(config: DetectorConfig, audio_np: np.ndarray, sample_rate: int) -> tuple[list[Turn], list[float]]:
+    """Replay `Ears.listen`/`heard_end_of_speech` in audio time. Returns turns and all speech onsets."""
+    config.vad.reset()
+    chunk_size = int(sample_rate * config.chunk_duration)
+
+    turns: list[Turn] = []
+    onsets: list[float] = []
+    speech_start: float | None = None
+    silence_start: float | None = None
+
+    for i in range(0, len(audio_np) - chunk_size + 1, chunk_size):
+        now = (i + chunk_size) / sample_rate
+
+        if config.vad.process(audio_np[i:i + chunk_size], sample_rate):
+            if speech_start is None:
+                speech_start = now
+                onsets.append(now)
+            silence_start = None
+        elif silence_start is None:
+            silence_start = now
+
+        if speech_start is not None and silence_start is not None:
+            if now - silence_start >= config.silence_duration:
+                if now - speech_start >= config.min_speech_duration:
+                    turns.append(Turn(start=speech_start, end_of_turn=now))
+                speech_start = None
+                silence_start = None
+
+    return turns, onsets
+
+
+def evaluate(config: DetectorConfig, corpus: list) -> None:
+    false_triggers = 0
+    missed = 0
+    latencies = []
+
+    for _, audio_np, sample_rate, labels in corpus:
+        turns, onsets = detect_turns(config, audio_np, sample_rate)
+
+        for onset in onsets:
+            if not any(start - ONSET_TOLERANCE <= onset <= end + ONSET_TOLERANCE for start, end in labels):
+                false_triggers += 1
+
+        for _, end in labels:
+            ends = [turn.end_of_turn for turn in turns if turn.end_of_turn >= end]
+            if ends:
+                latencies.append(min(ends) - end)
+            else:
+                missed += 1
+
+    n_labels = sum(len(labels) for _, _, _, labels in corpus)
+    print(f"{config.name}")
+    print(f"  false triggers: {false_triggers}")
+    print(f"  missed:         {missed}/{n_labels}")
+    if latencies:
+        print(f"  end-of-turn latency: mean {np.mean(latencies):.2f}s, "
+              f"p50 {np.percentile(latencies, 50):.2f}s, p95 {np.percentile(latencies, 95):.2f}s")
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    corpus = load_corpus(sys.argv[1])
+
+    evaluate(DetectorConfig("fixed RMS (500), 8192-frame chunks at 44.1 kHz, 2.0s silence",
+                            RmsVAD(500), chunk_duration=8192 / 44100, silence_duration=2.0), corpus)
+    evaluate(DetectorConfig("adaptive, 60ms chunks, 0.8s silence",
+                            AdaptiveVAD(), chunk_duration=0.06, silence_duration=0.8), corpus)
+
+
+if __name__ == "__main__":
+    main()
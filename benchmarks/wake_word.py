@@ -0,0 +1,97 @@
+"""
+Measure how often the wake word detector misses the wake word or hears it in
+other speech, and how much CPU it takes. Run it on the Pi for numbers that
+matter.
+
+Usage:
+
+    venv/bin/python -m benchmarks.wake_word recordings/ --name Robot [--phrase "hey robot"] [--min-confidence 0.7]
+        [--stable-chunks 4]
+
+Each recording is a 16-bit mono WAV. Those whose name starts with `wake`
+contain a wake phrase, e.g. `wake_07.wav` with "hey robot, blink your eyes";
+any others are audio the robot should ignore, ideally long stretches of
+background chatter from where it will be deployed. Recordings are fed to a
+`WakeWordDetector` in the chunks `Ears` reads, as fast as the CPU allows. In
+the other recordings the detector is reset after every false accept, so that
+one recording can count several. Detections taken from a stable partial
+result skip the confidence check, so they're counted separately.
+"""
+import argparse
+import os
+import time
+import wave
+
+from pi_robot.ears import Ears
+from pi_robot.ears import get_vosk_model
+from pi_robot.wake_word import WakeWordDetector
+from pi_robot.wake_word import wake_phrases
+
+
+TRAILING_SILENCE = 1.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("recordings", help="directory of WAV files")
+    parser.add_argument("--name", required=True, help="the robot's name, as in the config")
+    parser.add_argument("--phrase", action="append", help="a wake phrase, instead of ones made from the name")
+    parser.add_argument("--min-confidence", type=float, default=0.7)
+    parser.add_argument("--stable-chunks", type=int, default=4)
+    args = parser.parse_args()
+
+    model = get_vosk_model()
+    detected = missed = false_accepts = 0
+    # Detections taken from partial results, and how many of those were false accepts.
+    partials = partial_false_accepts = 0
+    cpu_seconds = audio_seconds = other_seconds = 0.0
+    print(f"wake phrases: {', '.join(args.phrase or wake_phrases(args.name))}")
+
+    for name in sorted(f for f in os.listdir(args.recordings) if f.endswith(".wav")):
+        path = os.path.join(args.recordings, name)
+        with wave.open(path, "rb") as wav:
+            rate = wav.getframerate()
+            audio = wav.readframes(wav.getnframes()) + bytes(int(TRAILING_SILENCE * rate) * 2)
+
+        detector = WakeWordDetector(
+            model, rate, args.name, phrases=args.phrase, min_confidence=args.min_confidence,
+            stable_chunks=args.stable_chunks,
+        )
+        chunk_bytes = int(rate * Ears.CHUNK_DURATION) * 2
+        heard = []
+        heard_partials = 0
+        for offset in range(0, len(audio), chunk_bytes):
+            start = time.process_time()
+            match = detector.accept(audio[offset:offset + chunk_bytes])
+            cpu_seconds += time.process_time() - start
+            if match:
+                heard.append(f"{match.phrase!r} ({match.confidence or 'partial'}) at {offset / 2 / rate:.1f} s")
+                heard_partials += match.confidence is None
+                detector.reset()
+        duration = len(audio) / 2 / rate
+        audio_seconds += duration
+
+        if name.startswith("wake"):
+            detected += bool(heard)
+            missed += not heard
+        else:
+            false_accepts += len(heard)
+            partial_false_accepts += heard_partials
+            other_seconds += duration
+        partials += heard_partials
+        print(f"  {name:32} heard {', '.join(heard) or 'nothing'}")
+
+    if detected + missed:
+        print(f"wake phrases: {detected}/{detected + missed} detected, {missed} missed")
+    if other_seconds:
+        print(
+            f"other audio: {false_accepts} false accepts in {other_seconds / 60:.1f} min"
+            f" ({false_accepts / other_seconds * 3600:.1f} per hour)"
+        )
+    print(f"from partial results, with no confidence check: {partials} ({partial_false_accepts} false accepts)")
+    if audio_seconds:
+        print(f"CPU: {cpu_seconds / audio_seconds * 100:.1f}% of one core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Fixed-size ring of 16-bit samples, written from the PyAudio callback thread.
+
+    Every sample is stored twice, `capacity` apart, so any span of up to
+    `capacity` samples can be handed out as one contiguous view without copying.
+    Positions are absolute sample counts since the buffer was created.
+    """
+
+    capacity: int
+    samples: np.ndarray
+    write_index: int
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.samples = np.zeros(2 * capacity, dtype=np.int16)
+        self.write_index = 0
+
+    @property
+    def oldest_index(self) -> int:
+        """Position of the oldest sample that has not been overwritten yet."""
+        return max(0, self.write_index - self.capacity)
+
+    def write(self, audio_data: bytes) -> None:
+        chunk = np.frombuffer(audio_data, dtype=np.int16)
+        if len(chunk) > self.capacity:
+            self.write_index += len(chunk) - self.capacity
+            chunk = chunk[-self.capacity:]
+
+        n = len(chunk)
+        start = self.write_index % self.capacity
+        end = start + n
+
+        self.samples[start:end] = chunk
+        if end <= self.capacity:
+            self.samples[start + self.capacity:end + self.capacity] = chunk
+        else:
+            wrapped = end - self.capacity
+            self.samples[start + self.capacity:] = chunk[:n - wrapped]
+            self.samples[:wrapped] = chunk[n - wrapped:]
+
+        self.write_index += n
+
+    def view(self, start: int, end: int) -> np.ndarray:
+        """Return the samples in [start, end) as a view into the ring, without copying."""
+        start = max(start, self.oldest_index)
+        end = min(end, self.write_index)
+        offset = start % self.capacity
+        return self.samples[offset:offset + max(0, end - start)]
@@ -0,0 +1,233 @@
+import json
+import os
+import time
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING
+from typing import Mapping
+
+from pi_robot.hardware import get_hardware
+from pi_robot.logging import logger
+
+if TYPE_CHECKING:
+    import pyaudio
+
+
+AUDIO_DEVICE_CACHE_PATH = os.path.expanduser("~/.cache/pi_robot/audio_devices.json")
+
+CANDIDATE_RATES = (16000, 22050, 24000, 32000, 44100, 48000)
+CANDIDATE_BUFFER_SIZES = (128, 256, 512, 1024, 2048, 4096)
+
+
+@dataclass
+class DeviceProfile:
+    """What a device supports for 16-bit audio, as found by probing it."""
+
+    identity: str
+    name: str
+    host_api: int
+    max_input_channels: int
+    max_output_channels: int
+    input_rates: list[int]
+    output_rates: list[int]
+    # e.g. "input:24000" -> frames_per_buffer to open that stream with
+    stable_buffer_sizes: dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class StreamConfig:
+    device_index: int | None
+    rate: int
+    frames_per_buffer: int
+
+
+def device_identity(info: Mapping[str, str | int | float]) -> str:
+    """A key that survives reboots and reordering, unlike the PortAudio device index."""
+    return f"{info['hostApi']}:{info['name']}:{info['maxInputChannels']}:{info['maxOutputChannels']}"
+
+
+class AudioDeviceProbe:
+    """
+    Finds which rates and buffer sizes each audio device supports, once.
+
+    Devices are probed the first time they're seen and the results are saved to
+    `cache_path`, keyed by device identity, so later starts only list the
+    devices. Stream configs pick the lowest-latency buffer size that ran
+    cleanly, rather than a fixed rate and buffer size.
+    """
+
+    STABILITY_TEST_DURATION = 0.3
+    # Use twice the smallest buffer that held up in the test, since the app does more than the test.
+    BUFFER_MARGIN = 2
+
+    audio: "pyaudio.PyAudio"
+    cache_path: str
+    profiles: dict[str, DeviceProfile]
+    indexes: dict[str, int]
+
+    def __init__(self, audio: "pyaudio.PyAudio", cache_path: str = AUDIO_DEVICE_CACHE_PATH) -> None:
+        self.audio = audio
+        self.cache_path = cache_path
+        self.profiles = {}
+        self.indexes = {}
+
+        # Devices that aren't plugged in right now stay in the cache for next time.
+        self.cached = cached = self.load()
+        dirty = False
+        for index in range(audio.get_device_count()):
+            info = audio.get_device_info_by_index(index)
+            identity = device_identity(info)
+            self.indexes[identity] = index
+            if identity in cached:
+                self.profiles[identity] = cached[identity]
+            else:
+                self.profiles[identity] = self.probe_device(index, info)
+                dirty = True
+
+        if dirty:
+            self.save()
+
+    def load(self) -> dict[str, DeviceProfile]:
+        try:
+            with open(self.cache_path) as cache_file:
+                return {identity: DeviceProfile(**profile) for identity, profile in json.load(cache_file).items()}
+        except (OSError, ValueError, TypeError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Ignoring unreadable audio device cache {self.cache_path}: {e}")
+            return {}
+
+    def save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, "w") as cache_file:
+                profiles = {**self.cached, **self.profiles}
+                json.dump({identity: asdict(profile) for identity, profile in profiles.items()}, cache_file)
+        except OSError as e:
+            logger.warning(f"Couldn't save the audio device cache to {self.cache_path}: {e}")
+
+    def probe_device(self, index: int, info: Mapping[str, str | int | float]) -> DeviceProfile:
+        pa_int16 = get_hardware().portaudio.paInt16
+
+        def supports(rate: int, input: bool) -> bool:
+            try:
+                if input:
+                    return bool(self.audio.is_format_supported(
+                        rate, input_device=index, input_channels=1, input_format=pa_int16
+                    ))
+                return bool(self.audio.is_format_supported(
+                    rate, output_device=index, output_channels=1, output_format=pa_int16
+                ))
+            except ValueError:
+                return False
+
+        max_input_channels = int(info["maxInputChannels"])
+        max_output_channels = int(info["maxOutputChannels"])
+        return DeviceProfile(
+            identity=device_identity(info),
+            name=str(info["name"]),
+            host_api=int(info["hostApi"]),
+            max_input_channels=max_input_channels,
+            max_output_channels=max_output_channels,
+            input_rates=[r for r in CANDIDATE_RATES if max_input_channels and supports(r, True)],
+            output_rates=[r for r in CANDIDATE_RATES if max_output_channels and supports(r, False)],
+        )
+
+    def runs_cleanly(self, index: int, rate: int, frames_per_buffer: int, input: bool) -> bool:
+        """Stream silence through the device for a moment and report whether it over/underflowed."""
+        blocks = max(1, int(self.STABILITY_TEST_DURATION * rate / frames_per_buffer))
+        try:
+            stream = self.audio.open(
+                format=get_hardware().portaudio.paInt16,
+                channels=1,
+                rate=rate,
+                input=input,
+                output=not input,
+                input_device_index=index if input else None,
+                output_device_index=None if input else index,
+                frames_per_buffer=frames_per_buffer,
+            )
+        except (OSError, ValueError):
+            return False
+
+        try:
+            silence = bytes(frames_per_buffer * 2)
+            for _ in range(blocks):
+                if input:
+                    stream.read(frames_per_buffer, exception_on_overflow=True)
+                else:
+                    stream.write(silence, exception_on_underflow=True)
+            return True
+        except OSError:
+            return False
+        finally:
+            stream.stop_stream()
+            stream.close()
+
+    def stable_buffer_size(self, identity: str, rate: int, input: bool) -> int:
+        profile = self.profiles[identity]
+        key = f"{'input' if input else 'output'}:{rate}"
+        if key not in profile.stable_buffer_sizes:
+            start = time.monotonic()
+            size = CANDIDATE_BUFFER_SIZES[-1]
+            for candidate in CANDIDATE_BUFFER_SIZES:
+                if self.runs_cleanly(self.indexes[identity], rate, candidate, input):
+                    size = min(candidate * self.BUFFER_MARGIN, CANDIDATE_BUFFER_SIZES[-1])
+                    break
+            profile.stable_buffer_sizes[key] = size
+            logger.debug(f"Probed {profile.name} {key}: {size} frames in {time.monotonic() - start:.1f}s")
+            self.save()
+        return profile.stable_buffer_sizes[key]
+
+    @staticmethod
+    def choose_rate(rates: list[int], preferred_rate: int) -> int:
+        """The preferred rate if supported, else the lowest rate above it, else the highest below it."""
+        if preferred_rate in rates or not rates:
+            return preferred_rate
+        higher = [r for r in rates if r > preferred_rate]
+        return min(higher) if higher else max(rates)
+
+    def find_microphone(self) -> str | None:
+        """Prefer a USB microphone over virtual devices like "pulse" and "default"."""
+        inputs = [p for p in self.profiles.values() if p.max_input_channels > 0 and p.input_rates]
+        for profile in inputs:
+            name = profile.name.lower()
+            if "pulse" not in name and "default" not in name and profile.host_api == 0:
+                return profile.identity
+
+        try:
+            default_index = int(self.audio.get_default_input_device_info()["index"])
+        except OSError:
+            return inputs[0].identity if inputs else None
+        return next((i for i, index in self.indexes.items() if index == default_index), None)
+
+    def find_device(self, name: str, input: bool) -> str:
+        """The first device whose name contains `name`, ignoring case, e.g. to give each robot its own."""
+        for identity, profile in self.profiles.items():
+            channels = profile.max_input_channels if input else profile.max_output_channels
+            if identity in self.indexes and channels > 0 and name.lower() in profile.name.lower():
+                return identity
+        raise ValueError(f"No {'input' if input else 'output'} audio device named like {name!r}")
+
+    def find_speaker(self) -> str | None:
+        try:
+            default_index = int(self.audio.get_default_output_device_info()["index"])
+        except OSError:
+            return None
+        return next((i for i, index in self.indexes.items() if index == default_index), None)
+
+    def input_config(self, preferred_rate: int, device: str | None = None) -> StreamConfig:
+        identity = self.find_device(device, input=True) if device else self.find_microphone()
+        if identity is None:
+            return StreamConfig(None, preferred_rate, int(preferred_rate * 0.02))
+
+        rate = self.choose_rate(self.profiles[identity].input_rates, preferred_rate)
+        return StreamConfig(self.indexes[identity], rate, self.stable_buffer_size(identity, rate, input=True))
+
+    def output_config(self, rate: int, device: str | None = None) -> StreamConfig:
+        """Output always runs at `rate`, which is what the realtime API sends."""
+        identity = self.find_device(device, input=False) if device else self.find_speaker()
+        if identity is None or rate not in self.profiles[identity].output_rates:
+            return StreamConfig(None, rate, int(rate * 0.02))
+
+        return StreamConfig(self.indexes[identity], rate, self.stable_buffer_size(identity, rate, input=False))
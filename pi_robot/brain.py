@@ -1,7 +1,10 @@
+import functools
 import textwrap
 from scooterbot_agent.python_api_agent import PythonAPIAgent
 from scooterbot_agent.python_api_agent import generate_python_api_doc
 
+from pi_robot.gesture_compiler import GestureCompileError
+from pi_robot.gesture_compiler import compile_gesture
 from pi_robot.logging import logger
 from pi_robot.mouth import Mouth
 from pi_robot.movement import Speed
@@ -10,6 +13,73 @@ from pi_robot.eyebrows import Eyebrows
 from pi_robot.eyes import Eyes
 
 
+# The classes and members documented for the model. Part of the usage guide's cache
+# key, so changing what is exposed rebuilds the guide.
+API_SURFACE = (
+    (Speed, ("FAST", "SLOW")),
+    (Ears, ("wiggle",)),
+    (Eyes, ("blink",)),
+    (Eyebrows, ("wiggle",)),
+)
+
+
+@functools.lru_cache(maxsize=8)
+def build_usage_guide(api_surface: tuple[tuple[type, tuple[str, ...]], ...]) -> str:
+    """Render the API usage guide. Introspects the classes, so it only runs once per API surface."""
+    api_docs = [generate_python_api_doc(cls, whitelisted_members=list(members)) for cls, members in api_surface]
+    return textwrap.dedent(
+        """\
+        # API Specification
+
+        This class provides access to the robot's physical capabilities.
+
+        ```
+        {api}
+        ```
+
+        # API Usage
+
+        To use this API, build a python function with the following signature:
+
+        ```
+        def `function_name`(robot_brain):
+        ```
+
+        - function_name should describe the request to be fulfilled
+        - the function should have arguments `ears`, `eyes`, and `eyebrows` which are instances
+          of the `Ears`, `Eyes`, and `Eyebrows` classes respectively
+
+        The resulting function definition should be returned as the `function_definition`
+        argument to the `invoke_api` tool.
+
+        ## Examples of `function_definition` arguments to the `invoke_api` tool calls
+
+        ```
+        def laugh(ears, eyes, eyebrows):
+            eyes.blink(speed=Speed.FAST)
+            eyebrows.wiggle()
+        ```
+
+        ```
+        def show_empathy(ears, eyes, eyebrows):
+            eyes.blink(speed=Speed.SLOW)
+        ```
+
+        ```
+        def wiggle_ears(ears, eyes, eyebrows):
+            ears.wiggle()
+        ```
+
+        ```
+        def blink_eyes(ears, eyes, eyebrows):
+            eyes.blink()
+        ```
+        """
+    ).format(
+        api="\n\n".join(api_docs),
+    )
+
+
 class Brain(PythonAPIAgent):
     mouth: Mouth
     ears: Ears
@@ -34,66 +104,7 @@ class Brain(PythonAPIAgent):
         return ""
 
     def usage_guide(self) -> str:
-        return textwrap.dedent(
-            """\
-            # API Specification
-
-            This class provides access to the robot's physical capabilities.
-
-            ```
-            {speed_api}
-
-            {ears_api}
-
-            {eyes_api}
-
-            {eyebrows_api}
-            ```
-
-            # API Usage
-
-            To use this API, build a python function with the following signature:
-
-            ```
-            def `function_name`(robot_brain):
-            ```
-
-            - function_name should describe the request to be fulfilled
-            - the function should have arguments `ears`, `eyes`, and `eyebrows` which are instances
-              of the `Ears`, `Eyes`, and `Eyebrows` classes respectively
-
-            The resulting function definition should be returned as the `function_definition`
-            argument to the `invoke_api` tool.
-
-            ## Examples of `function_definition` arguments to the `invoke_api` tool calls
-
-            ```
-            def laugh(ears, eyes, eyebrows):
-                eyes.blink(speed=Speed.FAST)
-                eyebrows.wiggle()
-            ```
-
-            ```
-            def show_empathy(ears, eyes, eyebrows):
-                eyes.blink(speed=Speed.SLOW)
-            ```
-
-            ```
-            def wiggle_ears(ears, eyes, eyebrows):
-                ears.wiggle()
-            ```
-
-            ```
-            def blink_eyes(ears, eyes, eyebrows):
-                eyes.blink()
-            ```
-            """
-        ).format(
-            speed_api=generate_python_api_doc(Speed, whitelisted_members=["FAST", "SLOW"]),
-            ears_api=generate_python_api_doc(Ears, whitelisted_members=["wiggle"]),
-            eyes_api=generate_python_api_doc(Eyes, whitelisted_members=["blink"]),
-            eyebrows_api=generate_python_api_doc(Eyebrows, whitelisted_members=["wiggle"]),
-        )
+        return build_usage_guide(API_SURFACE)
 
     def tool_spec_for_invoke_api(self) -> dict:
         return {
@@ -111,44 +122,17 @@ class Brain(PythonAPIAgent):
         }
 
     def invoke_api(self, **args) -> str:
-        function_definition = args['function_definition']
-
-        func_name = function_definition.split('(')[0].split('def ')[1]
-
-        invocation_func = textwrap.dedent(
-            """\
-            {function_definition}
-
-            retval = {func_name}(ears, eyes, eyebrows)
-            """
-        ).format(
-            function_definition=function_definition,
-            func_name=func_name,
-        )
-
-        logger.debug('---- GENERATING CODE ----')
-        logger.debug(invocation_func)
-
-        invocation_func_globals = {
-            '__builtins__': None,
-            'Speed': Speed,
-        }
-        invocation_func_locals = {
-            'ears': self.ears,
-            'eyes': self.eyes,
-            'eyebrows': self.eyebrows,
-            'Speed': Speed,
-        }
-
-        # Securely execute the dynamic code
-        exec(invocation_func, invocation_func_globals, invocation_func_locals)
-
-        retval = invocation_func_locals['retval']
+        try:
+            gesture = compile_gesture(args['function_definition'])
+        except GestureCompileError as e:
+            logger.warning(f'Rejected gesture: {e}')
+            return f'error: {e}'
 
-        logger.debug('---- EXECUTING CODE ----')
-        logger.debug(f'{func_name}(robot_brain) -> {retval}')
+        logger.debug(f'---- EXECUTING GESTURE {gesture.name} ({gesture.digest[:12]}) ----')
+        retval = gesture.function(self.ears, self.eyes, self.eyebrows)
+        logger.debug(f'{gesture.name}(robot_brain) -> {retval}')
 
-        return f'{func_name}(robot_brain) -> {retval}'
+        return f'{gesture.name}(robot_brain) -> {retval}'
 
     def reply(self, message: str) -> str:
         return self.answer_with_api(message, max_depth=1)
@@ -1,63 +1,257 @@
 import asyncio
-from functools import partial
+import time
+from dataclasses import dataclass
+from typing import Mapping
+
 from gpiozero import Button
 
-from pi_robot.command_handler import command_handler
-from pi_robot.ears import Ears
-from pi_robot.eyebrows import Eyebrows
-from pi_robot.eyes import Eyes
+from pi_robot.gestures import GestureRegistry
+from pi_robot.hardware import get_hardware
+from pi_robot.logging import logger
+from pi_robot.mouth import Mouth
+from pi_robot.telemetry import Tracer
+from pi_robot.telemetry import get_tracer
+
+
+CHORD_SEPARATOR = "+"
+LONG_PRESS_SUFFIX = ":long"
+# Not a gesture: flashes the mouth LED.
+MOUTH_ACTION = "light_up_mouth"
+
+# What each input does: a button name, buttons joined with "+" for a chord, or a
+# button name with ":long" for a long press, mapped to one or more gestures.
+DEFAULT_ACTIONS: dict[str, str | list[str]] = {
+    "x": MOUTH_ACTION,
+    "y": "wiggle_ears",
+    "a": "blink_eyes",
+    "b": "wiggle_eyebrows",
+}
+
+
+@dataclass(frozen=True)
+class ButtonEvent:
+    button: str
+    pressed: bool
+    # time.monotonic() when the edge was seen, in the GPIO callback.
+    timestamp: float
+
+
+@dataclass
+class ButtonState:
+    pressed: bool = False
+    last_edge: float = float("-inf")
+    pressed_at: float = 0.0
+    # Whether the current press has already done something, as part of a chord or a long press.
+    resolved: bool = True
+    timer: asyncio.TimerHandle | None = None
+    resync: asyncio.TimerHandle | None = None
 
 
 class Controller:
-    button_x: Button
-    button_y: Button
-    button_a: Button
-    button_b: Button
-    ears: Ears
-    eyes: Eyes
-    eyebrows: Eyebrows
+    """
+    Turns button presses into gestures without polling.
+
+    The GPIO edge callbacks only timestamp each edge and put it on an asyncio
+    queue, which `run` consumes on the event loop. Edges less than `debounce`
+    after a button's previous edge are dropped as contact bounce. A button
+    fires its action as soon as it's pressed, unless it is part of a chord,
+    in which case it waits `chord_window` for the other buttons, or it has a
+    long press action, in which case a press released before `long_press`
+    fires on release.
+    """
+
+    gestures: GestureRegistry
+    mouth: Mouth | None
+    buttons: dict[str, Button]
+    actions: dict[str, str | list[str]]
+    debounce: float
+    chord_window: float
+    long_press: float
+    tracer: Tracer
 
     def __init__(
         self,
-        ears: Ears,
-        eyes: Eyes,
-        eyebrows: Eyebrows,
-        button_x_gpio: int | None = None,
-        button_y_gpio: int | None = None,
-        button_a_gpio: int | None = None,
-        button_b_gpio: int | None = None,
+        gestures: GestureRegistry,
+        mouth: Mouth | None,
+        buttons: Mapping[str, int | None],
+        actions: Mapping[str, str | list[str]] | None = None,
+        debounce: float = 0.02,
+        chord_window: float = 0.08,
+        long_press: float = 0.6,
+        tracer: Tracer | None = None,
     ) -> None:
-        print("bolly --------------- controller init")
-        self.ears = ears
-        self.eyes = eyes
-        self.eyebrows = eyebrows
-
-        self.button_x = Button(button_x_gpio) if button_x_gpio else None
-        self.button_y = Button(button_y_gpio) if button_y_gpio else None
-        self.button_a = Button(button_a_gpio) if button_a_gpio else None
-        self.button_b = Button(button_b_gpio) if button_b_gpio else None
-
-        self.loop = asyncio.get_event_loop()
-
-        for button in [self.button_x, self.button_y, self.button_a, self.button_b]:
-            print("bolly --------------- button")
-            if button:
-                print("bolly --------------- button when pressed")
-                button.when_pressed = partial(self._button_pressed, button)
-
-    def _button_pressed(self, button: Button) -> None:
-        asyncio.run_coroutine_threadsafe(
-            self.generic_command_handler(button), self.loop
-        )
-
-    async def generic_command_handler(self, button: Button) -> None:
-        print("bolly --------------- generic_command_handler")
-        await command_handler(
-            self.button_x,
-            self.button_y,
-            self.button_a,
-            self.button_b,
-            self.ears,
-            self.eyes,
-            self.eyebrows,
-        )
+        self.gestures = gestures
+        self.mouth = mouth
+        self.debounce = debounce
+        self.chord_window = chord_window
+        self.long_press = long_press
+        self.tracer = tracer or get_tracer()
+
+        self.buttons = {}
+        self.gpios: dict[str, int] = {}
+        self.states: dict[str, ButtonState] = {}
+        self.events: asyncio.Queue[ButtonEvent] = asyncio.Queue()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.tasks: set[asyncio.Task] = set()
+        self.set_actions(actions)
+        self.set_buttons(buttons)
+
+    def check_actions(self, actions: Mapping[str, str | list[str]] | None) -> dict[str, str | list[str]]:
+        """`actions`, or the defaults if None. Raises ValueError for an unknown gesture."""
+        actions = dict(DEFAULT_ACTIONS if actions is None else actions)
+        for key, targets in actions.items():
+            for target in [targets] if isinstance(targets, str) else targets:
+                if target != MOUTH_ACTION and target not in self.gestures.gestures:
+                    raise ValueError(f"Unknown gesture {target!r} for button input {key!r}")
+        return actions
+
+    def set_actions(self, actions: Mapping[str, str | list[str]] | None) -> None:
+        self.actions = self.check_actions(actions)
+        self.chords = {
+            frozenset(key.split(CHORD_SEPARATOR)): key for key in self.actions if CHORD_SEPARATOR in key
+        }
+
+    def set_buttons(self, buttons: Mapping[str, int | None]) -> None:
+        """Add, remove or move buttons. A button whose pin didn't change keeps its state."""
+        gpios = {name: gpio for name, gpio in buttons.items() if gpio is not None}
+        for name in [name for name, gpio in self.gpios.items() if gpios.get(name) != gpio]:
+            self.buttons.pop(name).close()
+            self.cancel_timers(self.states.pop(name))
+            del self.gpios[name]
+
+        pin_factory = get_hardware().pin_factory
+        for name, gpio in gpios.items():
+            if name not in self.buttons:
+                self.buttons[name] = Button(gpio, pin_factory=pin_factory)
+                self.gpios[name] = gpio
+                self.states[name] = ButtonState()
+                if self.loop:
+                    self.attach(name)
+
+    def attach(self, name: str) -> None:
+        loop = self.loop
+        assert loop is not None
+
+        def on_edge(pressed: bool) -> None:
+            # Called from the pin factory's thread.
+            loop.call_soon_threadsafe(self.events.put_nowait, ButtonEvent(name, pressed, time.monotonic()))
+
+        self.buttons[name].when_pressed = lambda: on_edge(True)
+        self.buttons[name].when_released = lambda: on_edge(False)
+
+    async def run(self) -> None:
+        """Dispatch button events until cancelled. Call from the event loop."""
+        self.loop = asyncio.get_running_loop()
+        for name in self.buttons:
+            self.attach(name)
+
+        try:
+            while True:
+                self.handle(await self.events.get())
+        finally:
+            self.loop = None
+            for button in self.buttons.values():
+                button.when_pressed = None
+                button.when_released = None
+            for state in self.states.values():
+                self.cancel_timers(state)
+
+    def handle(self, event: ButtonEvent) -> None:
+        state = self.states.get(event.button)
+        if state is None:
+            # The button was removed since.
+            return
+        if event.pressed == state.pressed or event.timestamp - state.last_edge < self.debounce:
+            # The last edge of a bounce may be the one that counts, so check again once it has settled.
+            if state.resync is None:
+                state.resync = asyncio.get_running_loop().call_later(self.debounce, self.resync, event.button)
+            return
+
+        state.pressed = event.pressed
+        state.last_edge = event.timestamp
+        if event.pressed:
+            self.on_press(event.button, event.timestamp)
+        else:
+            self.on_release(event.button, event.timestamp)
+
+    def resync(self, name: str) -> None:
+        if name not in self.states:
+            return
+        self.states[name].resync = None
+        pressed = self.buttons[name].is_pressed
+        if pressed != self.states[name].pressed:
+            self.handle(ButtonEvent(name, pressed, time.monotonic()))
+
+    def on_press(self, name: str, timestamp: float) -> None:
+        state = self.states[name]
+        state.pressed_at = timestamp
+        state.resolved = False
+
+        for buttons, key in self.chords.items():
+            others = [self.states[other] for other in buttons - {name} if other in self.states]
+            if name in buttons and len(others) == len(buttons) - 1 and all(
+                other.pressed and not other.resolved and timestamp - other.pressed_at <= self.chord_window
+                for other in others
+            ):
+                for other in [state, *others]:
+                    self.resolve(other)
+                self.dispatch(key, timestamp)
+                return
+
+        loop = asyncio.get_running_loop()
+        elapsed = time.monotonic() - timestamp
+        if name + LONG_PRESS_SUFFIX in self.actions:
+            state.timer = loop.call_later(max(0.0, self.long_press - elapsed), self.on_long_press, name)
+        elif any(name in buttons for buttons in self.chords):
+            state.timer = loop.call_later(max(0.0, self.chord_window - elapsed), self.on_press_settled, name)
+        else:
+            self.resolve(state)
+            self.dispatch(name, timestamp)
+
+    def on_release(self, name: str, timestamp: float) -> None:
+        state = self.states[name]
+        # A press waiting only on its chord window still fires when the window ends.
+        if not state.resolved and name + LONG_PRESS_SUFFIX in self.actions:
+            self.resolve(state)
+            self.dispatch(name, timestamp)
+
+    def on_long_press(self, name: str) -> None:
+        state = self.states[name]
+        state.timer = None
+        self.resolve(state)
+        self.dispatch(name + LONG_PRESS_SUFFIX, state.pressed_at + self.long_press)
+
+    def on_press_settled(self, name: str) -> None:
+        state = self.states[name]
+        state.timer = None
+        self.resolve(state)
+        self.dispatch(name, state.pressed_at)
+
+    def resolve(self, state: ButtonState) -> None:
+        state.resolved = True
+        if state.timer:
+            state.timer.cancel()
+            state.timer = None
+
+    def cancel_timers(self, state: ButtonState) -> None:
+        for timer in (state.timer, state.resync):
+            if timer:
+                timer.cancel()
+        state.timer = state.resync = None
+
+    def dispatch(self, key: str, since: float) -> None:
+        """Start the action for `key`. `since` is when it could first be known, for the latency span."""
+        targets = self.actions.get(key)
+        if targets is None:
+            return
+
+        for target in [targets] if isinstance(targets, str) else targets:
+            if target == MOUTH_ACTION:
+                if self.mouth:
+                    task = asyncio.create_task(self.mouth.flash())
+                    self.tasks.add(task)
+                    task.add_done_callback(self.tasks.discard)
+            else:
+                self.gestures.invoke(target, {})
+        logger.debug(f"Button {key}: {targets}")
+        self.tracer.record("button_action", time.monotonic() - since, input=key)
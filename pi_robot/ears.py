@@ -1,112 +1,169 @@
 import asyncio
 import json
 import numpy as np
-import pyaudio
 import time
-import vosk
-from adafruit_servokit import ServoKit
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
+from pi_robot.audio_buffer import AudioRingBuffer
+from pi_robot.hardware import get_hardware
 from pi_robot.logging import logger
+from pi_robot.motion import Actuator
+from pi_robot.motion import Gesture
+from pi_robot.motion import GestureHandle
+from pi_robot.motion import Keyframes
+from pi_robot.motion import MotionEngine
+from pi_robot.motion import get_motion_engine
 from pi_robot.movement import Speed
+from pi_robot.servo_driver import BusServo
+from pi_robot.servo_driver import get_servo_bus
+from pi_robot.vad import AdaptiveVAD
+from pi_robot.vad import VoiceActivityDetector
+
+if TYPE_CHECKING:
+    import pyaudio
+    import vosk
+    from adafruit_servokit import ServoKit
+
+
+VOSK_MODEL_PATH = "vosk-model-small-en-us-0.15"
+
+
+def load_vosk_model() -> "vosk.Model":
+    import vosk
+
+    vosk.SetLogLevel(-1)
+    return vosk.Model(VOSK_MODEL_PATH)
+
+
+def get_vosk_model() -> "vosk.Model":
+    """Load the Vosk model on first use and share it for the rest of the process."""
+    return get_hardware().get("vosk_model", load_vosk_model)
 
 
 @dataclass
 class SpeechDetectionState:
-    audio_frames: list[bytes]
+    utterance_start_index: int | None
     silence_start_time: float | None
     speech_start_time: float | None
     speech_detected: bool
 
     def reset(self) -> None:
-        self.audio_frames = []
+        self.utterance_start_index = None
         self.silence_start_time = None
         self.speech_start_time = None
         self.speech_detected = False
 
 
 class Ears:
-    CHUNK_SIZE = 8192
+    CHUNK_DURATION = 0.06
 
-    left_servo: ServoKit | None = None
-    right_servo: ServoKit | None = None
+    left_servo: BusServo | None = None
+    right_servo: BusServo | None = None
+    motion_engine: MotionEngine
 
-    silence_threshold: int
+    sample_rate: int
+    frames_per_buffer: int
+    chunk_size: int
+    vad: VoiceActivityDetector
     silence_duration: float
     min_speech_duration: float
+    pre_roll_duration: float
+    input_device: str | None
+    transcribe: bool
 
     speech_detection_state: SpeechDetectionState
 
-    audio: pyaudio.PyAudio
+    ring_buffer: AudioRingBuffer
+    read_index: int
+    dropped_samples: int
+    audio_ready: asyncio.Event
 
     def __init__(
         self,
         left_channel: int | None = None,
         right_channel: int | None = None,
-        servokit: ServoKit | None = None,
-        silence_threshold: int = 500,
-        silence_duration: float = 2.0,
+        servokit: "ServoKit | None" = None,
+        motion_engine: MotionEngine | None = None,
+        vad: VoiceActivityDetector | None = None,
+        silence_duration: float = 0.8,
         min_speech_duration: float = 0.5,
+        pre_roll_duration: float = 0.3,
+        max_utterance_duration: float = 30.0,
+        preferred_sample_rate: int = 24000,
+        input_device: str | None = None,
+        transcribe: bool = False,
     ) -> None:
         if not servokit:
-            servokit = ServoKit(channels=16)
+            servokit = get_hardware().servokit
+        self.motion_engine = motion_engine or get_motion_engine()
 
-        self.left_servo = servokit.servo[left_channel] if left_channel is not None else None
-        self.right_servo = servokit.servo[right_channel] if right_channel is not None else None
+        self.servo_bus = get_servo_bus(servokit, self.motion_engine)
+        self.set_channels(left_channel, right_channel)
 
-        self.silence_threshold = silence_threshold
+        self.vad = vad or AdaptiveVAD()
         self.silence_duration = silence_duration
         self.min_speech_duration = min_speech_duration
-        self.audio = pyaudio.PyAudio()
-        self.input_device_index = self.find_usb_microphone()
+        self.pre_roll_duration = pre_roll_duration
+        self.max_utterance_duration = max_utterance_duration
+        self.preferred_sample_rate = preferred_sample_rate
+        self.input_device = input_device
+        self.transcribe = transcribe
+        # The large-vocabulary recognizer runs on its own thread, fed in capture order, so
+        # decoding never holds up the VAD. Its state is only touched from that thread.
+        self.transcriber = ThreadPoolExecutor(max_workers=1, thread_name_prefix="transcriber")
+        self.recognizer: "vosk.KaldiRecognizer | None" = None
+        self.recognizer_rate = 0
+        self.transcript_segments: list[str] = []
+        self.transcribing = False
+        # Annotated here rather than on the class: the API docs in the prompt evaluate class
+        # annotations, and pyaudio is only imported once listening starts.
+        self.stream: "pyaudio.Stream | None" = None
+        self.read_index = 0
+        self.dropped_samples = 0
         self.speech_detection_state = SpeechDetectionState(
-            audio_frames=[],
+            utterance_start_index=None,
             silence_start_time=None,
             speech_start_time=None,
             speech_detected=False,
         )
 
-    @staticmethod
-    def find_usb_microphone() -> int | None:
-        p = pyaudio.PyAudio()
-        device_index = None
-
-        for i in range(p.get_device_count()):
-            info = p.get_device_info_by_index(i)
-
-            # Only consider devices that have input channels
-            if int(info["maxInputChannels"]) > 0:
-                # Exclude virtual devices like "pulse" and "default"
-                device_name = str(info["name"]).lower()
-                if "pulse" in device_name or "default" in device_name:
-                    continue
-
-                # Prioritize USB microphones by checking the host API
-                if info["hostApi"] == 0:
-                    device_index = i
-                    break
-
-        p.terminate()
-
-        return device_index
-
-    @staticmethod
-    def compute_rms(audio_np: np.ndarray) -> float:
-        if len(audio_np) == 0:
-            return 0.0
-        audio_float = audio_np.astype(np.float32)
-        rms = np.sqrt(np.mean(audio_float ** 2))
-        return 0 if np.isnan(rms) else rms
+    def open_audio(self) -> None:
+        """
+        Pick the microphone, sample rate and buffers from the device probe. Deferred
+        until listening starts, so Ears used only for wiggling never touches the audio stack.
+        """
+        hardware = get_hardware()
+        self.audio: "pyaudio.PyAudio" = hardware.pyaudio
+        config = hardware.audio_devices.input_config(self.preferred_sample_rate, self.input_device)
+        self.input_device_index = config.device_index
+        self.sample_rate = config.rate
+        self.frames_per_buffer = config.frames_per_buffer
+        self.chunk_size = int(self.sample_rate * self.CHUNK_DURATION)
+        self.ring_buffer = AudioRingBuffer(
+            int(self.sample_rate * (self.max_utterance_duration + self.pre_roll_duration)) + self.chunk_size
+        )
 
     async def __aenter__(self) -> "Ears":
         """Initialize audio stream in an async context."""
+        hardware = get_hardware()
+        # On the first run, the device probe streams test audio for a few seconds.
+        await asyncio.to_thread(self.open_audio)
+        self.pa_continue = hardware.portaudio.paContinue
+        self.loop = asyncio.get_running_loop()
+        self.audio_ready = asyncio.Event()
+        self.read_index = self.ring_buffer.write_index
+        # A new stream may be another device or rate, so the detector learns its noise floor afresh.
+        self.vad.reset()
         self.stream = self.audio.open(
-            format=pyaudio.paInt16,
+            format=hardware.portaudio.paInt16,
             channels=1,
-            rate=44100,
+            rate=self.sample_rate,
             input=True,
             input_device_index=self.input_device_index,
-            frames_per_buffer=self.CHUNK_SIZE,
+            frames_per_buffer=self.frames_per_buffer,
+            stream_callback=self.on_audio_captured,
         )
         return self
 
@@ -115,37 +172,78 @@ class Ears:
         if self.stream:
             self.stream.stop_stream()
             self.stream.close()
-        self.audio.terminate()
-
-    async def listen(self, chunk_size: int = CHUNK_SIZE) -> None:
-        """Process an incoming audio chunk and update state."""
-        audio_data = await asyncio.to_thread(
-            self.stream.read, chunk_size, exception_on_overflow=False
-        )
+            self.stream = None
+
+    def on_audio_captured(self, in_data: bytes | None, frame_count: int, time_info, status_flags: int) -> tuple:
+        """PyAudio callback: copy the captured frames into the ring buffer and wake up `listen`."""
+        if in_data:
+            self.ring_buffer.write(in_data)
+            self.loop.call_soon_threadsafe(self.audio_ready.set)
+        return None, self.pa_continue
+
+    async def read_chunk(self, chunk_size: int) -> np.ndarray:
+        """Wait until `chunk_size` new samples have been captured and return them as a view."""
+        while self.ring_buffer.write_index - self.read_index < chunk_size:
+            self.audio_ready.clear()
+            if self.ring_buffer.write_index - self.read_index >= chunk_size:
+                break
+            await self.audio_ready.wait()
+
+        # If we fell so far behind that the capture callback lapped us, skip ahead.
+        if self.read_index < self.ring_buffer.oldest_index:
+            self.dropped_samples += self.ring_buffer.oldest_index - self.read_index
+            self.read_index = self.ring_buffer.oldest_index
+
+        chunk = self.ring_buffer.view(self.read_index, self.read_index + chunk_size)
+        self.read_index += len(chunk)
+        return chunk
+
+    def skip_to_live(self) -> None:
+        """Drop the audio captured but not yet listened to, and start detecting speech afresh."""
+        self.read_index = self.ring_buffer.write_index
+        self.speech_detection_state.reset()
+        self.vad.reset()
+
+    async def listen(self, chunk_size: int | None = None) -> memoryview:
+        """Process an incoming audio chunk, update state, and return the chunk."""
+        audio_np = await self.read_chunk(chunk_size or self.chunk_size)
+        chunk_start_index = self.read_index - len(audio_np)
 
         sd = self.speech_detection_state
-
-        sd.audio_frames.append(audio_data)
-        audio_np = np.frombuffer(audio_data, dtype=np.int16)
-        rms = self.compute_rms(audio_np)
         current_time = time.time()
 
-        if rms > self.silence_threshold:
+        if self.vad.process(audio_np, self.sample_rate):
             # Sound detected: start or continue speech.
             if not sd.speech_detected:
                 sd.speech_detected = True
                 sd.speech_start_time = current_time
+                # Keep some audio from before the trigger so the first syllable isn't clipped.
+                sd.utterance_start_index = max(
+                    chunk_start_index - int(self.pre_roll_duration * self.sample_rate),
+                    self.ring_buffer.oldest_index,
+                )
+                self.transcribing = self.transcribe
+                if self.transcribing:
+                    # The pre-roll, up to and including this chunk.
+                    self.transcriber.submit(self.start_transcript, self.get_speech_audio().tobytes())
+            elif self.transcribing:
+                # Vosk only takes bytes, so this copies the chunk, but only while there's speech to transcribe.
+                self.transcriber.submit(self.accept_waveform, audio_np.tobytes())
             sd.silence_start_time = None  # reset silence timer when sound is present
         else:
             # No sound detected in this chunk.
             if sd.speech_detected:
                 if sd.silence_start_time is None:
                     sd.silence_start_time = current_time
+                if self.transcribing:
+                    self.transcriber.submit(self.accept_waveform, audio_np.tobytes())
             else:
                 # No speech has been detected yet; begin tracking silence.
                 if sd.silence_start_time is None:
                     sd.silence_start_time = current_time
 
+        return audio_np.data.cast("B")
+
     def heard_end_of_speech(self) -> bool:
         """
         Check whether the conditions are met to trigger a reply.
@@ -172,38 +270,71 @@ class Ears:
 
         return False
 
-    def get_speech_audio(self) -> bytes:
-        return b"".join(self.speech_detection_state.audio_frames)
-
-    def get_speech_transcript(self) -> str:
-        """Return the transcript of the detected speech."""
-        audio_data = self.get_speech_audio()
-
-        vosk.SetLogLevel(-1)
-        model = vosk.Model("vosk-model-small-en-us-0.15")
-        rec = vosk.KaldiRecognizer(model, 44100)
-        rec.AcceptWaveform(audio_data)
-        result = rec.FinalResult()
-        return json.loads(result)["text"]
-
-    def wiggle(self, repeat_n: int = 4, speed: Speed = Speed.FAST) -> None:
-        logger.info("👂" * repeat_n)
+    def get_speech_audio(self, start_index: int | None = None) -> memoryview:
+        """
+        Return the detected speech, including its pre-roll, as a view into the ring buffer.
 
-        if not self.left_servo or not self.right_servo:
-            return
+        If `start_index` is given, the speech is returned from there instead, e.g.
+        to leave out what was said before the wake word.
+        """
+        if self.speech_detection_state.utterance_start_index is None:
+            return memoryview(b"")
+        if start_index is None:
+            start_index = self.speech_detection_state.utterance_start_index
+        start_index = max(start_index, self.ring_buffer.oldest_index)
+        return self.ring_buffer.view(start_index, self.read_index).data.cast("B")
+
+    def start_transcript(self, audio_data: bytes) -> None:
+        """Start transcribing a new utterance from its pre-roll. Runs on the transcriber thread."""
+        import vosk
+
+        if self.recognizer is None or self.recognizer_rate != self.sample_rate:
+            self.recognizer = vosk.KaldiRecognizer(get_vosk_model(), self.sample_rate)
+            self.recognizer_rate = self.sample_rate
+        else:
+            self.recognizer.Reset()
+        self.transcript_segments = []
+        self.accept_waveform(audio_data)
+
+    def accept_waveform(self, audio_data: bytes) -> None:
+        """Feed speech to the recognizer. Runs on the transcriber thread."""
+        assert self.recognizer
+        if self.recognizer.AcceptWaveform(audio_data):
+            text = json.loads(self.recognizer.Result())["text"]
+            if text:
+                self.transcript_segments.append(text)
+
+    def finish_transcript(self) -> str:
+        assert self.recognizer
+        text = json.loads(self.recognizer.FinalResult())["text"]
+        if text:
+            self.transcript_segments.append(text)
+        return " ".join(self.transcript_segments)
+
+    async def get_speech_transcript(self) -> str:
+        """
+        Return the transcript of the detected speech, or "" unless `transcribe` was on when it started.
 
-        steps = 100
-        duration = 0.2 if speed == Speed.FAST else 0.5
+        The recognizer has been fed the speech as it was heard, so this only waits for
+        it to catch up and flush the last segment.
+        """
+        if not self.transcribing:
+            return ""
+        return await asyncio.wrap_future(self.transcriber.submit(self.finish_transcript))
 
-        for _ in range(repeat_n):
-            for angle in [x * (45 / steps) for x in range(steps + 1)]:
-                self.left_servo.angle = angle
-                self.right_servo.angle = angle
+    def set_channels(self, left_channel: int | None, right_channel: int | None) -> None:
+        """Move the servos to other channels, stopping any gesture on the old ones."""
+        self.motion_engine.release([servo for servo in (self.left_servo, self.right_servo) if servo])
+        self.left_servo = self.servo_bus.servo(left_channel) if left_channel is not None else None
+        self.right_servo = self.servo_bus.servo(right_channel) if right_channel is not None else None
 
-                time.sleep(duration / steps / 2.0)
+    def wiggle(self, repeat_n: int = 4, speed: Speed = Speed.FAST) -> GestureHandle:
+        logger.info("👂" * repeat_n)
 
-            for angle in [x * (45 / steps) for x in range(steps, -1, -1)]:
-                self.left_servo.angle = angle
-                self.right_servo.angle = angle
+        tracks: dict[Actuator, Keyframes] = {}
+        if self.left_servo and self.right_servo:
+            duration = 0.2 if speed == Speed.FAST else 0.5
+            keyframes = Keyframes.oscillate(0.0, 45.0, duration, repeat_n)
+            tracks = {(self.left_servo, "angle"): keyframes, (self.right_servo, "angle"): keyframes}
 
-                time.sleep(duration / steps / 2.0)
+        return self.motion_engine.play(Gesture("wiggle", tracks))
@@ -1,44 +1,53 @@
-import time
-from adafruit_servokit import ServoKit
+from typing import TYPE_CHECKING
 
+from pi_robot.hardware import get_hardware
 from pi_robot.logging import logger
+from pi_robot.motion import Actuator
+from pi_robot.motion import Gesture
+from pi_robot.motion import GestureHandle
+from pi_robot.motion import Keyframes
+from pi_robot.motion import MotionEngine
+from pi_robot.motion import get_motion_engine
 from pi_robot.movement import Speed
+from pi_robot.servo_driver import BusServo
+from pi_robot.servo_driver import get_servo_bus
+
+if TYPE_CHECKING:
+    from adafruit_servokit import ServoKit
 
 
 class Eyebrows:
-    left_servo: ServoKit | None = None
-    right_servo: ServoKit | None = None
+    left_servo: BusServo | None = None
+    right_servo: BusServo | None = None
+    motion_engine: MotionEngine
 
     def __init__(
         self,
         left_channel: int | None = None,
         right_channel: int | None = None,
-        servokit: ServoKit | None = None,
+        servokit: "ServoKit | None" = None,
+        motion_engine: MotionEngine | None = None,
     ) -> None:
         if not servokit:
-            servokit = ServoKit(channels=16)
-
-        self.left_servo = servokit.servo[left_channel] if left_channel is not None else None
-        self.right_servo = servokit.servo[right_channel] if right_channel is not None else None
-
-    def wiggle(self, repeat_n: int = 4, speed: Speed = Speed.FAST) -> None:
-        logger.info("🤨" * repeat_n)
-
-        if not self.left_servo or not self.right_servo:
-            return
+            servokit = get_hardware().servokit
+        self.motion_engine = motion_engine or get_motion_engine()
 
-        steps = 100
-        duration = 0.2 if speed == Speed.FAST else 0.5
+        self.servo_bus = get_servo_bus(servokit, self.motion_engine)
+        self.set_channels(left_channel, right_channel)
 
-        for _ in range(repeat_n):
-            for angle in [x * (45 / steps) for x in range(steps + 1)]:
-                self.left_servo.angle = angle
-                self.right_servo.angle = angle
+    def set_channels(self, left_channel: int | None, right_channel: int | None) -> None:
+        """Move the servos to other channels, stopping any gesture on the old ones."""
+        self.motion_engine.release([servo for servo in (self.left_servo, self.right_servo) if servo])
+        self.left_servo = self.servo_bus.servo(left_channel) if left_channel is not None else None
+        self.right_servo = self.servo_bus.servo(right_channel) if right_channel is not None else None
 
-                time.sleep(duration / steps / 2.0)
+    def wiggle(self, repeat_n: int = 4, speed: Speed = Speed.FAST) -> GestureHandle:
+        logger.info("🤨" * repeat_n)
 
-            for angle in [x * (45 / steps) for x in range(steps, -1, -1)]:
-                self.left_servo.angle = angle
-                self.right_servo.angle = angle
+        tracks: dict[Actuator, Keyframes] = {}
+        if self.left_servo and self.right_servo:
+            duration = 0.2 if speed == Speed.FAST else 0.5
+            keyframes = Keyframes.oscillate(0.0, 45.0, duration, repeat_n)
+            tracks = {(self.left_servo, "angle"): keyframes, (self.right_servo, "angle"): keyframes}
 
-                time.sleep(duration / steps / 2.0)
+        return self.motion_engine.play(Gesture("wiggle", tracks))
@@ -1,42 +1,58 @@
-import time
 from gpiozero import PWMLED
 
+from pi_robot.hardware import get_hardware
 from pi_robot.logging import logger
+from pi_robot.motion import Gesture
+from pi_robot.motion import GestureHandle
+from pi_robot.motion import Keyframes
+from pi_robot.motion import MotionEngine
+from pi_robot.motion import get_motion_engine
 from pi_robot.movement import Speed
 
 
 class Eyes:
     left_led: PWMLED | None = None
     right_led: PWMLED | None = None
+    left_gpio: int | None = None
+    right_gpio: int | None = None
+    motion_engine: MotionEngine
 
     def __init__(
         self,
         left_gpio: int | None = None,
         right_gpio: int | None = None,
+        motion_engine: MotionEngine | None = None,
     ) -> None:
-        if left_gpio:
-            self.left_led = PWMLED(left_gpio)
-        if right_gpio:
-            self.right_led = PWMLED(right_gpio)
-
-    def blink(self, repeat_n: int = 4, speed: Speed = Speed.FAST) -> None:
+        self.motion_engine = motion_engine or get_motion_engine()
+        self.set_gpios(left_gpio, right_gpio)
+
+    def set_gpios(self, left_gpio: int | None, right_gpio: int | None) -> None:
+        """Move the LEDs to other pins. An LED whose pin didn't change is left alone."""
+        move_left = left_gpio != self.left_gpio
+        move_right = right_gpio != self.right_gpio
+
+        # Both old LEDs are closed before either new one is opened, so the eyes can swap pins.
+        moved = [led for led, move in ((self.left_led, move_left), (self.right_led, move_right)) if led and move]
+        self.motion_engine.release(moved)
+        for led in moved:
+            led.close()
+
+        if move_left:
+            self.left_led, self.left_gpio = self.create_led(left_gpio), left_gpio
+        if move_right:
+            self.right_led, self.right_gpio = self.create_led(right_gpio), right_gpio
+
+    @staticmethod
+    def create_led(gpio: int | None) -> PWMLED | None:
+        return PWMLED(gpio, pin_factory=get_hardware().pin_factory) if gpio else None
+
+    def blink(self, repeat_n: int = 4, speed: Speed = Speed.FAST) -> GestureHandle:
         logger.info("👀️" * repeat_n)
 
-        if not self.left_led or not self.right_led:
-            return
-
-        steps = 100
-        duration = 0.2 if speed == Speed.FAST else 0.5
-
-        for _ in range(repeat_n):
-            for value in [x * (1 / steps) for x in range(steps + 1)]:
-                self.left_led.value = value
-                self.right_led.value = value
-
-                time.sleep(duration / steps / 2.0)
-
-            for value in [x * (1 / steps) for x in range(steps, -1, -1)]:
-                self.left_led.value = value
-                self.right_led.value = value
+        tracks = {}
+        if self.left_led and self.right_led:
+            duration = 0.2 if speed == Speed.FAST else 0.5
+            keyframes = Keyframes.oscillate(0.0, 1.0, duration, repeat_n)
+            tracks = {(self.left_led, "value"): keyframes, (self.right_led, "value"): keyframes}
 
-                time.sleep(duration / steps / 2.0)
+        return self.motion_engine.play(Gesture("blink", tracks))
@@ -0,0 +1,129 @@
+import ast
+import functools
+import hashlib
+import textwrap
+from dataclasses import dataclass
+from typing import Callable
+
+from pi_robot.movement import Speed
+
+
+# The only calls a gesture may make, and the keyword arguments each accepts.
+ALLOWED_CALLS = {
+    "ears": {"wiggle": ("repeat_n", "speed")},
+    "eyes": {"blink": ("repeat_n", "speed")},
+    "eyebrows": {"wiggle": ("repeat_n", "speed")},
+}
+MAX_REPEAT_N = 20
+
+
+class GestureCompileError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class CompiledGesture:
+    name: str
+    digest: str
+    function: Callable
+
+
+def normalize_source(source: str) -> str:
+    return textwrap.dedent(source).strip().replace("\r\n", "\n")
+
+
+def validate_argument(node: ast.expr, param: str) -> None:
+    if param == "repeat_n":
+        if not (
+            isinstance(node, ast.Constant)
+            and type(node.value) is int
+            and 1 <= node.value <= MAX_REPEAT_N
+        ):
+            raise GestureCompileError(f"repeat_n must be an integer from 1 to {MAX_REPEAT_N}")
+    elif param == "speed":
+        if not (
+            isinstance(node, ast.Attribute)
+            and isinstance(node.value, ast.Name)
+            and node.value.id == "Speed"
+            and node.attr in Speed.__members__
+        ):
+            raise GestureCompileError(f"speed must be one of {', '.join('Speed.' + m for m in Speed.__members__)}")
+
+
+def validate_statement(statement: ast.stmt, parts: set[str]) -> None:
+    if isinstance(statement, ast.Pass):
+        return
+    if not isinstance(statement, ast.Expr):
+        raise GestureCompileError(f"Unsupported statement: {ast.unparse(statement)}")
+
+    call = statement.value
+    if isinstance(call, ast.Constant) and isinstance(call.value, str):
+        return  # docstring
+
+    if not (
+        isinstance(call, ast.Call)
+        and isinstance(call.func, ast.Attribute)
+        and isinstance(call.func.value, ast.Name)
+        and call.func.value.id in parts
+        and call.func.attr in ALLOWED_CALLS[call.func.value.id]
+    ):
+        raise GestureCompileError(f"Unsupported call: {ast.unparse(call)}")
+
+    params = ALLOWED_CALLS[call.func.value.id][call.func.attr]
+    if len(call.args) > len(params):
+        raise GestureCompileError(f"Too many arguments: {ast.unparse(call)}")
+
+    seen = set()
+    for param, arg in zip(params, call.args):
+        validate_argument(arg, param)
+        seen.add(param)
+    for keyword in call.keywords:
+        if keyword.arg not in params or keyword.arg in seen:
+            raise GestureCompileError(f"Unsupported argument {keyword.arg!r}: {ast.unparse(call)}")
+        validate_argument(keyword.value, keyword.arg)
+        seen.add(keyword.arg)
+
+
+def validate(tree: ast.Module) -> ast.FunctionDef:
+    """Check that `tree` is one function that only calls the allowlisted body part methods."""
+    if len(tree.body) != 1 or not isinstance(tree.body[0], ast.FunctionDef):
+        raise GestureCompileError("Expected exactly one function definition")
+
+    function = tree.body[0]
+    if function.decorator_list or function.returns:
+        raise GestureCompileError("Decorators and return annotations aren't allowed")
+
+    args = function.args
+    if args.posonlyargs or args.kwonlyargs or args.vararg or args.kwarg or args.defaults:
+        raise GestureCompileError("Expected the signature (ears, eyes, eyebrows)")
+    if [a.arg for a in args.args] != list(ALLOWED_CALLS) or any(a.annotation for a in args.args):
+        raise GestureCompileError("Expected the signature (ears, eyes, eyebrows)")
+
+    for statement in function.body:
+        validate_statement(statement, set(ALLOWED_CALLS))
+    return function
+
+
+@functools.lru_cache(maxsize=256)
+def compile_normalized(source: str) -> CompiledGesture:
+    try:
+        tree = ast.parse(source, mode="exec")
+    except SyntaxError as e:
+        raise GestureCompileError(f"Invalid syntax: {e}") from e
+
+    function = validate(tree)
+
+    # Nothing but `Speed` is reachable from the validated body, so no builtins at all.
+    namespace: dict = {"__builtins__": {}, "Speed": Speed}
+    exec(compile(tree, f"<gesture {function.name}>", "exec"), namespace)
+
+    digest = hashlib.sha256(ast.dump(tree).encode()).hexdigest()
+    return CompiledGesture(function.name, digest, namespace[function.name])
+
+
+def compile_gesture(source: str) -> CompiledGesture:
+    """
+    Validate and compile a model-written gesture function. Results are cached on
+    the normalized source, so a repeated gesture skips parsing and validation.
+    """
+    return compile_normalized(normalize_source(source))
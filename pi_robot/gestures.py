@@ -0,0 +1,125 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from pi_robot.gesture_compiler import MAX_REPEAT_N
+from pi_robot.motion import GestureHandle
+from pi_robot.movement import Speed
+
+if TYPE_CHECKING:
+    from pi_robot.ears import Ears
+    from pi_robot.eyebrows import Eyebrows
+    from pi_robot.eyes import Eyes
+
+
+SEQUENCE_TOOL_NAME = "move_face"
+
+
+class GestureArgumentError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class GestureSpec:
+    name: str
+    part: str
+    method: str
+    description: str
+
+
+GESTURES = (
+    GestureSpec("blink_eyes", "eyes", "blink", "Blink your eyes."),
+    GestureSpec("wiggle_ears", "ears", "wiggle", "Wiggle your ears."),
+    GestureSpec("wiggle_eyebrows", "eyebrows", "wiggle", "Wiggle your eyebrows."),
+)
+
+GESTURE_PARAMETERS = {
+    "repeat_n": {"type": "integer", "minimum": 1, "maximum": MAX_REPEAT_N},
+    "speed": {"type": "string", "enum": [speed.value for speed in Speed]},
+}
+
+
+class GestureRegistry:
+    """
+    Publishes each body part gesture as its own small realtime tool, plus a
+    `move_face` tool for combos, so the model only has to generate a few
+    arguments instead of a Python function.
+    """
+
+    gestures: dict[str, GestureSpec]
+
+    def __init__(self, ears: "Ears | None", eyes: "Eyes | None", eyebrows: "Eyebrows | None") -> None:
+        self.parts: dict[str, object] = {"ears": ears, "eyes": eyes, "eyebrows": eyebrows}
+        self.gestures = {spec.name: spec for spec in GESTURES if self.parts[spec.part] is not None}
+
+    def __contains__(self, tool_name: object) -> bool:
+        return tool_name == SEQUENCE_TOOL_NAME or tool_name in self.gestures
+
+    def tools(self) -> list[dict]:
+        tools = [
+            {
+                "type": "function",
+                "name": spec.name,
+                "description": spec.description,
+                "parameters": {"type": "object", "properties": GESTURE_PARAMETERS},
+            }
+            for spec in self.gestures.values()
+        ]
+        tools.append({
+            "type": "function",
+            "name": SEQUENCE_TOOL_NAME,
+            "description": (
+                "Make several gestures at once, e.g. to laugh. "
+                "Gestures of the same body part play one after another."
+            ),
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "gestures": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {"gesture": {"type": "string", "enum": list(self.gestures)},
+                                           **GESTURE_PARAMETERS},
+                            "required": ["gesture"],
+                        },
+                    },
+                },
+                "required": ["gestures"],
+            },
+        })
+        return tools
+
+    def resolve(self, name: str, repeat_n: int = 4, speed: str = Speed.FAST.value) -> tuple[GestureSpec, int, Speed]:
+        spec = self.gestures.get(name) if isinstance(name, str) else None
+        if spec is None:
+            raise GestureArgumentError(f"Unknown gesture {name!r}")
+        if type(repeat_n) is not int or not 1 <= repeat_n <= MAX_REPEAT_N:
+            raise GestureArgumentError(f"repeat_n must be an integer from 1 to {MAX_REPEAT_N}")
+        try:
+            return spec, repeat_n, Speed(speed)
+        except ValueError:
+            raise GestureArgumentError(f"speed must be one of {', '.join(s.value for s in Speed)}") from None
+
+    def invoke(self, tool_name: str, arguments: dict) -> list[GestureHandle]:
+        """Start the gestures for a tool call. Raises GestureArgumentError before moving anything if it's invalid."""
+        if tool_name == SEQUENCE_TOOL_NAME:
+            steps = arguments.get("gestures")
+            if not isinstance(steps, list) or not all(isinstance(step, dict) for step in steps):
+                raise GestureArgumentError("gestures must be a list of objects")
+        else:
+            steps = [{**arguments, "gesture": tool_name}]
+
+        # Resolve every step before starting any, so a bad combo doesn't half-play.
+        resolved = []
+        for step in steps:
+            step = dict(step)
+            name = step.pop("gesture", "")
+            unknown = set(step) - set(GESTURE_PARAMETERS)
+            if unknown:
+                raise GestureArgumentError(f"Unsupported arguments {sorted(unknown)}")
+            resolved.append(self.resolve(name, **step))
+
+        return [
+            getattr(self.parts[spec.part], spec.method)(repeat_n=repeat_n, speed=speed)
+            for spec, repeat_n, speed in resolved
+        ]
@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import TypeVar
+from typing import cast
+
+if TYPE_CHECKING:
+    import pyaudio
+    from adafruit_servokit import ServoKit
+    from gpiozero.pins import Factory
+
+    from pi_robot.audio_devices import AudioDeviceProbe
+    from pi_robot.simulation import SimulatedHardware
+
+
+T = TypeVar("T")
+
+BACKEND_ENV_VAR = "PI_ROBOT_BACKEND"
+HARDWARE_BACKEND = "hardware"
+SIMULATION_BACKEND = "simulation"
+BACKENDS = (HARDWARE_BACKEND, SIMULATION_BACKEND)
+
+# The PCA9685's I2C address with no address jumpers bridged.
+DEFAULT_SERVO_ADDRESS = 0x40
+
+
+def create_servokit(address: int = DEFAULT_SERVO_ADDRESS) -> "ServoKit":
+    from adafruit_servokit import ServoKit
+
+    return ServoKit(channels=16, address=address)
+
+
+def create_pyaudio() -> "pyaudio.PyAudio":
+    import pyaudio
+
+    return pyaudio.PyAudio()
+
+
+def create_pin_factory() -> "Factory":
+    from gpiozero import Device
+
+    return Device.ensure_pin_factory()
+
+
+def create_audio_device_probe() -> "AudioDeviceProbe":
+    from pi_robot.audio_devices import AudioDeviceProbe
+
+    return AudioDeviceProbe(get_hardware().pyaudio)
+
+
+def create_simulated_hardware(
+    input_wav_path: str | None,
+    output_wav_path: str | None,
+    state_log_path: str | None,
+) -> "SimulatedHardware":
+    from pi_robot.simulation import SimulatedHardware
+
+    return SimulatedHardware(input_wav_path, output_wav_path, state_log_path)
+
+
+class HardwareRegistry:
+    """
+    Owns the one ServoKit per I2C address, PyAudio instance, audio device probe
+    and GPIO pin factory for the process.
+
+    Each component (and the module behind it) is only loaded on first use, so a
+    program that never records audio never imports or initializes PortAudio.
+    How long each one took to become ready is kept in `startup_times`.
+
+    With the "simulation" backend, every component is swapped for the one in
+    `pi_robot.simulation`, so the whole robot runs without a Pi. The backend is
+    taken from the PI_ROBOT_BACKEND environment variable, or else from
+    `use_backend`, which must be called before any component is created.
+    """
+
+    startup_times: dict[str, float]
+    backend: str
+    backend_settings: tuple | None = None
+    simulation: "SimulatedHardware | None" = None
+
+    def __init__(self) -> None:
+        self.components: dict[str, Any] = {}
+        self.startup_times = {}
+        self.lock = threading.RLock()
+        self.component_locks: dict[str, threading.RLock] = {}
+        self.backend = HARDWARE_BACKEND
+        if os.environ.get(BACKEND_ENV_VAR):
+            self.use_backend(os.environ[BACKEND_ENV_VAR])
+
+    def use_backend(
+        self,
+        backend: str,
+        input_wav_path: str | None = None,
+        output_wav_path: str | None = None,
+        state_log_path: str | None = None,
+    ) -> None:
+        """
+        Select the "hardware" or "simulation" backend. The paths only apply to the
+        simulation: the WAV file the microphone captures, the WAV file the speaker
+        plays into, and a JSON lines log of LED, button and servo state changes.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+
+        settings = (backend, input_wav_path, output_wav_path, state_log_path)
+        with self.lock:
+            # Robots run by one host each select the backend they share.
+            if backend == self.backend == HARDWARE_BACKEND or settings == self.backend_settings:
+                return
+            if self.components:
+                raise RuntimeError(f"Can't switch backends after {', '.join(self.components)} were created")
+
+            self.backend = backend
+            self.backend_settings = settings
+            if backend == SIMULATION_BACKEND:
+                self.simulation = create_simulated_hardware(input_wav_path, output_wav_path, state_log_path)
+            else:
+                self.simulation = None
+
+    def get(self, name: str, factory: Callable[[], T]) -> T:
+        """Return the component called `name`, creating it with `factory` the first time."""
+        with self.lock:
+            if name in self.components:
+                return self.components[name]
+            component_lock = self.component_locks.setdefault(name, threading.RLock())
+
+        # Only callers of the same component wait while it's created, e.g. the Vosk model
+        # loading in a thread doesn't hold up the pin factory on the event loop.
+        with component_lock:
+            with self.lock:
+                if name in self.components:
+                    return self.components[name]
+            start = time.perf_counter()
+            component = factory()
+            with self.lock:
+                self.components[name] = component
+                self.startup_times[name] = time.perf_counter() - start
+            return component
+
+    @property
+    def servokit(self) -> "ServoKit":
+        return self.servokit_at(DEFAULT_SERVO_ADDRESS)
+
+    def servokit_at(self, address: int) -> "ServoKit":
+        """The ServoKit for the PCA9685 at `address`, shared by every robot whose servos are on it."""
+        name = "servokit" if address == DEFAULT_SERVO_ADDRESS else f"servokit@{address:#x}"
+        if self.simulation:
+            simulation = self.simulation
+            return self.get(name, lambda: simulation.create_servokit(address))
+        return self.get(name, lambda: create_servokit(address))
+
+    @property
+    def pyaudio(self) -> "pyaudio.PyAudio":
+        if self.simulation:
+            return cast("pyaudio.PyAudio", self.get("pyaudio", self.simulation.create_pyaudio))
+        return self.get("pyaudio", create_pyaudio)
+
+    @property
+    def portaudio(self) -> Any:
+        """The `pyaudio` module, or its stand-in, for constants such as `paInt16` and `paContinue`."""
+        if self.simulation:
+            return self.simulation.portaudio
+        import pyaudio
+
+        return pyaudio
+
+    @property
+    def pin_factory(self) -> "Factory":
+        if self.simulation:
+            return self.get("pin_factory", self.simulation.create_pin_factory)
+        return self.get("pin_factory", create_pin_factory)
+
+    @property
+    def audio_devices(self) -> "AudioDeviceProbe":
+        if self.simulation:
+            simulation = self.simulation
+            return self.get("audio_devices", lambda: simulation.create_audio_device_probe(self.pyaudio))
+        return self.get("audio_devices", create_audio_device_probe)
+
+    def close(self) -> None:
+        with self.lock:
+            if "pyaudio" in self.components:
+                self.components.pop("pyaudio").terminate()
+            self.components.pop("audio_devices", None)
+            if self.simulation:
+                self.simulation.close()
+
+
+_hardware: HardwareRegistry | None = None
+_hardware_lock = threading.Lock()
+
+
+def get_hardware() -> HardwareRegistry:
+    """Return the hardware registry shared by every body part in the process."""
+    global _hardware
+
+    with _hardware_lock:
+        if _hardware is None:
+            _hardware = HardwareRegistry()
+        return _hardware
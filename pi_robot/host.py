@@ -0,0 +1,208 @@
+import asyncio
+import contextvars
+import logging
+import os
+import sys
+import time
+from collections.abc import Coroutine
+from typing import Any
+from typing import Generator
+
+import openai
+import yaml
+
+from pi_robot.hardware import DEFAULT_SERVO_ADDRESS
+from pi_robot.hardware import get_hardware
+from pi_robot.logging import logger
+from pi_robot.robot import Robot
+from pi_robot.robot import merge_config
+from pi_robot.telemetry import Tracer
+from pi_robot.telemetry import get_tracer
+
+
+# The name of the robot whose code is running, inherited by every task it starts.
+current_robot: contextvars.ContextVar[str] = contextvars.ContextVar("current_robot")
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def rss_bytes() -> int:
+    """The process's resident set size."""
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE
+
+
+class TimedCoroutine(Coroutine):
+    """Wraps a task's coroutine to add the thread CPU time of each step to its robot's total."""
+
+    def __init__(self, coro: Coroutine, cpu_seconds: dict[str, float], robot: str) -> None:
+        self.coro = coro
+        self.cpu_seconds = cpu_seconds
+        self.robot = robot
+
+    def send(self, value: Any) -> Any:
+        start = time.thread_time()
+        try:
+            return self.coro.send(value)
+        finally:
+            self.cpu_seconds[self.robot] += time.thread_time() - start
+
+    def throw(self, *args: Any) -> Any:
+        start = time.thread_time()
+        try:
+            return self.coro.throw(*args)
+        finally:
+            self.cpu_seconds[self.robot] += time.thread_time() - start
+
+    def close(self) -> None:
+        self.coro.close()
+
+    def __await__(self) -> Generator[Any, None, Any]:
+        return self.coro.__await__()
+
+
+class RobotHost:
+    """
+    Runs several robots in one process, on one event loop.
+
+    The host config lists each robot's config file, with overrides for what
+    sets it apart from the others, e.g.:
+
+        backend: hardware
+        report_interval_s: 60
+        robots:
+          - config: config.yaml
+            name: Lefty
+            connections:
+              microphone: "USB Audio Device"
+              speaker: "USB Audio Device"
+              servo_driver: {address: 0x40, channels: [0, 8]}
+          - config: config.yaml
+            name: Righty
+            connections:
+              microphone: "USB PnP Sound Device"
+              speaker: "USB PnP Sound Device"
+              servo_driver: {address: 0x40, channels: [8, 16]}
+
+    The robots share the process's Vosk model, one ServoKit per I2C address,
+    and one OpenAI client per API key and URL, with its HTTP connection pool;
+    each still has its own realtime connection. `backend` and `simulation`
+    apply to every robot. Each robot has its own tracer, so robots with a
+    `telemetry.metrics_port` need a port each. Every `report_interval_s`, the
+    event loop CPU spent on each robot's tasks is logged with the process's RSS
+    and total CPU. Audio callbacks and other threads only count towards the
+    process's total, and memory can only be shared out as the average per robot.
+    """
+
+    robots: dict[str, Robot]
+    # The RSS before any robot was built, so the rest can be shared out between them.
+    baseline_rss: int
+    cpu_seconds: dict[str, float]
+    report_interval: float
+
+    def __init__(self, host_config_path: str = "host.yaml") -> None:
+        with open(host_config_path) as host_config_file:
+            host_config = yaml.safe_load(host_config_file)
+        base_dir = os.path.dirname(os.path.abspath(host_config_path))
+        shared = {key: host_config[key] for key in ("backend", "simulation") if key in host_config}
+
+        self.report_interval = host_config.get("report_interval_s", 60)
+        self.baseline_rss = rss_bytes()
+        self.robots = {}
+        self.cpu_seconds = {}
+        clients: dict[tuple[str, str | None], openai.AsyncOpenAI] = {}
+        metrics_ports: dict[int, str] = {}
+        for entry in host_config["robots"]:
+            config_path = os.path.join(base_dir, entry["config"])
+            overrides = {**shared, **{key: value for key, value in entry.items() if key != "config"}}
+
+            # Each robot serves its own metrics, so the second to bind a port would fail to start.
+            with open(config_path) as config_file:
+                config = merge_config(yaml.safe_load(config_file), overrides)
+            port = config.get("telemetry", {}).get("metrics_port")
+            if port is not None:
+                if port in metrics_ports:
+                    raise ValueError(f"{config['name']} and {metrics_ports[port]} both serve metrics on port {port}")
+                metrics_ports[port] = config["name"]
+
+            robot = Robot(config_path, overrides, tracer=Tracer())
+            if robot.name in self.robots:
+                raise ValueError(f"Two robots are named {robot.name!r}")
+
+            key = (robot.openai_api_key, robot.websocket_base_url)
+            if key not in clients:
+                clients[key] = openai.AsyncOpenAI(api_key=key[0], websocket_base_url=key[1])
+            robot.openai_client = clients[key]
+
+            self.robots[robot.name] = robot
+            self.cpu_seconds[robot.name] = 0.0
+            self.check_servo_channels()
+
+    def check_servo_channels(self) -> None:
+        """Robots on the same PCA9685 must have separate channel ranges."""
+        taken: dict[tuple[int, int], str] = {}
+        for name, robot in self.robots.items():
+            address = robot.config["connections"].get("servo_driver", {}).get("address", DEFAULT_SERVO_ADDRESS)
+            for channel in robot.servo_channels:
+                other = taken.setdefault((address, channel), name)
+                if other != name:
+                    raise ValueError(f"{name} and {other} both use channel {channel} of the PCA9685 at {address:#x}")
+
+    def create_task(self, loop: asyncio.AbstractEventLoop, coro: Any, **kwargs: Any) -> asyncio.Future:
+        """Task factory that times the steps of each robot's tasks."""
+        context = kwargs.get("context") or contextvars.copy_context()
+        robot = context.get(current_robot)
+        if robot is not None:
+            coro = TimedCoroutine(coro, self.cpu_seconds, robot)
+        return asyncio.Task(coro, loop=loop, **kwargs)
+
+    def report(self, elapsed: float, cpu_seconds: dict[str, float], process_cpu: float) -> str:
+        rss = rss_bytes()
+        lines = [
+            f"{len(self.robots)} robots: {rss / 2**20:.1f} MiB RSS"
+            f" ({(rss - self.baseline_rss) / len(self.robots) / 2**20:.1f} MiB per robot"
+            f" over the {self.baseline_rss / 2**20:.1f} MiB before they were built),"
+            f" {process_cpu / elapsed * 100:.1f}% CPU over the last {elapsed:.0f} s"
+        ]
+        for name in self.robots:
+            loop_cpu = (self.cpu_seconds[name] - cpu_seconds[name]) / elapsed * 100
+            lines.append(f"  {name}: {loop_cpu:.1f}% event loop CPU")
+        return "\n".join(lines)
+
+    async def report_usage(self) -> None:
+        while True:
+            start, process_start, cpu_seconds = time.monotonic(), time.process_time(), dict(self.cpu_seconds)
+            await asyncio.sleep(self.report_interval)
+            logger.info(self.report(time.monotonic() - start, cpu_seconds, time.process_time() - process_start))
+
+    async def run(self) -> None:
+        asyncio.get_running_loop().set_task_factory(self.create_task)
+        tasks = []
+        for name, robot in self.robots.items():
+            # A task takes a copy of the context it's created in, and so do the tasks it starts.
+            token = current_robot.set(name)
+            tasks.append(asyncio.create_task(robot.run()))
+            current_robot.reset(token)
+        await asyncio.gather(*tasks, self.report_usage())
+
+    def close(self) -> None:
+        for robot in self.robots.values():
+            robot.tracer.close()
+
+
+if __name__ == "__main__":
+    if "-v" in sys.argv:
+        logger.setLevel(logging.DEBUG)
+    else:
+        logger.setLevel(logging.INFO)
+
+    host_config_path = next((arg for arg in sys.argv[1:] if not arg.startswith("-")), "host.yaml")
+    logger.info("Initializing robots...")
+    host = RobotHost(host_config_path)
+
+    try:
+        asyncio.run(host.run())
+    finally:
+        host.close()
+        get_tracer().close()
+        get_hardware().close()
@@ -0,0 +1,104 @@
+import asyncio
+import collections
+import time
+from typing import Callable
+
+import numpy as np
+
+
+class LipSync:
+    """
+    Drives the mouth LED from a per-10 ms amplitude envelope of the queued speech.
+
+    The envelope is computed once, when audio is queued for playback. The
+    playback thread reports how many samples it has written to the device, and a
+    timer on the event loop uses that, minus the device's output latency, to
+    show the brightness for what is audible right now.
+    """
+
+    STEP_DURATION = 0.01
+    VOLUME_THRESHOLDS = np.array([0.3, 0.5, 0.7])
+    BRIGHTNESS_LEVELS = np.array([0.0, 0.25, 0.5, 1.0])
+
+    rate: int
+    max_volume: float
+    step_samples: int
+    latency: float
+    set_brightness: Callable[[float], None]
+
+    def __init__(self, rate: int, max_volume: float, set_brightness: Callable[[float], None]) -> None:
+        self.rate = rate
+        self.max_volume = max_volume
+        self.step_samples = int(rate * self.STEP_DURATION)
+        # Thresholds on mean-square energy, so the envelope needs no sqrt or per-step division by max_volume.
+        self.energy_thresholds = (self.VOLUME_THRESHOLDS * max_volume) ** 2
+        self.latency = 0.0
+        self.set_brightness = set_brightness
+
+        # (first sample, end sample, brightness per step), in playback stream positions
+        self.segments: collections.deque[tuple[int, int, np.ndarray]] = collections.deque()
+        self.anchor: tuple[int, float] | None = None
+        self.has_segments = asyncio.Event()
+
+    def envelope(self, audio_data: bytes) -> np.ndarray:
+        """Return the LED brightness for each 10 ms step of 16-bit mono PCM."""
+        audio_np = np.frombuffer(audio_data, dtype=np.int16)
+        n_full = len(audio_np) // self.step_samples * self.step_samples
+
+        frames = audio_np[:n_full].reshape(-1, self.step_samples)
+        mean_square = np.einsum("ij,ij->i", frames, frames, dtype=np.float32) / self.step_samples
+
+        tail = audio_np[n_full:]
+        if len(tail):
+            tail_float = tail.astype(np.float32)
+            mean_square = np.append(mean_square, np.dot(tail_float, tail_float) / len(tail))
+
+        return self.BRIGHTNESS_LEVELS[np.searchsorted(self.energy_thresholds, mean_square, side="right")]
+
+    def add(self, audio_data: bytes, first_sample: int) -> None:
+        """Precompute the envelope for audio queued at playback position `first_sample`."""
+        levels = self.envelope(audio_data)
+        self.segments.append((first_sample, first_sample + len(audio_data) // 2, levels))
+        self.has_segments.set()
+
+    def on_played(self, samples_written: int) -> None:
+        """Called from the playback thread each time a block has been handed to the device."""
+        self.anchor = (samples_written, time.monotonic())
+
+    def audible_sample(self) -> float | None:
+        if self.anchor is None:
+            return None
+
+        samples_written, written_at = self.anchor
+        position = samples_written + (time.monotonic() - written_at - self.latency) * self.rate
+        return min(position, samples_written)
+
+    async def run(self) -> None:
+        current = 0.0
+        self.set_brightness(current)
+
+        while True:
+            if not self.segments:
+                if current:
+                    current = 0.0
+                    self.set_brightness(current)
+                self.has_segments.clear()
+                await self.has_segments.wait()
+                continue
+
+            brightness = 0.0
+            position = self.audible_sample()
+            if position is not None:
+                while self.segments and position >= self.segments[0][1]:
+                    self.segments.popleft()
+
+                if self.segments and position >= self.segments[0][0]:
+                    first_sample, _, levels = self.segments[0]
+                    brightness = float(levels[min(int(position - first_sample) // self.step_samples,
+                                                  len(levels) - 1)])
+
+            if brightness != current:
+                current = brightness
+                self.set_brightness(current)
+
+            await asyncio.sleep(self.STEP_DURATION)
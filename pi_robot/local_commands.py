@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from typing import Mapping
+
+from pi_robot.phrase_spotter import PhraseSpotter
+
+if TYPE_CHECKING:
+    import vosk
+
+
+# What visitors say most, mapped to the gesture tool that carries it out.
+COMMAND_PHRASES = {
+    "blink": "blink_eyes",
+    "blink your eyes": "blink_eyes",
+    "wiggle your ears": "wiggle_ears",
+    "move your ears": "wiggle_ears",
+    "wiggle your eyebrows": "wiggle_eyebrows",
+    "move your eyebrows": "wiggle_eyebrows",
+    "raise your eyebrows": "wiggle_eyebrows",
+}
+
+
+@dataclass(frozen=True)
+class LocalCommand:
+    phrase: str
+    gesture: str
+    # The lowest word confidence, or None if the command was taken from a stable partial result.
+    confidence: float | None
+
+
+class CommandRecognizer:
+    """
+    Spots face commands in the capture stream, so they can be carried out
+    without waiting for the realtime API. At most one command is returned per
+    utterance.
+    """
+
+    phrases: Mapping[str, str]
+
+    def __init__(
+        self,
+        model: "vosk.Model",
+        sample_rate: int,
+        phrases: Mapping[str, str] = COMMAND_PHRASES,
+        min_confidence: float = 0.8,
+        stable_chunks: int = 4,
+    ) -> None:
+        self.phrases = phrases
+        self.spotter = PhraseSpotter(model, sample_rate, phrases, min_confidence, stable_chunks)
+
+    def reset(self) -> None:
+        self.spotter.reset()
+
+    def accept(self, audio_data: bytes) -> LocalCommand | None:
+        """Feed a chunk of 16-bit mono audio. Returns the command if this chunk completed one."""
+        match = self.spotter.accept(audio_data)
+        if match is None:
+            return None
+        return LocalCommand(match.phrase, self.phrases[match.phrase], match.confidence)
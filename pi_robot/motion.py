@@ -0,0 +1,322 @@
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import threading
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Callable
+from typing import Generator
+from typing import Iterable
+
+import numpy as np
+
+from pi_robot.logging import logger
+
+
+# An actuator is an attribute on a device, e.g. (servo, "angle") or (led, "value").
+Actuator = tuple[object, str]
+
+
+@dataclass(frozen=True)
+class Keyframes:
+    """A curve through (time, value) points, eased between each pair of points."""
+
+    points: tuple[tuple[float, float], ...]
+    easing: str = "linear"
+
+    @classmethod
+    def oscillate(cls, low: float, high: float, period: float, repeat_n: int, easing: str = "linear") -> "Keyframes":
+        """Go from `low` to `high` and back, `repeat_n` times, each round trip taking `period` seconds."""
+        points = [(0.0, low)]
+        for i in range(repeat_n):
+            points.append((period * (i + 0.5), high))
+            points.append((period * (i + 1), low))
+        return cls(tuple(points), easing)
+
+
+@functools.lru_cache(maxsize=128)
+def sample_keyframes(keyframes: Keyframes, tick_rate: float) -> np.ndarray:
+    """Precompute the value of `keyframes` at every tick."""
+    times = np.array([t for t, _ in keyframes.points])
+    values = np.array([v for _, v in keyframes.points])
+
+    ticks = np.arange(int(round(times[-1] * tick_rate)) + 1) / tick_rate
+    segment = np.clip(np.searchsorted(times, ticks, side="right") - 1, 0, len(times) - 2)
+    span = times[segment + 1] - times[segment]
+    fraction = np.clip((ticks - times[segment]) / np.where(span > 0, span, 1), 0, 1)
+
+    if keyframes.easing == "ease_in_out":
+        fraction = (1 - np.cos(np.pi * fraction)) / 2
+
+    curve = values[segment] + (values[segment + 1] - values[segment]) * fraction
+    curve.flags.writeable = False
+    return curve
+
+
+@dataclass
+class Gesture:
+    name: str
+    tracks: dict[Actuator, Keyframes]
+    priority: int = 0
+
+
+class GestureHandle:
+    """Returned by `MotionEngine.play`. Can be cancelled, waited on from a thread, or awaited."""
+
+    gesture: Gesture
+    future: concurrent.futures.Future
+
+    def __init__(self, engine: "MotionEngine", gesture: Gesture) -> None:
+        self.engine = engine
+        self.gesture = gesture
+        self.future = concurrent.futures.Future()
+
+    def __repr__(self) -> str:
+        state = "done" if self.future.done() else "playing"
+        return f"<GestureHandle {self.gesture.name} {state}>"
+
+    def __await__(self) -> Generator:
+        return asyncio.wrap_future(self.future).__await__()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def cancel(self) -> None:
+        self.engine.cancel(self)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until the gesture finishes. Returns False if it was cancelled or interrupted."""
+        return self.future.result(timeout)
+
+
+@dataclass
+class Track:
+    handle: GestureHandle
+    curve: np.ndarray
+    priority: int
+    position: int = 0
+
+
+@dataclass
+class ActuatorSlot:
+    active: Track | None = None
+    pending: collections.deque[Track] = field(default_factory=collections.deque)
+
+
+class MotionEngine:
+    """
+    Plays gestures on every actuator from one thread at a fixed tick rate.
+
+    Each gesture's keyframes are sampled into NumPy curves up front, so a tick
+    only looks up one value per busy actuator. Gestures on the same actuator
+    queue behind each other; a higher-priority gesture interrupts a lower one.
+    Ticks are scheduled against absolute deadlines so timing doesn't drift, and
+    how late each tick ran is recorded for `timing_stats`.
+    """
+
+    tick_rate: float
+    slots: dict[Actuator, ActuatorSlot]
+    tick_lateness: collections.deque[float]
+    missed_ticks: int
+
+    def __init__(self, tick_rate: float = 100.0, stats_window: int = 10000) -> None:
+        self.tick_rate = tick_rate
+        self.slots = {}
+        self.tracks_left: dict[GestureHandle, int] = {}
+        self.condition = threading.Condition()
+        self.thread: threading.Thread | None = None
+        self.flush_hooks: list[Callable[[], bool]] = []
+        self.flush_deferred = False
+
+        self.tick_lateness = collections.deque(maxlen=stats_window)
+        self.missed_ticks = 0
+
+    def play(self, gesture: Gesture) -> GestureHandle:
+        handle = GestureHandle(self, gesture)
+        if not gesture.tracks:
+            handle.future.set_result(True)
+            return handle
+
+        with self.condition:
+            self.tracks_left[handle] = len(gesture.tracks)
+
+            for actuator, keyframes in gesture.tracks.items():
+                track = Track(handle, sample_keyframes(keyframes, self.tick_rate), gesture.priority)
+                slot = self.slots.setdefault(actuator, ActuatorSlot())
+
+                if slot.active and track.priority > slot.active.priority:
+                    self.remove(slot.active.handle)
+                    slot.active = track
+                else:
+                    slot.pending.append(track)
+
+            self.wake()
+
+        return handle
+
+    def wake(self) -> None:
+        """Start the engine thread if needed and wake it from idle. Called with the lock held."""
+        if not self.thread:
+            self.thread = threading.Thread(target=self.run, name="motion-engine", daemon=True)
+            self.thread.start()
+        self.condition.notify()
+
+    def cancel(self, handle: GestureHandle) -> None:
+        with self.condition:
+            self.remove(handle)
+
+    def remove(self, handle: GestureHandle) -> None:
+        """Stop every track of a gesture that was cancelled or interrupted. Called with the lock held."""
+        for slot in self.slots.values():
+            if slot.active and slot.active.handle is handle:
+                slot.active = None
+            for track in [t for t in slot.pending if t.handle is handle]:
+                slot.pending.remove(track)
+
+        if handle in self.tracks_left:
+            del self.tracks_left[handle]
+            handle.future.set_result(False)
+
+    def release(self, devices: Iterable[object]) -> None:
+        """Stop every gesture that moves any of `devices` and forget them, e.g. before they are closed."""
+        devices = set(devices)
+        with self.condition:
+            for actuator in [actuator for actuator in self.slots if actuator[0] in devices]:
+                slot = self.slots.pop(actuator)
+                for track in [slot.active, *slot.pending]:
+                    if track:
+                        self.remove(track.handle)
+
+    def finish_track(self, track: Track) -> None:
+        """Called with the lock held when a track has played to the end."""
+        handle = track.handle
+        self.tracks_left[handle] -= 1
+        if self.tracks_left[handle] == 0:
+            del self.tracks_left[handle]
+            handle.future.set_result(True)
+
+    def tick(self, steps: int = 1) -> list[tuple[Actuator, float]]:
+        """
+        Advance every busy actuator by `steps` ticks, more than one when ticks were
+        skipped, so gestures keep their duration. Called with the lock held.
+        """
+        writes = []
+        for actuator, slot in self.slots.items():
+            if slot.active is None:
+                # Take the highest-priority pending track, oldest first.
+                if slot.pending:
+                    slot.active = max(slot.pending, key=lambda t: t.priority)
+                    slot.pending.remove(slot.active)
+
+            track = slot.active
+            if track is None:
+                continue
+
+            if track.position:
+                track.position = min(track.position + steps - 1, len(track.curve) - 1)
+            writes.append((actuator, float(track.curve[track.position])))
+            track.position += 1
+            if track.position >= len(track.curve):
+                slot.active = None
+                self.finish_track(track)
+
+        return writes
+
+    def add_flush_hook(self, hook: Callable[[], bool]) -> None:
+        """
+        Call `hook` after each tick's writes, e.g. to send batched writes to a bus. It
+        returns True if it held writes back, and the engine keeps ticking until it doesn't.
+        """
+        with self.condition:
+            self.flush_hooks.append(hook)
+
+    def request_flush(self) -> None:
+        """Run the flush hooks on the next tick, even if no gesture is playing."""
+        with self.condition:
+            self.flush_deferred = True
+            self.wake()
+
+    def flush(self) -> None:
+        with self.condition:
+            self.flush_deferred = False
+
+        deferred = False
+        for hook in self.flush_hooks:
+            try:
+                deferred |= hook()
+            except Exception as e:
+                logger.warning(f"Flush hook {hook} failed: {e}")
+
+        if deferred:
+            with self.condition:
+                self.flush_deferred = True
+
+    def is_idle(self) -> bool:
+        return not self.flush_deferred and all(
+            slot.active is None and not slot.pending for slot in self.slots.values()
+        )
+
+    def run(self) -> None:
+        period = 1.0 / self.tick_rate
+        deadline = time.monotonic()
+        steps = 1
+
+        while True:
+            with self.condition:
+                if self.is_idle():
+                    self.condition.wait()
+                    deadline = time.monotonic()
+                    continue
+                writes = self.tick(steps)
+
+            for (device, attribute), value in writes:
+                try:
+                    setattr(device, attribute, value)
+                except Exception as e:
+                    logger.warning(f"Failed to set {attribute} on {device}: {e}")
+            self.flush()
+
+            deadline += period
+            now = time.monotonic()
+            if now < deadline:
+                time.sleep(deadline - now)
+
+            lateness = time.monotonic() - deadline
+            self.tick_lateness.append(lateness)
+            steps = 1
+            if lateness > period:
+                # Fell a whole tick behind: skip ahead rather than bursting to catch up.
+                skipped = int(lateness / period)
+                self.missed_ticks += skipped
+                steps += skipped
+                deadline += skipped * period
+
+    def timing_stats(self) -> dict[str, float]:
+        """Tick lateness percentiles in milliseconds, plus the count of skipped ticks."""
+        if not self.tick_lateness:
+            return {"ticks": 0, "missed_ticks": self.missed_ticks}
+
+        lateness = np.array(self.tick_lateness) * 1000
+        return {
+            "ticks": len(lateness),
+            "missed_ticks": self.missed_ticks,
+            "p50_ms": float(np.percentile(lateness, 50)),
+            "p99_ms": float(np.percentile(lateness, 99)),
+            "max_ms": float(lateness.max()),
+        }
+
+
+_motion_engine: MotionEngine | None = None
+_motion_engine_lock = threading.Lock()
+
+
+def get_motion_engine() -> MotionEngine:
+    """Return the motion engine shared by every body part in the process."""
+    global _motion_engine
+
+    with _motion_engine_lock:
+        if _motion_engine is None:
+            _motion_engine = MotionEngine()
+        return _motion_engine
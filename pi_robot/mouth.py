@@ -1,70 +1,97 @@
-import numpy as np
+import asyncio
 from gpiozero import PWMLED
-from pyaudio import PyAudio
-from time import sleep
 
-from pi_robot.ears import Ears
+from pi_robot.hardware import get_hardware
+from pi_robot.lip_sync import LipSync
+from pi_robot.playback import AudioPlayer
+from pi_robot.telemetry import Tracer
 
 
 class Mouth:
     led: PWMLED | None = None
+    gpio: int | None = None
+    player: AudioPlayer | None = None
+    lip_sync: LipSync
+    lip_sync_task: asyncio.Task | None = None
 
     def __init__(
         self,
         gpio: int | None = None,
         output_rate: int = 24000,
         max_volume: float = 6000,
+        output_device: str | None = None,
+        tracer: Tracer | None = None,
     ):
         """
         :param led: a PWMLED instance that supports brightness control (value between 0 and 1)
         :param output_rate: audio playback sample rate
         :param max_volume: RMS value that corresponds to full brightness (tweak as needed)
+        :param output_device: part of the speaker's name, if not the default output device
+        :param tracer: for the playback spans, if not the one shared by the process
         """
-        if gpio:
-            self.led = PWMLED(gpio)
+        self.set_gpio(gpio)
         self.output_rate = output_rate
         self.max_volume = max_volume
+        self.output_device = output_device
+        self.tracer = tracer
+        self.lip_sync = LipSync(output_rate, max_volume, self.set_brightness)
 
-    def map_volume_to_brightness(self, rms: float) -> float:
-        """
-        Map the computed RMS value to a brightness value of 0.0, 0.5, or 1.0.
-        Adjust `max_volume` based on your experimental audio levels.
-        """
-        # Normalize the RMS value.
-        normalized = rms / self.max_volume
-        normalized = max(0.0, min(1.0, normalized))
+    def set_gpio(self, gpio: int | None) -> None:
+        """Move the LED to another pin. Playback carries on."""
+        if gpio == self.gpio:
+            return
+        if self.led:
+            self.led.close()
+        self.led = PWMLED(gpio, pin_factory=get_hardware().pin_factory) if gpio else None
+        self.gpio = gpio
+        if self.led and self.player and not self.lip_sync_task:
+            self.lip_sync_task = asyncio.create_task(self.lip_sync.run())
 
-        # Define steps. Adjust the thresholds as needed.
-        if normalized < 0.3:
-            return 0.0
-        elif normalized < 0.5:
-            return 0.25
-        elif normalized < 0.7:
-            return 0.5
-        else:
-            return 1.0
+    def set_brightness(self, brightness: float) -> None:
+        if self.led:
+            self.led.value = brightness
 
-    def speak(self, output_stream: PyAudio.Stream, audio_data: bytes) -> None:
-        """
-        Send the audio data to OpenAI, play back the response audio, and adjust
-        the LED brightness in real time based on the audio volume.
-        """
+    async def start(self) -> None:
+        """Open the output device and start the playback thread."""
+        self.player = AudioPlayer(
+            rate=self.output_rate, on_played=self.lip_sync.on_played, device=self.output_device, tracer=self.tracer
+        )
+        await self.player.start()
+        self.lip_sync.latency = self.player.output_latency
 
         if self.led:
-            # Compute RMS for this chunk and map it to an LED brightness.
-            audio_np = np.frombuffer(audio_data, dtype=np.int16)
-            rms = Ears.compute_rms(audio_np)
-            brightness = self.map_volume_to_brightness(rms)
-            self.led.value = brightness
+            self.lip_sync_task = asyncio.create_task(self.lip_sync.run())
+
+    def stop(self) -> None:
+        if self.lip_sync_task:
+            self.lip_sync_task.cancel()
+            self.lip_sync_task = None
+        if self.player:
+            self.player.stop()
+            self.player = None
 
-        # Write the audio chunk to the output stream.
-        output_stream.write(audio_data)  # type: ignore
+    async def speak(self, audio_data: bytes) -> None:
+        """
+        Queue response audio for playback. The LED follows its precomputed envelope
+        as the audio becomes audible.
+        """
+        if not self.player:
+            await self.start()
+        assert self.player is not None
 
         if self.led:
-            self.led.value = 0.0
+            self.lip_sync.add(audio_data, self.player.samples_enqueued)
+        await self.player.enqueue(audio_data)
+
+    async def finish_speaking(self) -> None:
+        """Wait for everything queued by `speak` to be played."""
+        if self.player:
+            self.player.end_of_stream()
+            await self.player.drain()
 
-    def light_up(self) -> None:
+    async def flash(self, duration: float = 1.0) -> None:
+        """Light up the mouth for `duration` without blocking the event loop."""
         if self.led:
             self.led.value = 1.0
-            sleep(1.0)
+            await asyncio.sleep(duration)
             self.led.value = 0.0
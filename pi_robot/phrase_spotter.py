@@ -0,0 +1,102 @@
+import json
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from typing import Iterable
+
+if TYPE_CHECKING:
+    import vosk
+
+
+@dataclass(frozen=True)
+class PhraseMatch:
+    phrase: str
+    # The lowest word confidence, or None if the phrase was taken from a stable partial result.
+    confidence: float | None
+
+
+class PhraseSpotter:
+    """
+    Spots a few phrases in a stream of audio with a Vosk recognizer whose
+    grammar only holds those phrases.
+
+    Anything else is recognized as "[unk]" and never matches. A final result
+    matches if every word has at least `min_confidence`. Partial results have no
+    confidences, so a phrase of at least `min_partial_words` words is also taken
+    as soon as the partial result has been exactly that phrase for
+    `stable_chunks` chunks in a row, which is usually well before Vosk finalizes
+    the utterance. A one-word phrase is too easily heard in other speech to take
+    on trust, so it waits for the final result. At most one phrase is returned
+    until `reset`.
+    """
+
+    phrases: frozenset[str]
+    min_confidence: float
+    stable_chunks: int
+    min_partial_words: int
+
+    def __init__(
+        self,
+        model: "vosk.Model",
+        sample_rate: int,
+        phrases: Iterable[str],
+        min_confidence: float = 0.8,
+        stable_chunks: int = 4,
+        min_partial_words: int = 2,
+    ) -> None:
+        import vosk
+
+        self.phrases = frozenset(phrases)
+        self.min_confidence = min_confidence
+        self.stable_chunks = stable_chunks
+        self.min_partial_words = min_partial_words
+
+        self.recognizer = vosk.KaldiRecognizer(model, sample_rate, json.dumps([*sorted(self.phrases), "[unk]"]))
+        self.recognizer.SetWords(True)
+        self.partial = ""
+        self.partial_count = 0
+        self.matched = False
+
+    def reset(self) -> None:
+        self.recognizer.Reset()
+        self.partial = ""
+        self.partial_count = 0
+        self.matched = False
+
+    def accept(self, audio_data: bytes) -> PhraseMatch | None:
+        """Feed a chunk of 16-bit mono audio. Returns the phrase if this chunk completed one."""
+        if self.matched:
+            return None
+
+        if self.recognizer.AcceptWaveform(audio_data):
+            match = self.match_result(json.loads(self.recognizer.Result()))
+            self.partial = ""
+            self.partial_count = 0
+        else:
+            partial = json.loads(self.recognizer.PartialResult())["partial"]
+            if partial == self.partial:
+                self.partial_count += 1
+            else:
+                self.partial = partial
+                self.partial_count = 1
+
+            match = None
+            if (
+                partial in self.phrases
+                and len(partial.split()) >= self.min_partial_words
+                and self.partial_count >= self.stable_chunks
+            ):
+                match = PhraseMatch(partial, None)
+
+        self.matched = match is not None
+        return match
+
+    def match_result(self, result: dict) -> PhraseMatch | None:
+        text = result.get("text", "")
+        words = result.get("result", [])
+        if text not in self.phrases or not words:
+            return None
+
+        confidence = min(word["conf"] for word in words)
+        if confidence < self.min_confidence:
+            return None
+        return PhraseMatch(text, confidence)
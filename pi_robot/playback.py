@@ -0,0 +1,188 @@
+import asyncio
+import collections
+import threading
+from typing import Callable
+
+from pi_robot.hardware import get_hardware
+from pi_robot.telemetry import Tracer
+from pi_robot.telemetry import get_tracer
+
+
+class AudioPlayer:
+    """
+    Plays 16-bit mono PCM on a persistent output stream from a dedicated thread.
+
+    The event loop only enqueues audio into a bounded jitter buffer. Playback
+    starts once `prefill_duration` of audio is buffered (or the end of the
+    response is signalled), and the thread writes small blocks so the device is
+    fed steadily. Running dry mid-response counts as an underrun and re-primes
+    the buffer; enqueueing into a full buffer counts as an overrun and waits for
+    space without blocking the loop.
+    """
+
+    BLOCK_DURATION = 0.02
+
+    rate: int
+    block_bytes: int
+    prefill_bytes: int
+    capacity_bytes: int
+    on_played: Callable[[int], None] | None
+
+    underruns: int
+    overruns: int
+    samples_enqueued: int
+    samples_written: int
+    max_buffered_bytes: int
+
+    def __init__(
+        self,
+        rate: int = 24000,
+        prefill_duration: float = 0.1,
+        max_buffered_duration: float = 5.0,
+        on_played: Callable[[int], None] | None = None,
+        device: str | None = None,
+        tracer: Tracer | None = None,
+    ) -> None:
+        self.rate = rate
+        self.device = device
+        self.block_bytes = int(rate * self.BLOCK_DURATION) * 2
+        self.prefill_bytes = int(rate * prefill_duration) * 2
+        self.capacity_bytes = int(rate * max_buffered_duration) * 2
+        self.on_played = on_played
+        self.tracer = tracer or get_tracer()
+
+        self.buffer: collections.deque[bytes] = collections.deque()
+        self.buffered_bytes = 0
+        self.ending = False
+        self.priming = True
+        self.running = False
+        self.writing = False
+        self.condition = threading.Condition()
+
+        self.underruns = 0
+        self.overruns = 0
+        self.samples_enqueued = 0
+        self.samples_written = 0
+        self.max_buffered_bytes = 0
+
+    async def start(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.space_available = asyncio.Event()
+        self.drained = asyncio.Event()
+        self.drained.set()
+
+        hardware = get_hardware()
+        # On the first run, the device probe streams test audio for a few seconds.
+        config = await asyncio.to_thread(lambda: hardware.audio_devices.output_config(self.rate, self.device))
+        self.audio = hardware.pyaudio
+        self.output_stream = self.audio.open(
+            format=hardware.portaudio.paInt16,
+            channels=1,
+            rate=self.rate,
+            output=True,
+            output_device_index=config.device_index,
+            frames_per_buffer=config.frames_per_buffer,
+        )
+
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="audio-playback", daemon=True)
+        self.thread.start()
+
+    @property
+    def output_latency(self) -> float:
+        """Seconds between a block being written and it being heard, as reported by the device."""
+        return self.output_stream.get_output_latency()
+
+    def stop(self) -> None:
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join()
+
+        self.output_stream.stop_stream()
+        self.output_stream.close()
+
+    async def enqueue(self, audio_data: bytes) -> None:
+        """Queue audio for playback, waiting (without blocking the loop) while the buffer is full."""
+        waited = False
+        while True:
+            with self.condition:
+                if self.buffered_bytes + len(audio_data) <= self.capacity_bytes or not self.buffer:
+                    self.buffer.append(audio_data)
+                    self.buffered_bytes += len(audio_data)
+                    self.samples_enqueued += len(audio_data) // 2
+                    self.max_buffered_bytes = max(self.max_buffered_bytes, self.buffered_bytes)
+                    self.ending = False
+                    self.drained.clear()
+                    self.condition.notify()
+                    return
+
+                if not waited:
+                    self.overruns += 1
+                    waited = True
+                self.space_available.clear()
+
+            await self.space_available.wait()
+
+    def end_of_stream(self) -> None:
+        """Signal that no more audio is coming for now, so the tail plays without waiting to prefill."""
+        with self.condition:
+            self.ending = True
+            if not self.buffer and not self.writing:
+                self.drained.set()
+            self.condition.notify()
+
+    async def drain(self) -> None:
+        """Wait until everything queued so far has been written to the device."""
+        await self.drained.wait()
+
+    def next_block(self) -> bytes | None:
+        """Take up to one block off the buffer, waiting while priming. Called with the lock held."""
+        while self.running:
+            if self.priming and self.buffer and (self.buffered_bytes >= self.prefill_bytes or self.ending):
+                self.priming = False
+
+            if not self.priming:
+                if self.buffer:
+                    break
+
+                # Ran dry: an underrun if more audio was still expected.
+                if not self.ending:
+                    self.underruns += 1
+                self.priming = True
+
+            self.condition.wait()
+        else:
+            return None
+
+        block = bytearray()
+        while self.buffer and len(block) < self.block_bytes:
+            chunk = self.buffer.popleft()
+            needed = self.block_bytes - len(block)
+            if len(chunk) > needed:
+                self.buffer.appendleft(chunk[needed:])
+                chunk = chunk[:needed]
+            block += chunk
+        self.buffered_bytes -= len(block)
+        return bytes(block)
+
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                block = self.next_block()
+                if block is None:
+                    return
+                self.writing = True
+
+            self.loop.call_soon_threadsafe(self.space_available.set)
+
+            with self.tracer.span("device_write"):
+                self.output_stream.write(block)
+
+            with self.condition:
+                self.writing = False
+                self.samples_written += len(block) // 2
+                if self.on_played:
+                    self.on_played(self.samples_written)
+                if self.ending and not self.buffer:
+                    self.loop.call_soon_threadsafe(self.drained.set)
@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import json
+import random
+
+import openai
+from openai.resources.beta.realtime.realtime import AsyncRealtimeConnection
+
+from pi_robot.logging import logger
+
+
+class RealtimeSession:
+    """
+    A long-lived realtime API connection shared by every conversational turn.
+
+    The connection is opened at startup, before anyone speaks, and `session.update`
+    is only sent when the session config actually changes. The websocket sends
+    keepalive pings, and a connection that fails them (or drops for any other
+    reason) is reopened with jittered exponential backoff.
+    """
+
+    model: str
+    client: openai.AsyncOpenAI
+    connection: AsyncRealtimeConnection | None
+    session_config: dict | None
+    applied_session_hash: str | None
+
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini-realtime-preview",
+        client: openai.AsyncOpenAI | None = None,
+        ping_interval: float = 10.0,
+        ping_timeout: float = 5.0,
+        min_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+    ) -> None:
+        self.model = model
+        self.client = client or openai.AsyncOpenAI()
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+
+        self.connection = None
+        self.session_config = None
+        self.applied_session_hash = None
+        self.connected = asyncio.Event()
+        self.reconnect_lock = asyncio.Lock()
+        self.reconnect_task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Open the connection ahead of the first turn."""
+        await self.reconnect()
+
+    async def close(self) -> None:
+        self.connected.clear()
+        if self.connection:
+            await self.connection.close()
+            self.connection = None
+
+    async def get_connection(self) -> AsyncRealtimeConnection:
+        """Return the current connection, waiting for a reconnect in progress to finish."""
+        await self.connected.wait()
+        assert self.connection is not None
+        return self.connection
+
+    def ready_connection(self) -> AsyncRealtimeConnection | None:
+        """Return the current connection, or None while reconnecting, for callers that can't wait."""
+        return self.connection if self.connected.is_set() else None
+
+    async def update_session(self, session_config: dict) -> None:
+        """
+        Record the desired session config and send it if it differs from what the server has.
+        While reconnecting, this doesn't wait: the new connection is sent the config instead.
+        """
+        self.session_config = session_config
+        connection = self.ready_connection()
+        if connection:
+            await self.apply_session(connection)
+
+    async def apply_session(self, connection: AsyncRealtimeConnection) -> None:
+        if self.session_config is None:
+            return
+
+        session_hash = hashlib.sha256(
+            json.dumps(self.session_config, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        if session_hash == self.applied_session_hash:
+            return
+
+        await connection.session.update(session=self.session_config)  # type: ignore
+        self.applied_session_hash = session_hash
+
+    def backoff_delay(self, attempt: int) -> float:
+        return min(self.max_backoff, self.min_backoff * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def reconnect(self, stale: AsyncRealtimeConnection | None = None) -> None:
+        """
+        Replace the connection, retrying with backoff until it succeeds.
+
+        If `stale` is given and another caller has already replaced that connection,
+        this does nothing, so concurrent failures only trigger one reconnect.
+        """
+        async with self.reconnect_lock:
+            if stale is not None and self.connection is not stale:
+                return
+
+            self.connected.clear()
+            if self.connection:
+                try:
+                    await self.connection.close()
+                except Exception:
+                    pass
+                self.connection = None
+
+            attempt = 0
+            while True:
+                try:
+                    connection = await self.client.beta.realtime.connect(
+                        model=self.model,
+                        # Passed straight through to `websockets.connect`, whose keepalive pings
+                        # close the connection if the server stops answering.
+                        websocket_connection_options={  # type: ignore[typeddict-unknown-key]
+                            "ping_interval": self.ping_interval,
+                            "ping_timeout": self.ping_timeout,
+                        },
+                    ).enter()
+
+                    # A new connection starts with the server's default session.
+                    self.applied_session_hash = None
+                    await self.apply_session(connection)
+                    # In case `update_session` changed the config while it was being sent.
+                    await self.apply_session(connection)
+                    break
+                except Exception as e:
+                    delay = self.backoff_delay(attempt)
+                    logger.warning(f"Realtime connection failed ({e}), retrying in {delay:.1f}s")
+                    attempt += 1
+                    await asyncio.sleep(delay)
+
+            self.connection = connection
+            self.connected.set()
+
+    def reconnect_in_background(self, stale: AsyncRealtimeConnection) -> None:
+        """Start replacing `stale` without waiting for it, so work that doesn't need the connection goes on."""
+        if self.connection is stale:
+            self.connected.clear()
+        if self.reconnect_task is None or self.reconnect_task.done():
+            self.reconnect_task = asyncio.create_task(self.reconnect(stale=stale))
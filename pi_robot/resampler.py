@@ -0,0 +1,71 @@
+import numpy as np
+from math import gcd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class StreamingResampler:
+    """
+    Rational polyphase resampler that can be fed audio one chunk at a time.
+
+    The last few input samples are carried over between calls, so consecutive
+    chunks are filtered as one continuous signal and there are no clicks at
+    chunk boundaries.
+    """
+
+    TAPS_PER_PHASE = 24
+
+    up: int
+    down: int
+    phases: np.ndarray
+    history: np.ndarray
+    samples_in: int
+    samples_out: int
+
+    def __init__(self, orig_rate: int, target_rate: int) -> None:
+        divisor = gcd(orig_rate, target_rate)
+        self.up = target_rate // divisor
+        self.down = orig_rate // divisor
+
+        # scipy.signal takes most of a second to import on a Pi, so only pay for it when resampling.
+        from scipy.signal import firwin
+
+        taps = self.TAPS_PER_PHASE
+        cutoff = 0.85 / max(self.up, self.down)
+        h = firwin(self.up * taps, cutoff, window=("kaiser", 7.0)) * self.up
+
+        # phases[p, k] is the coefficient applied to input sample (i - taps + 1 + k)
+        # for an output that falls on phase p of the upsampled grid after sample i.
+        self.phases = h.reshape(taps, self.up).T[:, ::-1].astype(np.float32)
+
+        self.reset()
+
+    def reset(self) -> None:
+        self.history = np.zeros(self.TAPS_PER_PHASE - 1, dtype=np.float32)
+        self.samples_in = 0
+        self.samples_out = 0
+
+    def process(self, audio_data: bytes | memoryview) -> bytes:
+        """Resample a chunk of 16-bit mono PCM, returning every output sample it completes."""
+        chunk = np.frombuffer(audio_data, dtype=np.int16)
+        if len(chunk) == 0:
+            return b""
+
+        buffer = np.concatenate((self.history, chunk.astype(np.float32)))
+        buffer_start = self.samples_in - len(self.history)
+        self.samples_in += len(chunk)
+
+        # Output n sits at upsampled position n * down, i.e. just after input
+        # sample (n * down) // up, on phase (n * down) % up.
+        n_end = (self.samples_in * self.up + self.down - 1) // self.down
+        positions = np.arange(self.samples_out, n_end, dtype=np.int64) * self.down
+        last_inputs = positions // self.up
+        phase_indices = positions % self.up
+        self.samples_out = n_end
+
+        windows = sliding_window_view(buffer, self.TAPS_PER_PHASE)
+        starts = last_inputs - buffer_start - (self.TAPS_PER_PHASE - 1)
+        resampled = np.einsum("ij,ij->i", windows[starts], self.phases[phase_indices])
+
+        self.history = buffer[-(self.TAPS_PER_PHASE - 1):]
+
+        return np.clip(np.rint(resampled), -32768, 32767).astype(np.int16).tobytes()
@@ -1,27 +1,105 @@
 import asyncio
 import base64
+import copy
+import hashlib
 import json
 import os
 import sys
 import textwrap
+import time
+from dataclasses import dataclass
 
 import logging
-import numpy as np
 import openai
-import pyaudio
 import yaml
-from adafruit_servokit import ServoKit
 from openai.resources.beta.realtime.realtime import AsyncRealtimeConnection
-from pyaudio import PyAudio
-from scipy.signal import resample
-
+from collections.abc import Coroutine
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Iterable
+from gpiozero.exc import GPIOZeroError
+from websockets.exceptions import ConnectionClosed
+
+from pi_robot.brain import API_SURFACE
 from pi_robot.brain import Brain
 from pi_robot.controller import Controller
 from pi_robot.logging import logger
 from pi_robot.mouth import Mouth
 from pi_robot.ears import Ears
+from pi_robot.ears import get_vosk_model
 from pi_robot.eyebrows import Eyebrows
 from pi_robot.eyes import Eyes
+from pi_robot.gestures import GestureArgumentError
+from pi_robot.gestures import GestureRegistry
+from pi_robot.hardware import BACKEND_ENV_VAR
+from pi_robot.hardware import DEFAULT_SERVO_ADDRESS
+from pi_robot.hardware import HARDWARE_BACKEND
+from pi_robot.hardware import get_hardware
+from pi_robot.local_commands import COMMAND_PHRASES
+from pi_robot.local_commands import CommandRecognizer
+from pi_robot.local_commands import LocalCommand
+from pi_robot.realtime_session import RealtimeSession
+from pi_robot.resampler import StreamingResampler
+from pi_robot.servo_driver import get_servo_bus
+from pi_robot.telemetry import Tracer
+from pi_robot.telemetry import get_tracer
+from pi_robot.tool_calls import ToolCall
+from pi_robot.tool_calls import ToolCallAssembler
+from pi_robot.wake_word import WakeWordDetector
+from pi_robot.watchdog import LoopWatchdog
+
+if TYPE_CHECKING:
+    from adafruit_servokit import ServoKit
+
+
+OPENAI_AUDIO_SAMPLE_RATE = 24000
+
+# Config sections that are only read at startup.
+RESTART_SECTIONS = {
+    "openai": (("openai_api_key",), ("openai_websocket_base_url",)),
+    "backend": (("backend",), ("simulation",)),
+    "servo_driver": (("connections", "servo_driver"),),
+    "audio": (("connections", "microphone"), ("connections", "speaker")),
+}
+
+
+def merge_config(config: dict, overrides: dict) -> dict:
+    """`config` with `overrides` merged in, section by section."""
+    merged = dict(config)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def keep_config_values(config: dict, previous: dict, paths: Iterable[tuple[str, ...]]) -> dict:
+    """`config` with the values at `paths`, each a tuple of keys, kept as they are in `previous`."""
+    config = copy.deepcopy(config)
+    for *parents, key in paths:
+        target, source = config, previous
+        for parent in parents:
+            target = target.setdefault(parent, {})
+            source = source.get(parent, {})
+        if key in source:
+            target[key] = source[key]
+        else:
+            target.pop(key, None)
+    return config
+
+
+@dataclass
+class TurnState:
+    """What `Robot.listen` knows about the utterance in progress."""
+
+    started: bool = False
+    streamed_audio: bool = False
+    command_audio_fed: bool = False
+    local_command: LocalCommand | None = None
+    wake_word_audio_fed: bool = False
+    # Where in the ring buffer the upload starts, once the wake word has been heard.
+    woken_at: int | None = None
 
 
 class Robot:
@@ -31,16 +109,53 @@ class Robot:
     ears: Ears
     eyes: Eyes
     eyebrows: Eyebrows
-    servokit: ServoKit
-
-    def __init__(self, config_file_path: str = "config.yaml") -> None:
-        self.servokit = ServoKit(channels=16)
+    gestures: GestureRegistry
+    controller: Controller
+    servokit: "ServoKit"
+    stream_audio: bool
+    openai_api_key: str
+    websocket_base_url: str | None
+    realtime: RealtimeSession
+    resampler: StreamingResampler | None = None
+    session_cache: tuple[str, dict] | None = None
+    tracer: Tracer
+    watchdog: LoopWatchdog | None = None
+    local_commands: dict | None = None
+    command_recognizer: CommandRecognizer | None = None
+    wake_word: dict | None = None
+    wake_word_detector: WakeWordDetector | None = None
+    wake_words_heard: int = 0
+    config_file_path: str
+    config: dict
+    config_poll_interval: float = 1.0
+    pending_config: tuple[dict, float] | None = None
+    config_overrides: dict
+    servo_channels: range
+    # Set to share one client, and its connection pool, between robots.
+    openai_client: openai.AsyncOpenAI | None = None
+    # Tool calls still being carried out, kept so the event loop doesn't drop them.
+    tool_tasks: set[asyncio.Task]
+
+    def __init__(
+        self,
+        config_file_path: str = "config.yaml",
+        overrides: dict | None = None,
+        tracer: Tracer | None = None,
+    ) -> None:
+        """
+        `overrides` are merged into the config file, e.g. to give one of several robots
+        its own audio devices. `tracer` defaults to the one shared by the process.
+        """
+        self.tracer = tracer or get_tracer()
+        self.config_file_path = config_file_path
+        self.config_overrides = overrides or {}
+        self.config = {}
+        self.tool_tasks = set()
         self.configure(config_file_path)
 
     def configure(self, config_file_path: str) -> None:
         try:
-            with open(config_file_path) as config_file:
-                config = yaml.safe_load(config_file)
+            config = self.load_config(config_file_path)
         except FileNotFoundError:
             logger.error(textwrap.dedent(
                 f"""\
@@ -52,17 +167,128 @@ class Robot:
             exit(1)
 
         try:
-            os.environ["OPENAI_API_KEY"] = config["openai_api_key"]
+            self.apply_config(config)
+        except KeyError as e:
+            logger.error(f"Key `{e}` not found in configuration file.")
+            exit(1)
+        except ValueError as e:
+            logger.error(f"Invalid configuration: {e}")
+            exit(1)
+
+    def load_config(self, config_file_path: str) -> dict:
+        with open(config_file_path) as config_file:
+            return merge_config(yaml.safe_load(config_file), self.config_overrides)
+
+    @staticmethod
+    def config_sections(config: dict) -> dict[str, object]:
+        """The parts of the config each setting or component is built from, so a reload can tell what changed."""
+        connections = config["connections"]
+        return {
+            "openai": (config["openai_api_key"], config.get("openai_websocket_base_url")),
+            "backend": (config.get("backend", HARDWARE_BACKEND), config.get("simulation", {})),
+            "servo_driver": connections.get("servo_driver", {}),
+            "audio": (connections.get("microphone"), connections.get("speaker")),
+            "name": config["name"],
+            "stream_audio": config.get("stream_audio", True),
+            "telemetry": config.get("telemetry", {}),
+            "local_commands": ("local_commands" in config, config.get("local_commands")),
+            "wake_word": ("wake_word" in config, config.get("wake_word")),
+            "watchdog": ("watchdog" in config, config.get("watchdog")),
+            "mouth": connections.get("mouth"),
+            "ears": connections.get("ears", {}),
+            "listening": config.get("listening", {}),
+            "eyes": connections.get("eyes", {}),
+            "eyebrows": connections.get("eyebrows", {}),
+            "controller": (connections.get("controller", {}), config.get("controller", {})),
+        }
 
+    def apply_config(self, config: dict) -> list[str]:
+        """
+        Build the robot from `config`, or, if it was already built, update only what
+        changed, leaving the audio streams and the realtime connection open. Returns
+        the names of the changed config sections.
+        """
+        sections = self.config_sections(config)
+        previous = self.config_sections(self.config) if self.config else {}
+        changed = [name for name, value in sections.items() if name not in previous or previous[name] != value]
+
+        needs_restart = [name for name in changed if previous and name in RESTART_SECTIONS]
+        if needs_restart:
+            logger.warning(f"Restart the robot to apply the changes to {', '.join(needs_restart)}")
+            changed = [name for name in changed if name not in needs_restart]
+
+        if "openai" in changed:
+            os.environ["OPENAI_API_KEY"] = self.openai_api_key = config["openai_api_key"]
+            self.websocket_base_url = config.get("openai_websocket_base_url")
+
+        if "name" in changed:
             self.name = config["name"]
+        if "stream_audio" in changed:
+            self.stream_audio = config.get("stream_audio", True)
+
+        if "backend" in changed:
+            # The environment variable wins, so a config can be run in simulation as is.
+            simulation = config.get("simulation", {})
+            get_hardware().use_backend(
+                os.environ.get(BACKEND_ENV_VAR) or config.get("backend", HARDWARE_BACKEND),
+                input_wav_path=simulation.get("input_wav"),
+                output_wav_path=simulation.get("output_wav"),
+                state_log_path=simulation.get("state_log"),
+            )
 
-            connections = config["connections"]
+        # The PCA9685 and the range of its channels the servos are on, e.g.
+        # `servo_driver: {address: 0x41, channels: [8, 16]}` for the upper half of a second chip.
+        # The parts' channels count from the start of the range.
+        if "servo_driver" in changed:
+            servo_driver = config["connections"].get("servo_driver", {})
+            self.servokit = get_hardware().servokit_at(servo_driver.get("address", DEFAULT_SERVO_ADDRESS))
+            self.servo_channels = range(*servo_driver.get("channels", (0, 16)))
+
+        if "telemetry" in changed:
+            telemetry = config.get("telemetry", {})
+            self.tracer.configure(
+                trace_path=telemetry.get("trace_path"),
+                metrics_port=telemetry.get("metrics_port"),
+            )
 
-            self.mouth = Mouth(gpio=connections.get("mouth"))
+        # Carries out simple face commands without the realtime API, e.g.
+        # `local_commands: {reply: false, min_confidence: 0.8}`.
+        if "local_commands" in changed:
+            self.local_commands = (config["local_commands"] or {}) if "local_commands" in config else None
+
+        # Only sends speech to the realtime API once the robot's name is heard, e.g.
+        # `wake_word: {phrases: ["hey robot"], pre_roll_ms: 500, min_confidence: 0.7}`.
+        if "wake_word" in changed:
+            self.wake_word = (config["wake_word"] or {}) if "wake_word" in config else None
+
+        # Reports what blocks the event loop, e.g. `watchdog: {stall_threshold_ms: 50}`.
+        if "watchdog" in changed:
+            if self.watchdog:
+                self.watchdog.stop()
+            self.watchdog = None
+            if "watchdog" in config:
+                watchdog = config["watchdog"] or {}
+                self.watchdog = LoopWatchdog(
+                    stall_threshold=watchdog.get("stall_threshold_ms", 50) / 1000,
+                    sample_interval=watchdog.get("sample_interval_ms", 5) / 1000,
+                    tracer=self.tracer,
+                )
+
+        connections = config["connections"]
+        controller = self.controller_settings(config)
+
+        if not previous:
+            self.mouth = Mouth(
+                gpio=connections.get("mouth"),
+                output_device=connections.get("speaker"),
+                tracer=self.tracer,
+            )
 
             self.ears = Ears(
-                left_gpio=connections.get("ears", {}).get("left"),
-                right_gpio=connections.get("ears", {}).get("right")
+                servokit=self.servokit,
+                left_channel=self.servo_channel(connections.get("ears", {}).get("left")),
+                right_channel=self.servo_channel(connections.get("ears", {}).get("right")),
+                input_device=connections.get("microphone"),
             )
 
             self.eyes = Eyes(
@@ -71,10 +297,12 @@ class Robot:
             )
             self.eyebrows = Eyebrows(
                 servokit=self.servokit,
-                left_channel=connections.get("eyebrows", {}).get("left"),
-                right_channel=connections.get("eyebrows", {}).get("right")
+                left_channel=self.servo_channel(connections.get("eyebrows", {}).get("left")),
+                right_channel=self.servo_channel(connections.get("eyebrows", {}).get("right")),
             )
 
+            self.gestures = GestureRegistry(ears=self.ears, eyes=self.eyes, eyebrows=self.eyebrows)
+
             self.brain = Brain(
                 mouth=self.mouth,
                 ears=self.ears,
@@ -82,19 +310,135 @@ class Robot:
                 eyebrows=self.eyebrows,
             )
 
-            self.controller = Controller(
-                ears=self.ears,
-                eyes=self.eyes,
-                eyebrows=self.eyebrows,
-                button_x_gpio=connections.get("controller", {}).get("button_x"),
-                button_y_gpio=connections.get("controller", {}).get("button_y"),
-                button_a_gpio=connections.get("controller", {}).get("button_a"),
-                button_b_gpio=connections.get("controller", {}).get("button_b"),
-            )
+            self.controller = Controller(gestures=self.gestures, mouth=self.mouth, tracer=self.tracer, **controller)
+        else:
+            # The body parts are shared with the gestures, the brain and the controller,
+            # so they are rewired in place rather than replaced.
+            if "mouth" in changed:
+                self.mouth.set_gpio(connections.get("mouth"))
+            if "ears" in changed:
+                ears = connections.get("ears", {})
+                self.ears.set_channels(self.servo_channel(ears.get("left")), self.servo_channel(ears.get("right")))
+            if "eyes" in changed:
+                eyes = connections.get("eyes", {})
+                self.eyes.set_gpios(eyes.get("left"), eyes.get("right"))
+            if "eyebrows" in changed:
+                eyebrows = connections.get("eyebrows", {})
+                self.eyebrows.set_channels(
+                    self.servo_channel(eyebrows.get("left")),
+                    self.servo_channel(eyebrows.get("right")),
+                )
+            if "controller" in changed:
+                self.controller.set_actions(controller["actions"])
+                self.controller.set_buttons(controller["buttons"])
+                self.controller.debounce = controller["debounce"]
+                self.controller.chord_window = controller["chord_window"]
+                self.controller.long_press = controller["long_press"]
+
+        # e.g. `listening: {silence_duration_ms: 800, min_speech_duration_ms: 500, transcribe: true}`
+        if "listening" in changed:
+            listening = config.get("listening", {})
+            self.ears.silence_duration = listening.get("silence_duration_ms", 800) / 1000
+            self.ears.min_speech_duration = listening.get("min_speech_duration_ms", 500) / 1000
+            # Log what was said, as transcribed locally; it costs a Vosk decode of all the speech.
+            self.ears.transcribe = listening.get("transcribe", False)
+
+        # What needs a restart stays as it was, so it's still reported as changed until then.
+        self.config = keep_config_values(
+            config, self.config, [path for name in needs_restart for path in RESTART_SECTIONS[name]]
+        )
+        return changed
+
+    def check_config(self, config: dict) -> None:
+        """Raise ValueError if a reload of `config` would fail part way through."""
+        connections = config["connections"]
+        gpios = [
+            ("mouth", connections.get("mouth")),
+            *((f"{side} eye", gpio) for side, gpio in connections.get("eyes", {}).items()),
+            *((f"button {name}", gpio) for name, gpio in self.controller_settings(config)["buttons"].items()),
+        ]
+        users: dict[int, str] = {}
+        for user, gpio in gpios:
+            if gpio is not None and users.setdefault(gpio, user) != user:
+                raise ValueError(f"GPIO {gpio} is used by both the {users[gpio]} and the {user}")
+
+        for part in ("ears", "eyebrows"):
+            for channel in config["connections"].get(part, {}).values():
+                self.servo_channel(channel)
+        self.controller.check_actions(self.controller_settings(config)["actions"])
+
+    def servo_channel(self, channel: int | None) -> int | None:
+        """The PCA9685 channel for a part's servo channel, which counts from the start of the robot's range."""
+        if channel is None:
+            return None
+        if not 0 <= channel < len(self.servo_channels):
+            raise ValueError(f"Servo channel {channel} is outside the {len(self.servo_channels)} assigned to the robot")
+        return self.servo_channels[channel]
 
-        except KeyError as e:
-            logger.error(f"Key `{e}` not found in configuration file.")
-            exit(1)
+    @staticmethod
+    def controller_settings(config: dict) -> dict:
+        controller = config.get("controller", {})
+        return {
+            # Buttons are named after their `button_` keys, e.g. `button_x` is "x".
+            "buttons": {
+                name.removeprefix("button_"): gpio
+                for name, gpio in config["connections"].get("controller", {}).items()
+                if name.startswith("button_")
+            },
+            "actions": controller.get("actions"),
+            "debounce": controller.get("debounce_ms", 20) / 1000,
+            "chord_window": controller.get("chord_window_ms", 80) / 1000,
+            "long_press": controller.get("long_press_ms", 600) / 1000,
+        }
+
+    async def watch_config(self) -> None:
+        """Check the config file for changes, and queue a reload for the next pause between turns."""
+        modified_at = os.stat(self.config_file_path).st_mtime
+        while True:
+            await asyncio.sleep(self.config_poll_interval)
+            try:
+                mtime = os.stat(self.config_file_path).st_mtime
+                if mtime == modified_at:
+                    continue
+                modified_at = mtime
+                config = await asyncio.to_thread(self.load_config, self.config_file_path)
+                self.config_sections(config)
+                self.check_config(config)
+            except KeyError as e:
+                logger.error(f"Not reloading the configuration: key `{e}` not found.")
+                continue
+            except (OSError, ValueError, yaml.YAMLError) as e:
+                logger.error(f"Not reloading the configuration: {e}")
+                continue
+            self.pending_config = (config, modified_at)
+
+    async def reload_config(self) -> list[str]:
+        """Apply the config queued by `watch_config`. Returns the names of the changed sections."""
+        assert self.pending_config is not None
+        config, modified_at = self.pending_config
+        self.pending_config = None
+
+        try:
+            changed = self.apply_config(config)
+        except (KeyError, ValueError, GPIOZeroError) as e:
+            logger.error(f"Couldn't apply the new configuration: {e}")
+            return []
+
+        # The default wake phrases are made from the name.
+        if "local_commands" in changed or "wake_word" in changed or "name" in changed:
+            await self.create_phrase_spotters()
+        if "watchdog" in changed and self.watchdog:
+            self.watchdog.start()
+        # Only sent if the session config changed, e.g. with the name.
+        await self.realtime.update_session(self.openai_session())
+
+        effective_after = time.time() - modified_at
+        self.tracer.record("config_reload", effective_after, changed=",".join(changed))
+        logger.info(
+            f"Configuration reloaded {effective_after * 1000:.0f} ms after it was saved, "
+            f"changed: {', '.join(changed) or 'nothing'}"
+        )
+        return changed
 
     def instructions(self) -> str:
         return textwrap.dedent(
@@ -110,6 +454,8 @@ class Robot:
             - if asked to move your face or body, just do it without excessive verbal confirmation
             - by default wiggle eyebrows or blink eyes at least 4 times
             - if the conversation is funny, laugh and move your face in a way that shows you're laughing
+            - to move your face, use the gesture tools; only write a function for
+              `invoke_api_to_move_your_face` if they can't express the movement
 
             {brain_usage_guide}
             """
@@ -118,48 +464,35 @@ class Robot:
             brain_usage_guide=self.brain.usage_guide(),
         )
 
-    async def reply(self, openai_conn: AsyncRealtimeConnection, audio_message: bytes) -> None:
-        human_message = self.ears.get_speech_transcript()
-
-        if False and human_message:
-            logger.info(f"\nHuman: {human_message}")
-            cortex_instruction = textwrap.dedent(
-                f"""\
-                The user said: "{human_message}"
-
-                This is a shitty transcription, so do your best to figure out what they said.
-
-                If the message is a command, do your best to follow it.
-
-                Otherwise, make the facial expression that the message might evoke.
-                """
-            )
-            asyncio.create_task(
-                asyncio.to_thread(self.brain.reply, cortex_instruction)
-            )
-
-        OPENAI_AUDIO_SAMPLE_RATE = 24000
-
-        # Resample from 44100 Hz (input) to 24000 Hz (for OpenAI)
-        audio_message = self.resample_audio(audio_message, 44100, OPENAI_AUDIO_SAMPLE_RATE)
-
-        audio = PyAudio()
-        output_stream = audio.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=OPENAI_AUDIO_SAMPLE_RATE,
-            output=True
-        )
+    def session_inputs(self) -> dict:
+        """Everything the session config is built from. Its hash is the session cache key."""
+        return {
+            "name": self.name,
+            "stream_audio": self.stream_audio,
+            "gestures": list(self.gestures.gestures),
+            "api_surface": [(cls.__qualname__, members) for cls, members in API_SURFACE],
+        }
 
-        openai_session = {
-            "turn_detection": {"type": "server_vad"},
+    def openai_session(self) -> dict:
+        """Return the session config, rebuilding it only when the config or exposed API changed."""
+        session_key = hashlib.sha256(json.dumps(self.session_inputs(), sort_keys=True).encode("utf-8")).hexdigest()
+        if self.session_cache is None or self.session_cache[0] != session_key:
+            self.session_cache = (session_key, self.build_openai_session())
+        return self.session_cache[1]
+
+    def build_openai_session(self) -> dict:
+        return {
+            # When streaming, the turn is committed by `listen`, so the server must not
+            # also cut the input buffer into turns on its own.
+            "turn_detection": None if self.stream_audio else {"type": "server_vad"},
             "instructions": self.instructions(),
             "voice": "sage",
             "tools": [
+                *self.gestures.tools(),
                 {
                     "type": "function",
                     "name": "invoke_api_to_move_your_face",
-                    "description": "Invoke API functions to move your face.",
+                    "description": "Invoke API functions to move your face, if the gesture tools can't.",
                     "parameters": {
                         "type": "object",
                         "properties": {
@@ -171,66 +504,345 @@ class Robot:
             ],
         }
 
+    async def append_audio(self, openai_conn: AsyncRealtimeConnection, audio_data: bytes | memoryview) -> None:
+        """Resample captured audio to the realtime API's rate and append it to the input buffer."""
+        if self.resampler:
+            with self.tracer.span("resample"):
+                audio_data = self.resampler.process(audio_data)
+        with self.tracer.span("encode"):
+            audio = base64.b64encode(audio_data).decode("utf-8")
+        with self.tracer.span("upload", samples=len(audio_data) // 2):
+            await openai_conn.input_audio_buffer.append(audio=audio)
+
+    async def reply(
+        self,
+        openai_conn: AsyncRealtimeConnection,
+        audio_message: bytes | memoryview | None = None,
+        performed_gesture: str | None = None,
+    ) -> None:
+        """
+        Commit the user's turn and play back the response.
+
+        If `audio_message` is None, the utterance has already been streamed into the
+        input buffer by `listen`, so only the commit is left. `performed_gesture` is a
+        gesture already carried out for this turn by a local command.
+        """
         try:
-            await openai_conn.session.update(session=openai_session)  # type: ignore
-            await openai_conn.input_audio_buffer.append(
-                audio=base64.b64encode(audio_message).decode("utf-8")
-            )
-            await openai_conn.input_audio_buffer.commit()
-            await openai_conn.response.create()
-
+            if audio_message is not None:
+                await self.append_audio(openai_conn, audio_message)
+            with self.tracer.span("commit"):
+                await openai_conn.input_audio_buffer.commit()
+            if performed_gesture:
+                await openai_conn.conversation.item.create(item={
+                    "type": "message",
+                    "role": "system",
+                    "content": [{
+                        "type": "input_text",
+                        "text": f"You already did {performed_gesture} for this request, so don't do it again.",
+                    }],
+                })
+            if self.resampler:
+                self.resampler.reset()
+            with self.tracer.span("response_create"):
+                await openai_conn.response.create()
+            requested_at = time.perf_counter()
+
+            tool_calls = ToolCallAssembler()
+            first_audio = True
             async for event in openai_conn:
                 if event.type == "response.audio.delta":
-                    self.mouth.speak(output_stream, base64.b64decode(event.delta))
-                if event.type == "response.done" and event.response.output:
-                    for output in event.response.output:
-                        if output.type == "message":
-                            if output.content:
-                                logger.info(f"\nRobot: {output.content[0].transcript}")
-                                return
-                        elif output.type == "function_call":
-                            func_args = json.loads(output.arguments)  # type: ignore
-                            logger.debug(func_args)
-                            if "function_definition" in func_args:
-                                asyncio.create_task(
-                                    asyncio.to_thread(
-                                        self.brain.invoke_api,
-                                        function_definition=func_args["function_definition"]
-                                    )
-                                )
+                    if first_audio:
+                        self.tracer.record("first_audio_delta", time.perf_counter() - requested_at)
+                        first_audio = False
+                    with self.tracer.span("speak"):
+                        await self.mouth.speak(base64.b64decode(event.delta))
+                elif (tool_call := tool_calls.feed(event)) is not None:
+                    # Move with the speech rather than after it: the audio keeps streaming meanwhile.
+                    with self.tracer.span("gesture", tool=tool_call.name):
+                        self.call_tool(openai_conn, tool_call)
+                elif event.type == "response.done":
+                    for output in event.response.output or []:
+                        if output.type == "message" and output.content:
+                            logger.info(f"\nRobot: {output.content[0].transcript}")
+                    return
         finally:
-            output_stream.stop_stream()
-            output_stream.close()
-            audio.terminate()
-
-    async def listen(self) -> None:
-        client = openai.AsyncOpenAI()
-        async with Ears() as activated_ears:
-            self.ears = activated_ears
+            # Don't start listening again while the robot is still talking.
+            with self.tracer.span("playback_drain"):
+                await self.mouth.finish_speaking()
 
-            async with client.beta.realtime.connect(model="gpt-4o-mini-realtime-preview") as openai_conn:
-                while True:
-                    await self.ears.listen()
+    def call_tool(self, openai_conn: AsyncRealtimeConnection, tool_call: ToolCall) -> None:
+        """Start a tool call's gestures, then return its result to the conversation without a new response."""
+        try:
+            func_args = json.loads(tool_call.arguments)
+        except json.JSONDecodeError:
+            func_args = None
+        logger.debug(f"{tool_call.name}: {func_args}")
+
+        if not isinstance(func_args, dict):
+            output = "error: arguments must be a JSON object"
+        elif tool_call.name in self.gestures:
+            try:
+                handles = self.gestures.invoke(tool_call.name, func_args)
+                output = f"ok: {', '.join(handle.gesture.name for handle in handles)}"
+            except GestureArgumentError as e:
+                logger.warning(f"Rejected {tool_call.name} call: {e}")
+                output = f"error: {e}"
+        elif "function_definition" in func_args:
+            # The free-form fallback runs in a thread, so its result is sent when it finishes.
+            async def invoke_api() -> None:
+                try:
+                    output = await asyncio.to_thread(
+                        self.brain.invoke_api,
+                        function_definition=func_args["function_definition"],
+                    )
+                except Exception as e:
+                    logger.warning(f"{tool_call.name} failed: {e}")
+                    output = f"error: {e}"
+                await self.send_tool_output(openai_conn, tool_call, output)
+
+            self.start_tool_task(invoke_api())
+            return
+        else:
+            output = f"error: unknown tool {tool_call.name}"
+
+        self.start_tool_task(self.send_tool_output(openai_conn, tool_call, output))
+
+    def start_tool_task(self, coro: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.create_task(coro)
+        self.tool_tasks.add(task)
+        task.add_done_callback(self.tool_tasks.discard)
+
+    async def send_tool_output(self, openai_conn: AsyncRealtimeConnection, tool_call: ToolCall, output: str) -> None:
+        try:
+            await openai_conn.conversation.item.create(
+                item={"type": "function_call_output", "call_id": tool_call.call_id, "output": output}
+            )
+        except ConnectionClosed:
+            logger.debug(f"Connection closed before the output of {tool_call.name} was sent")
 
-                    if self.ears.heard_end_of_speech():
-                        logger.info("\nRobot: <I heard you>")
-                        await self.reply(openai_conn, self.ears.get_speech_audio())
+    async def listen(self) -> None:
+        async with self.ears:
+            startup_times = ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in get_hardware().startup_times.items())
+            logger.debug(f"Listening. Startup times: {startup_times}")
+
+            if self.ears.sample_rate != OPENAI_AUDIO_SAMPLE_RATE:
+                self.resampler = StreamingResampler(self.ears.sample_rate, OPENAI_AUDIO_SAMPLE_RATE)
+            else:
+                self.resampler = None
+
+            await self.create_phrase_spotters()
+
+            self.add_collectors()
+            turn = self.new_turn()
+
+            while True:
+                with self.tracer.span("listen"):
+                    audio_chunk = await self.ears.listen()
+                sd = self.ears.speech_detection_state
+                # Local processing goes on while the connection is down; audio is only uploaded once it's back.
+                openai_conn = self.realtime.ready_connection()
+
+                if sd.speech_detected and not turn.started:
+                    self.tracer.start_turn()
+                    turn.started = True
+
+                try:
+                    if self.pending_config and not sd.speech_detected and not turn.started:
+                        await self.reload_config()
+
+                    if self.command_recognizer and sd.speech_detected and turn.local_command is None:
+                        await self.recognize_command(openai_conn, turn, audio_chunk)
+
+                    if self.wake_word_detector and sd.speech_detected and turn.woken_at is None:
+                        await self.detect_wake_word(turn, audio_chunk)
+
+                    if openai_conn and self.stream_audio and sd.speech_detected and self.should_reply(turn):
+                        # The first upload of a turn also carries the pre-roll captured before the trigger,
+                        # or before the wake word.
+                        await self.append_audio(
+                            openai_conn,
+                            audio_chunk if turn.streamed_audio else self.ears.get_speech_audio(turn.woken_at),
+                        )
+                        turn.streamed_audio = True
+
+                    with self.tracer.span("end_of_speech_check"):
+                        heard_end_of_speech = self.ears.heard_end_of_speech()
+
+                    if heard_end_of_speech:
+                        if sd.silence_start_time is not None:
+                            self.tracer.record("silence_window", time.time() - sd.silence_start_time)
+                        if self.handled_locally(turn):
+                            outcome = "local_command"
+                        elif not self.should_reply(turn):
+                            outcome = "no_wake_word"
+                        else:
+                            if self.ears.transcribe:
+                                logger.info(f"\nHuman: {await self.ears.get_speech_transcript()}")
+                            logger.info("\nRobot: <I heard you>")
+                            openai_conn = openai_conn or await self.realtime.get_connection()
+                            await self.reply(
+                                openai_conn,
+                                None if turn.streamed_audio else self.ears.get_speech_audio(turn.woken_at),
+                                performed_gesture=turn.local_command.gesture if turn.local_command else None,
+                            )
+                            # What was captured meanwhile is mostly the robot's own voice.
+                            self.ears.skip_to_live()
+                            outcome = "replied"
                         self.ears.speech_detection_state.reset()
-                        return
+                        self.tracer.end_turn(outcome=outcome)
+                        turn = self.new_turn()
+                    elif turn.started and not sd.speech_detected:
+                        # The speech was too brief and has been discarded, so drop what was uploaded.
+                        await self.clear_uploaded_audio(openai_conn, turn)
+                        self.tracer.end_turn(outcome="discarded")
+                        turn = self.new_turn()
+                except ConnectionClosed as e:
+                    logger.warning(f"Realtime connection lost ({e}), reconnecting")
+                    if openai_conn:
+                        self.realtime.reconnect_in_background(stale=openai_conn)
+
+                    # The new connection has an empty input buffer, so the utterance in
+                    # progress is uploaded again from its start on the next chunk.
+                    if self.resampler:
+                        self.resampler.reset()
+                    turn.streamed_audio = False
+
+    async def create_phrase_spotters(self) -> None:
+        """Create the local command recognizer and the wake word detector, if the config asks for them."""
+        self.command_recognizer = None
+        self.wake_word_detector = None
+        if self.local_commands is None and self.wake_word is None:
+            return
+
+        model = await asyncio.to_thread(get_vosk_model)
+        if self.local_commands is not None:
+            self.command_recognizer = CommandRecognizer(
+                model,
+                self.ears.sample_rate,
+                phrases={p: g for p, g in COMMAND_PHRASES.items() if g in self.gestures.gestures},
+                min_confidence=self.local_commands.get("min_confidence", 0.8),
+            )
+        if self.wake_word is not None:
+            self.wake_word_detector = WakeWordDetector(
+                model,
+                self.ears.sample_rate,
+                self.name,
+                phrases=self.wake_word.get("phrases"),
+                min_confidence=self.wake_word.get("min_confidence", 0.7),
+            )
+
+    def new_turn(self) -> "TurnState":
+        if self.command_recognizer:
+            self.command_recognizer.reset()
+        if self.wake_word_detector:
+            self.wake_word_detector.reset()
+        return TurnState()
+
+    def handled_locally(self, turn: "TurnState") -> bool:
+        """Whether the turn was a local command that doesn't need a spoken reply."""
+        return turn.local_command is not None and not (self.local_commands or {}).get("reply", False)
+
+    def should_reply(self, turn: "TurnState") -> bool:
+        """Whether the turn goes to the realtime API: it wasn't handled locally and, if required, woke the robot."""
+        return not self.handled_locally(turn) and (self.wake_word_detector is None or turn.woken_at is not None)
+
+    async def clear_uploaded_audio(self, openai_conn: AsyncRealtimeConnection | None, turn: "TurnState") -> None:
+        if turn.streamed_audio:
+            # Without a connection, the input buffer went with the old one.
+            if openai_conn:
+                await openai_conn.input_audio_buffer.clear()
+            if self.resampler:
+                self.resampler.reset()
+            turn.streamed_audio = False
+
+    async def recognize_command(
+        self,
+        openai_conn: AsyncRealtimeConnection | None,
+        turn: "TurnState",
+        audio_chunk: memoryview,
+    ) -> None:
+        """Run the command recognizer over the chunk, and carry out the command if it completed one."""
+        assert self.command_recognizer is not None
+
+        # Like the upload, the recognizer gets the pre-roll with the first chunk of the turn.
+        audio_data = audio_chunk if turn.command_audio_fed else self.ears.get_speech_audio()
+        turn.command_audio_fed = True
+        with self.tracer.span("local_command_recognition"):
+            command = await asyncio.to_thread(self.command_recognizer.accept, bytes(audio_data))
+        if command is None:
+            return
+
+        turn.local_command = command
+        logger.info(f"\nHuman: {command.phrase} (recognized locally)")
+        with self.tracer.span("gesture", tool=command.gesture, local=True):
+            self.gestures.invoke(command.gesture, {})
+
+        if self.handled_locally(turn):
+            # Nothing more of this utterance will be sent, so drop what already was.
+            await self.clear_uploaded_audio(openai_conn, turn)
+
+    async def detect_wake_word(self, turn: "TurnState", audio_chunk: memoryview) -> None:
+        """Run the wake word detector over the chunk, and start the upload if it heard the wake word."""
+        assert self.wake_word_detector is not None and self.wake_word is not None
+
+        audio_data = audio_chunk if turn.wake_word_audio_fed else self.ears.get_speech_audio()
+        turn.wake_word_audio_fed = True
+        with self.tracer.span("wake_word_detection"):
+            match = await asyncio.to_thread(self.wake_word_detector.accept, bytes(audio_data))
+        if match is None:
+            return
+
+        # The wake word is only matched once it has ended, so the pre-roll keeps the start of
+        # whatever follows it, which may already have been said.
+        pre_roll = int(self.wake_word.get("pre_roll_ms", 500) / 1000 * self.ears.sample_rate)
+        utterance_start = self.ears.speech_detection_state.utterance_start_index or 0
+        turn.woken_at = max(utterance_start, self.ears.read_index - pre_roll)
+        self.wake_words_heard += 1
+        logger.info(f"\nHuman: {match.phrase} (wake word)")
+
+    def add_collectors(self) -> None:
+        """Expose the counters the body parts already keep through the tracer."""
+        servo_bus = get_servo_bus(self.servokit)
+        self.tracer.add_collector("dropped_samples_total", lambda: self.ears.dropped_samples)
+        self.tracer.add_collector("wake_words_total", lambda: self.wake_words_heard)
+        self.tracer.add_collector(
+            "playback_underruns_total", lambda: self.mouth.player.underruns if self.mouth.player else 0
+        )
+        self.tracer.add_collector(
+            "playback_overruns_total", lambda: self.mouth.player.overruns if self.mouth.player else 0
+        )
+        self.tracer.add_collector("i2c_writes_total", lambda: servo_bus.stats()["bursts"])
+        self.tracer.add_collector("servo_writes_dropped_total", lambda: servo_bus.stats()["dropped_writes"])
 
     async def run(self) -> None:
         logger.info("Starting robot...")
-        await asyncio.gather(
-            self.listen(),
-            asyncio.Event().wait()
+
+        # Connect before anyone speaks, so no turn pays for the handshake and session setup.
+        self.realtime = RealtimeSession(
+            client=self.openai_client
+            or openai.AsyncOpenAI(api_key=self.openai_api_key, websocket_base_url=self.websocket_base_url),
         )
+        await self.mouth.start()
+        if self.watchdog:
+            self.watchdog.start()
 
-    @staticmethod
-    def resample_audio(audio_data: bytes, orig_rate: int, target_rate: int) -> bytes:
-        audio_np = np.frombuffer(audio_data, dtype=np.int16)
-        new_length = int(len(audio_np) * target_rate / orig_rate)
-        resampled_audio = resample(audio_np, new_length)
-        return resampled_audio.astype(np.int16).tobytes()
+        try:
+            # The microphone and speech model start up while the connection is being made;
+            # audio captured in the meantime waits in the ring buffer.
+            await asyncio.gather(
+                self.connect(),
+                self.listen(),
+                self.controller.run(),
+                self.watch_config(),
+            )
+        finally:
+            if self.watchdog:
+                self.watchdog.stop()
+                logger.info(self.watchdog.report())
+
+    async def connect(self) -> None:
+        await self.realtime.start()
+        await self.realtime.update_session(self.openai_session())
 
 
 if __name__ == "__main__":
@@ -243,4 +855,8 @@ if __name__ == "__main__":
     logger.info("Initializing robot...")
     robot = Robot()
 
-    asyncio.run(robot.run())
+    try:
+        asyncio.run(robot.run())
+    finally:
+        get_tracer().close()
+        get_hardware().close()
@@ -0,0 +1,180 @@
+import struct
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING
+
+from pi_robot.motion import MotionEngine
+from pi_robot.motion import get_motion_engine
+
+if TYPE_CHECKING:
+    from adafruit_servokit import ServoKit
+
+
+class BusServo:
+    """A servo on a `ServoBus`. Setting `angle` only records it; the bus writes it on the next flush."""
+
+    def __init__(self, bus: "ServoBus", channel: int) -> None:
+        self.bus = bus
+        self.channel = channel
+        self._angle: float | None = None
+
+    @property
+    def angle(self) -> float | None:
+        return self._angle
+
+    @angle.setter
+    def angle(self, angle: float | None) -> None:
+        self._angle = angle
+        self.bus.set_angle(self.channel, angle)
+
+
+class ServoBus:
+    """
+    Coalescing output layer for the servos on one PCA9685.
+
+    Angles are quantized to the chip's 12-bit duty resolution, and a write that
+    wouldn't change a channel's registers is dropped. `flush` then sends every
+    changed channel in one auto-increment register burst, at most `max_bus_rate`
+    times per second. The motion engine flushes at the end of each tick.
+    """
+
+    LED0_ON_L = 0x06
+    FULL_OFF = 0x1000
+
+    requested_writes: int
+    dropped_writes: int
+    bursts: int
+    bytes_written: int
+    flush_seconds: float
+    max_flush_seconds: float
+
+    def __init__(
+        self,
+        servokit: "ServoKit",
+        max_bus_rate: float = 100.0,
+        min_pulse: int = 750,
+        max_pulse: int = 2250,
+        actuation_range: int = 180,
+        motion_engine: MotionEngine | None = None,
+    ) -> None:
+        # ServoKit doesn't expose its PCA9685, but we need it for the raw register burst.
+        self.pca = servokit._pca
+        self.period_us = 1_000_000 / self.pca.frequency
+        self.min_interval = 1.0 / max_bus_rate
+        self.min_pulse = min_pulse
+        self.max_pulse = max_pulse
+        self.actuation_range = actuation_range
+
+        self.pending: dict[int, int] = {}
+        self.on_chip: dict[int, int] = {}
+        self.next_flush = 0.0
+        self.lock = threading.Lock()
+
+        self.requested_writes = 0
+        self.dropped_writes = 0
+        self.bursts = 0
+        self.bytes_written = 0
+        self.flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+        self.motion_engine = motion_engine or get_motion_engine()
+        self.motion_engine.add_flush_hook(self.flush)
+
+    def servo(self, channel: int) -> BusServo:
+        return BusServo(self, channel)
+
+    def quantize(self, angle: float | None) -> int:
+        """Return the 12-bit LEDn_OFF count for `angle`, or FULL_OFF to disable the servo."""
+        if angle is None:
+            return self.FULL_OFF
+        angle = max(0.0, min(float(self.actuation_range), angle))
+        pulse_us = self.min_pulse + (self.max_pulse - self.min_pulse) * angle / self.actuation_range
+        return max(1, min(4095, round(pulse_us / self.period_us * 4096)))
+
+    def set_angle(self, channel: int, angle: float | None) -> None:
+        count = self.quantize(angle)
+        with self.lock:
+            self.requested_writes += 1
+            if self.pending.get(channel, self.on_chip.get(channel)) == count:
+                self.dropped_writes += 1
+                return
+            if self.on_chip.get(channel) == count:
+                del self.pending[channel]
+                return
+            first_change = not self.pending
+            self.pending[channel] = count
+
+        if first_change:
+            # Writes made outside a gesture still need a tick to flush them.
+            self.motion_engine.request_flush()
+
+    def flush(self) -> bool:
+        """Write pending channels in one burst. Returns True if writes are still waiting on the rate limit."""
+        with self.lock:
+            if not self.pending:
+                return False
+
+            now = time.monotonic()
+            # Slots are spaced from the previous slot rather than from `now`, with half a
+            # slot of slack, so tick jitter doesn't halve the rate when it matches the tick rate.
+            if now < self.next_flush - self.min_interval / 2:
+                return True
+            self.next_flush = max(self.next_flush, now - self.min_interval) + self.min_interval
+
+            changes = self.pending
+            self.pending = {}
+
+            # One burst covers the lowest to the highest changed channel; channels in
+            # between are rewritten with what the chip already holds. A gap of
+            # channels we have never written splits the burst, since their contents
+            # are unknown.
+            channels = sorted(changes)
+            runs: list[list[int]] = [[channels[0]]]
+            for channel in channels[1:]:
+                gap = range(runs[-1][-1] + 1, channel)
+                if all(c in self.on_chip for c in gap):
+                    runs[-1].extend(gap)
+                    runs[-1].append(channel)
+                else:
+                    runs.append([channel])
+
+            start = time.perf_counter()
+            with self.pca.i2c_device as i2c:
+                for run in runs:
+                    buffer = bytearray([self.LED0_ON_L + 4 * run[0]])
+                    for channel in run:
+                        # LEDn_ON is always 0, so the pulse ends at count (or never starts for FULL_OFF).
+                        buffer += struct.pack("<HH", 0, changes.get(channel, self.on_chip.get(channel, 0)))
+                    i2c.write(buffer)
+                    self.bursts += 1
+                    self.bytes_written += len(buffer)
+            elapsed = time.perf_counter() - start
+
+            self.on_chip.update(changes)
+            self.flush_seconds += elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            return False
+
+    def stats(self) -> dict[str, float]:
+        with self.lock:
+            return {
+                "requested_writes": self.requested_writes,
+                "dropped_writes": self.dropped_writes,
+                "bursts": self.bursts,
+                "bytes_written": self.bytes_written,
+                "mean_flush_ms": self.flush_seconds / self.bursts * 1000 if self.bursts else 0.0,
+                "max_flush_ms": self.max_flush_seconds * 1000,
+            }
+
+
+_servo_buses: "weakref.WeakKeyDictionary[ServoKit, ServoBus]" = weakref.WeakKeyDictionary()
+_servo_buses_lock = threading.Lock()
+
+
+def get_servo_bus(servokit: "ServoKit", motion_engine: MotionEngine | None = None) -> ServoBus:
+    """Return the one ServoBus for `servokit`, so every body part on a chip shares its bursts."""
+    with _servo_buses_lock:
+        if servokit not in _servo_buses:
+            _servo_buses[servokit] = ServoBus(servokit, motion_engine=motion_engine)
+        return _servo_buses[servokit]
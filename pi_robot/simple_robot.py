@@ -1,34 +1,29 @@
-from gpiozero import Button
+import asyncio
 
+from pi_robot.controller import Controller
 from pi_robot.ears import Ears
 from pi_robot.eyebrows import Eyebrows
 from pi_robot.eyes import Eyes
+from pi_robot.gestures import GestureRegistry
+from pi_robot.hardware import get_hardware
 from pi_robot.mouth import Mouth
 
 
-def run():
-    button_x = Button(5)
-    button_y = Button(6)
-    button_a = Button(13)
-    button_b = Button(19)
-
+async def run() -> None:
+    """Drive the face from the buttons alone, without listening or talking."""
+    servokit = get_hardware().servokit
     mouth = Mouth(22)
     eyes = Eyes(17, 27)
-    eyebrows = Eyebrows(0, 1)
-    ears = Ears(2, 3)
-
-    while True:
-        if button_x.is_pressed:
-            mouth.light_up()
-
-        if button_y.is_pressed:
-            ears.wiggle()
-
-        if button_a.is_pressed:
-            eyes.blink()
+    eyebrows = Eyebrows(0, 1, servokit=servokit)
+    ears = Ears(2, 3, servokit=servokit)
 
-        if button_b.is_pressed:
-            eyebrows.wiggle()
+    controller = Controller(
+        gestures=GestureRegistry(ears=ears, eyes=eyes, eyebrows=eyebrows),
+        mouth=mouth,
+        buttons={"x": 5, "y": 6, "a": 13, "b": 19},
+    )
+    await controller.run()
 
 
-run()
+if __name__ == "__main__":
+    asyncio.run(run())
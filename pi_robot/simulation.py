@@ -0,0 +1,415 @@
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+import wave
+from dataclasses import dataclass
+from typing import Any
+from typing import Callable
+from typing import IO
+from typing import TYPE_CHECKING
+
+from gpiozero.pins.mock import MockFactory
+from gpiozero.pins.mock import MockPWMPin
+
+from pi_robot.audio_devices import AudioDeviceProbe
+from pi_robot.hardware import DEFAULT_SERVO_ADDRESS
+from pi_robot.logging import logger
+
+if TYPE_CHECKING:
+    import pyaudio
+
+
+SIMULATED_MICROPHONE_INDEX = 0
+SIMULATED_SPEAKER_INDEX = 1
+SIMULATED_AUDIO_DEVICE_CACHE_PATH = os.path.join(tempfile.gettempdir(), "pi_robot_simulated_audio_devices.json")
+
+
+class SimulatedPortAudio:
+    """The `pyaudio` constants the robot uses, so the simulation doesn't need pyaudio installed."""
+
+    paInt16 = 8
+    paContinue = 0
+    paComplete = 1
+
+
+@dataclass
+class StateChange:
+    timestamp: float
+    device: str
+    value: float | None
+
+
+class StateRecorder:
+    """
+    Timestamped state changes of every simulated device, in the order they happened.
+
+    Timestamps are seconds since the recorder was created. If `log_path` is
+    given, each change is also appended to it as a JSON line as it happens, so
+    the log survives the process being interrupted.
+    """
+
+    changes: list[StateChange]
+
+    def __init__(self, log_path: str | None = None) -> None:
+        self.changes = []
+        self.start = time.monotonic()
+        self.lock = threading.Lock()
+        self.log_file: IO[str] | None = open(log_path, "w", buffering=1) if log_path else None
+
+    def record(self, device: str, value: float | None) -> None:
+        change = StateChange(time.monotonic() - self.start, device, value)
+        with self.lock:
+            self.changes.append(change)
+            if self.log_file:
+                entry = {"t": round(change.timestamp, 6), "device": device, "value": value}
+                self.log_file.write(json.dumps(entry) + "\n")
+
+    def history(self, device: str) -> list[StateChange]:
+        with self.lock:
+            return [change for change in self.changes if change.device == device]
+
+    def close(self) -> None:
+        with self.lock:
+            if self.log_file:
+                self.log_file.close()
+                self.log_file = None
+
+
+class SimulatedPin(MockPWMPin):
+    """A gpiozero mock pin that supports PWM and reports every state change to the recorder."""
+
+    def _change_state(self, value: bool | float) -> bool:
+        changed = super()._change_state(value)
+        if changed:
+            self.factory.recorder.record(self.info.name, float(value))
+        return changed
+
+
+class SimulatedPinFactory(MockFactory):
+    """Pin factory for `PWMLED`s and `Button`s with no GPIO behind them."""
+
+    def __init__(self, recorder: StateRecorder) -> None:
+        super().__init__(pin_class=SimulatedPin)
+        self.recorder = recorder
+
+    def press(self, gpio: int) -> None:
+        """Press the (pulled-up) button on `gpio`, as if its pin were shorted to ground."""
+        self.pin(gpio).drive_low()
+
+    def release(self, gpio: int) -> None:
+        self.pin(gpio).drive_high()
+
+
+class SimulatedI2CDevice:
+    """Decodes the PCA9685 LEDn register writes made by `ServoBus` into per-channel pulse widths."""
+
+    LED0_ON_L = 0x06
+    FULL_OFF = 0x1000
+
+    def __init__(self, recorder: StateRecorder, frequency: float, prefix: str = "servo") -> None:
+        self.recorder = recorder
+        self.period_us = 1_000_000 / frequency
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.transactions = 0
+        self.bytes_written = 0
+
+    def __enter__(self) -> "SimulatedI2CDevice":
+        self.lock.acquire()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.lock.release()
+
+    def write(self, buffer: bytes | bytearray) -> None:
+        self.transactions += 1
+        self.bytes_written += len(buffer)
+
+        register = buffer[0]
+        if register < self.LED0_ON_L:
+            return
+        first_channel = (register - self.LED0_ON_L) // 4
+        for offset in range(0, len(buffer) - 1 - (len(buffer) - 1) % 4, 4):
+            _, off = struct.unpack_from("<HH", buffer, 1 + offset)
+            pulse_us = None if off & self.FULL_OFF else round(off * self.period_us / 4096, 1)
+            self.recorder.record(f"{self.prefix}{first_channel + offset // 4}", pulse_us)
+
+
+class SimulatedPCA9685:
+    def __init__(self, recorder: StateRecorder, frequency: float = 50.0, prefix: str = "servo") -> None:
+        self.frequency = frequency
+        self.i2c_device = SimulatedI2CDevice(recorder, frequency, prefix)
+
+
+class SimulatedServoKit:
+    """
+    Stands in for `ServoKit`. Only the PCA9685 is simulated, since all servos go through `ServoBus`.
+
+    Servos are recorded as e.g. "servo3", or "servo0x41:3" on a chip at another address.
+    """
+
+    def __init__(self, recorder: StateRecorder, address: int = DEFAULT_SERVO_ADDRESS) -> None:
+        prefix = "servo" if address == DEFAULT_SERVO_ADDRESS else f"servo{address:#x}:"
+        self._pca = SimulatedPCA9685(recorder, prefix=prefix)
+
+
+class SimulatedInputStream:
+    """
+    Plays a 16-bit mono WAV file into PyAudio's input callback in real time,
+    then silence once the file ends. With no file, it captures silence.
+
+    The "microphone" device is recorded as 1.0 when capture starts and 0.0
+    when the file runs out, so the file's timeline can be lined up with the
+    other state changes.
+    """
+
+    def __init__(
+        self,
+        rate: int,
+        frames_per_buffer: int,
+        stream_callback: Callable[..., tuple] | None,
+        input_wav_path: str | None,
+        recorder: StateRecorder | None = None,
+    ) -> None:
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.stream_callback = stream_callback
+        self.recorder = recorder
+        self.wav = wave.open(input_wav_path, "rb") if input_wav_path else None
+        self.running = stream_callback is not None
+        self.thread: threading.Thread | None = None
+        if self.running:
+            self.thread = threading.Thread(target=self.run, name="simulated-microphone", daemon=True)
+            self.thread.start()
+
+    def read(self, num_frames: int, exception_on_overflow: bool = True) -> bytes:
+        audio_data = self.wav.readframes(num_frames) if self.wav else b""
+        return audio_data + bytes(num_frames * 2 - len(audio_data))
+
+    def run(self) -> None:
+        assert self.stream_callback is not None
+        deadline = time.monotonic()
+        playing = self.wav is not None
+        if self.recorder:
+            self.recorder.record("microphone", 1.0)
+        while self.running:
+            deadline += self.frames_per_buffer / self.rate
+            time.sleep(max(0.0, deadline - time.monotonic()))
+            in_data = self.read(self.frames_per_buffer)
+            if playing and self.wav and self.wav.tell() >= self.wav.getnframes():
+                playing = False
+                if self.recorder:
+                    self.recorder.record("microphone", 0.0)
+            _, flag = self.stream_callback(in_data, self.frames_per_buffer, {}, 0)
+            if flag != SimulatedPortAudio.paContinue:
+                self.running = False
+
+    def is_active(self) -> bool:
+        return self.running
+
+    def stop_stream(self) -> None:
+        self.running = False
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def close(self) -> None:
+        self.stop_stream()
+        if self.wav:
+            self.wav.close()
+            self.wav = None
+
+
+class SimulatedOutputStream:
+    """
+    Accepts blocking writes at the pace a real device would play them and
+    appends them to the speaker's WAV sink, if there is one.
+
+    The "speaker" device is recorded as 1.0 whenever audio is written after
+    the device had run dry, i.e. at the start of each stretch of playback.
+    """
+
+    def __init__(
+        self,
+        rate: int,
+        frames_per_buffer: int,
+        sink: wave.Wave_write | None,
+        recorder: StateRecorder | None = None,
+    ) -> None:
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.sink = sink
+        self.recorder = recorder
+        self.clock = time.monotonic()
+
+    def get_output_latency(self) -> float:
+        return 2 * self.frames_per_buffer / self.rate
+
+    def write(self, frames: bytes, num_frames: int | None = None, exception_on_underflow: bool = False) -> None:
+        if self.sink:
+            self.sink.writeframes(frames)
+
+        # A device lets writes get ahead of playback only by what its buffers hold.
+        now = time.monotonic()
+        if self.recorder and self.clock <= now:
+            self.recorder.record("speaker", 1.0)
+        self.clock = max(self.clock, now) + len(frames) / 2 / self.rate
+        time.sleep(max(0.0, self.clock - self.get_output_latency() - now))
+
+    def stop_stream(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class SimulatedPyAudio:
+    """
+    Stands in for `pyaudio.PyAudio` with one microphone and one speaker.
+
+    The microphone only supports the input WAV file's rate, so the device probe
+    picks it and `Robot` resamples it like a real USB microphone. Everything
+    played on the speaker goes to one output WAV file, whose rate is that of the
+    first output stream opened.
+    """
+
+    def __init__(
+        self,
+        input_wav_path: str | None = None,
+        output_wav_path: str | None = None,
+        recorder: StateRecorder | None = None,
+    ) -> None:
+        self.input_wav_path = input_wav_path
+        self.output_wav_path = output_wav_path
+        self.recorder = recorder
+        self.input_rate: int | None = None
+        if input_wav_path:
+            with wave.open(input_wav_path, "rb") as wav:
+                if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+                    raise ValueError(f"{input_wav_path} must be 16-bit mono")
+                self.input_rate = wav.getframerate()
+        self.sink: wave.Wave_write | None = None
+
+    def get_device_count(self) -> int:
+        return 2
+
+    def get_device_info_by_index(self, index: int) -> dict[str, Any]:
+        if index == SIMULATED_MICROPHONE_INDEX:
+            rate = self.input_rate or 24000
+            return {
+                "index": index,
+                "name": f"simulated microphone ({rate} Hz)",
+                "hostApi": 0,
+                "maxInputChannels": 1,
+                "maxOutputChannels": 0,
+                "defaultSampleRate": float(rate),
+            }
+        if index == SIMULATED_SPEAKER_INDEX:
+            return {
+                "index": index,
+                "name": "simulated speaker",
+                "hostApi": 0,
+                "maxInputChannels": 0,
+                "maxOutputChannels": 1,
+                "defaultSampleRate": 24000.0,
+            }
+        raise IOError(f"Invalid device index {index}")
+
+    def get_default_input_device_info(self) -> dict[str, Any]:
+        return self.get_device_info_by_index(SIMULATED_MICROPHONE_INDEX)
+
+    def get_default_output_device_info(self) -> dict[str, Any]:
+        return self.get_device_info_by_index(SIMULATED_SPEAKER_INDEX)
+
+    def is_format_supported(
+        self,
+        rate: int,
+        input_device: int | None = None,
+        input_channels: int | None = None,
+        input_format: int | None = None,
+        output_device: int | None = None,
+        output_channels: int | None = None,
+        output_format: int | None = None,
+    ) -> bool:
+        if input_device is not None and self.input_rate not in (None, rate):
+            raise ValueError("Invalid sample rate")
+        if output_device is not None and self.sink and self.sink.getframerate() != rate:
+            raise ValueError("Invalid sample rate")
+        return True
+
+    def open(
+        self,
+        rate: int,
+        channels: int = 1,
+        format: int | None = None,
+        input: bool = False,
+        output: bool = False,
+        input_device_index: int | None = None,
+        output_device_index: int | None = None,
+        frames_per_buffer: int = 1024,
+        stream_callback: Callable[..., tuple] | None = None,
+    ) -> SimulatedInputStream | SimulatedOutputStream:
+        if channels != 1:
+            raise ValueError("Invalid number of channels")
+
+        if input:
+            if self.input_rate not in (None, rate):
+                raise ValueError("Invalid sample rate")
+            return SimulatedInputStream(rate, frames_per_buffer, stream_callback, self.input_wav_path, self.recorder)
+
+        if self.sink is None and self.output_wav_path:
+            self.sink = wave.open(self.output_wav_path, "wb")
+            self.sink.setnchannels(1)
+            self.sink.setsampwidth(2)
+            self.sink.setframerate(rate)
+        if self.sink and self.sink.getframerate() != rate:
+            raise ValueError("Invalid sample rate")
+        return SimulatedOutputStream(rate, frames_per_buffer, self.sink, self.recorder)
+
+    def terminate(self) -> None:
+        if self.sink:
+            self.sink.close()
+            self.sink = None
+
+
+class SimulatedHardware:
+    """
+    Everything `HardwareRegistry` creates, simulated: PWM LEDs and buttons on a
+    gpiozero mock pin factory, servos on a fake PCA9685, and audio I/O from and
+    to WAV files. LED, button, servo, microphone and speaker changes all go to
+    one `StateRecorder`.
+    """
+
+    recorder: StateRecorder
+    input_wav_path: str | None
+    output_wav_path: str | None
+    portaudio = SimulatedPortAudio
+
+    def __init__(
+        self,
+        input_wav_path: str | None = None,
+        output_wav_path: str | None = None,
+        state_log_path: str | None = None,
+    ) -> None:
+        self.recorder = StateRecorder(state_log_path)
+        self.input_wav_path = input_wav_path
+        self.output_wav_path = output_wav_path
+
+    def create_servokit(self, address: int = DEFAULT_SERVO_ADDRESS) -> SimulatedServoKit:
+        return SimulatedServoKit(self.recorder, address)
+
+    def create_pyaudio(self) -> SimulatedPyAudio:
+        return SimulatedPyAudio(self.input_wav_path, self.output_wav_path, self.recorder)
+
+    def create_pin_factory(self) -> SimulatedPinFactory:
+        return SimulatedPinFactory(self.recorder)
+
+    def create_audio_device_probe(self, audio: "pyaudio.PyAudio") -> AudioDeviceProbe:
+        # Kept out of the real cache: the simulated devices change with the input file.
+        return AudioDeviceProbe(audio, SIMULATED_AUDIO_DEVICE_CACHE_PATH)
+
+    def close(self) -> None:
+        self.recorder.close()
+        logger.debug(f"Simulation recorded {len(self.recorder.changes)} state changes")
@@ -0,0 +1,215 @@
+import contextlib
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Callable
+from typing import ContextManager
+from typing import IO
+from typing import Iterator
+
+from pi_robot.logging import logger
+
+
+# Upper bounds, in seconds, of the span duration histogram buckets.
+SPAN_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+NULL_SPAN: ContextManager[None] = contextlib.nullcontext()
+
+
+class SpanStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(SPAN_BUCKETS)
+
+    def add(self, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        for i, bound in enumerate(SPAN_BUCKETS):
+            if duration <= bound:
+                self.buckets[i] += 1
+
+
+class Tracer:
+    """
+    Timed spans and counters for each conversational turn.
+
+    Every turn gets a trace ID, and each span (e.g. resampling, an upload, waiting
+    for the first response audio) is tagged with the turn in progress. Spans can
+    be written as JSON lines to `trace_path`, and are aggregated into histograms
+    served with the collectors' counters in Prometheus text format on
+    `metrics_port`.
+
+    Until `configure` enables it, `span` returns a shared no-op context manager
+    and `record` returns immediately, so instrumented code costs next to nothing.
+    """
+
+    enabled: bool
+    trace_id: str | None
+    turn_start: float | None
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.trace_id = None
+        self.turn_start = None
+        self.turns = 0
+        self.lock = threading.Lock()
+        self.span_stats: dict[str, SpanStats] = {}
+        self.collectors: dict[str, Callable[[], float]] = {}
+        self.trace_file: IO[str] | None = None
+        self.metrics_server: ThreadingHTTPServer | None = None
+
+    def configure(self, trace_path: str | None = None, metrics_port: int | None = None) -> None:
+        """Enable tracing if either export is given, replacing any previous configuration."""
+        self.close()
+        if trace_path:
+            self.trace_file = open(trace_path, "a", buffering=1)
+        if metrics_port is not None:
+            self.metrics_server = serve_metrics(self, metrics_port)
+        self.enabled = bool(trace_path or metrics_port is not None)
+
+    def add_collector(self, name: str, collector: Callable[[], float]) -> None:
+        """Report `collector()` as the counter `pi_robot_<name>` on every scrape and at the end of every turn."""
+        with self.lock:
+            self.collectors[name] = collector
+
+    def start_turn(self) -> None:
+        if not self.enabled:
+            return
+        with self.lock:
+            self.trace_id = uuid.uuid4().hex[:16]
+            self.turn_start = time.perf_counter()
+            self.turns += 1
+
+    def end_turn(self, **attributes: object) -> None:
+        """Record the whole turn as a span and write a snapshot of the counters."""
+        if not self.enabled or self.turn_start is None:
+            return
+        self.record("turn", time.perf_counter() - self.turn_start, **attributes)
+        self.write({"trace_id": self.trace_id, "counters": self.collect()})
+        with self.lock:
+            self.trace_id = None
+            self.turn_start = None
+
+    def span(self, name: str, **attributes: object) -> ContextManager[None]:
+        """Time the `with` block as the span `name` of the current turn."""
+        if not self.enabled:
+            return NULL_SPAN
+        return self.timed(name, attributes)
+
+    @contextlib.contextmanager
+    def timed(self, name: str, attributes: dict[str, object]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, **attributes)
+
+    def record(self, name: str, duration: float, **attributes: object) -> None:
+        """Record a span measured elsewhere, e.g. from a timestamp taken earlier in the turn."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.span_stats.setdefault(name, SpanStats()).add(duration)
+            trace_id = self.trace_id
+        self.write({
+            "trace_id": trace_id,
+            "span": name,
+            "end": round(time.time(), 6),
+            "duration_ms": round(duration * 1000, 3),
+            **attributes,
+        })
+
+    def write(self, entry: dict) -> None:
+        if self.trace_file:
+            line = json.dumps(entry, default=str) + "\n"
+            with self.lock:
+                if self.trace_file:
+                    self.trace_file.write(line)
+
+    def collect(self) -> dict[str, float]:
+        with self.lock:
+            collectors = dict(self.collectors)
+        counters = {}
+        for name, collector in collectors.items():
+            try:
+                counters[name] = float(collector())
+            except Exception as e:
+                logger.debug(f"Collector {name} failed: {e}")
+        return counters
+
+    def render_metrics(self) -> str:
+        """The spans and counters in the Prometheus text exposition format."""
+        lines = [
+            "# TYPE pi_robot_turns_total counter",
+            f"pi_robot_turns_total {self.turns}",
+            "# TYPE pi_robot_span_seconds histogram",
+        ]
+        with self.lock:
+            span_stats = {
+                name: (stats.count, stats.total, list(stats.buckets)) for name, stats in self.span_stats.items()
+            }
+        for name, (count, total, buckets) in sorted(span_stats.items()):
+            for bound, bucket_count in zip(SPAN_BUCKETS, buckets):
+                lines.append(f'pi_robot_span_seconds_bucket{{span="{name}",le="{bound}"}} {bucket_count}')
+            lines.append(f'pi_robot_span_seconds_bucket{{span="{name}",le="+Inf"}} {count}')
+            lines.append(f'pi_robot_span_seconds_sum{{span="{name}"}} {total}')
+            lines.append(f'pi_robot_span_seconds_count{{span="{name}"}} {count}')
+        for name, value in sorted(self.collect().items()):
+            lines.append(f"# TYPE pi_robot_{name} counter")
+            lines.append(f"pi_robot_{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def close(self) -> None:
+        self.enabled = False
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+            self.metrics_server = None
+        with self.lock:
+            if self.trace_file:
+                self.trace_file.close()
+                self.trace_file = None
+
+
+def serve_metrics(tracer: Tracer, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve `tracer.render_metrics()` at http://host:port/metrics from a background thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = tracer.render_metrics().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.debug(f"Serving metrics at http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+_tracer: Tracer | None = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Return the tracer shared by the whole process."""
+    global _tracer
+
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
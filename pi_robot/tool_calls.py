@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from dataclasses import field
+
+from openai.types.beta.realtime import RealtimeServerEvent
+
+
+@dataclass
+class ToolCall:
+    call_id: str
+    name: str
+    arguments: str = ""
+    deltas: list[str] = field(default_factory=list)
+
+
+class ToolCallAssembler:
+    """
+    Assembles function calls from a response's event stream, so each one can run
+    as soon as its arguments are complete instead of at `response.done`.
+    """
+
+    calls: dict[str, ToolCall]
+
+    def __init__(self) -> None:
+        self.calls = {}
+
+    def reset(self) -> None:
+        self.calls.clear()
+
+    def feed(self, event: RealtimeServerEvent) -> ToolCall | None:
+        """Consume one server event. Returns the call whose arguments just finished streaming, if any."""
+        if event.type == "response.output_item.added":
+            item = event.item
+            if item.type == "function_call" and item.call_id and item.name:
+                self.calls[item.call_id] = ToolCall(item.call_id, item.name)
+
+        elif event.type == "response.function_call_arguments.delta":
+            call = self.calls.get(event.call_id)
+            if call:
+                call.deltas.append(event.delta)
+
+        elif event.type == "response.function_call_arguments.done":
+            call = self.calls.pop(event.call_id, None)
+            if call:
+                call.arguments = event.arguments or "".join(call.deltas)
+                return call
+
+        return None
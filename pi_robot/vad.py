@@ -0,0 +1,159 @@
+from abc import ABC
+from abc import abstractmethod
+
+import numpy as np
+
+
+class VoiceActivityDetector(ABC):
+    """
+    Decides whether a chunk of 16-bit mono audio contains speech.
+
+    Subclasses implement `is_speech`; `Ears` only calls `process`, and `reset`
+    when it opens a stream, so state such as a noise floor carries over from
+    one utterance to the next.
+    """
+
+    def process(self, audio_np: np.ndarray, sample_rate: int) -> bool:
+        return self.is_speech(audio_np, sample_rate)
+
+    @abstractmethod
+    def is_speech(self, audio_np: np.ndarray, sample_rate: int) -> bool:
+        ...
+
+    def reset(self) -> None:
+        pass
+
+
+class RmsVAD(VoiceActivityDetector):
+    """The original detector: a single RMS threshold over the whole chunk."""
+
+    threshold: float
+
+    def __init__(self, threshold: float = 500) -> None:
+        self.threshold = threshold
+
+    def is_speech(self, audio_np: np.ndarray, sample_rate: int) -> bool:
+        if len(audio_np) == 0:
+            return False
+        audio_float = audio_np.astype(np.float32)
+        return bool(np.sqrt(np.mean(audio_float ** 2)) > self.threshold)
+
+
+class AdaptiveVAD(VoiceActivityDetector):
+    """
+    Frame-level detector with an adaptive noise floor and hangover.
+
+    Each chunk is split into short frames, and energy, zero-crossing rate and
+    spectral flatness are computed for all of them at once. A frame counts as
+    speech if it is well above the tracked noise floor, is not noise-like
+    (flat spectrum or very high zero-crossing rate), and is loud enough in
+    absolute terms. Speech starts after `onset_frames` consecutive speech frames
+    and is held for `hangover_frames` after the last one, so steady fan noise
+    neither triggers nor keeps a turn open.
+    """
+
+    frame_duration: float
+    margin_db: float
+    min_energy_db: float
+    max_flatness: float
+    max_zcr: float
+    floor_adaptation: float
+    onset_frames: int
+    hangover_frames: int
+
+    noise_floor_db: float | None
+    speech_run: int
+    hangover_left: int
+    in_speech: bool
+    leftover: np.ndarray
+
+    def __init__(
+        self,
+        frame_duration: float = 0.02,
+        margin_db: float = 6.0,
+        min_energy_db: float = 40.0,
+        max_flatness: float = 0.45,
+        max_zcr: float = 0.35,
+        floor_adaptation: float = 0.05,
+        onset_frames: int = 3,
+        hangover_frames: int = 10,
+    ) -> None:
+        self.frame_duration = frame_duration
+        self.margin_db = margin_db
+        self.min_energy_db = min_energy_db
+        self.max_flatness = max_flatness
+        self.max_zcr = max_zcr
+        self.floor_adaptation = floor_adaptation
+        self.onset_frames = onset_frames
+        self.hangover_frames = hangover_frames
+        self.reset()
+
+    def reset(self) -> None:
+        self.noise_floor_db = None
+        self.speech_run = 0
+        self.hangover_left = 0
+        self.in_speech = False
+        self.leftover = np.zeros(0, dtype=np.int16)
+
+    @staticmethod
+    def frame_features(frames: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return energy (dB), zero-crossing rate and spectral flatness for each row of `frames`."""
+        frames_float = frames.astype(np.float32)
+
+        energy_db = 10 * np.log10(np.mean(frames_float ** 2, axis=1) + 1e-9)
+
+        signs = np.signbit(frames_float)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        window = np.hanning(frames.shape[1]).astype(np.float32)
+        power = np.abs(np.fft.rfft(frames_float * window, axis=1)) ** 2 + 1e-9
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+        return energy_db, zcr, flatness
+
+    def is_speech(self, audio_np: np.ndarray, sample_rate: int) -> bool:
+        frame_length = int(sample_rate * self.frame_duration)
+
+        samples = np.concatenate((self.leftover, audio_np)) if len(self.leftover) else audio_np
+        n_frames = len(samples) // frame_length
+        self.leftover = samples[n_frames * frame_length:].copy()
+        if n_frames == 0:
+            return self.in_speech
+
+        frames = samples[:n_frames * frame_length].reshape(n_frames, frame_length)
+        energy_db, zcr, flatness = self.frame_features(frames)
+
+        if self.noise_floor_db is None:
+            self.noise_floor_db = float(np.min(energy_db))
+
+        voiced = (
+            (energy_db > self.min_energy_db)
+            & (flatness < self.max_flatness)
+            & (zcr < self.max_zcr)
+        )
+
+        heard_speech = False
+        for energy, is_voiced in zip(energy_db.tolist(), voiced.tolist()):
+            is_frame_speech = is_voiced and energy > self.noise_floor_db + self.margin_db
+
+            if is_frame_speech:
+                self.speech_run += 1
+                if self.speech_run >= self.onset_frames:
+                    self.in_speech = True
+                    self.hangover_left = self.hangover_frames
+            else:
+                self.speech_run = 0
+                if self.hangover_left > 0:
+                    self.hangover_left -= 1
+                else:
+                    self.in_speech = False
+
+                # Track the noise floor outside of speech: drop quickly, rise slowly.
+                if energy < self.noise_floor_db:
+                    self.noise_floor_db = energy
+                elif not self.in_speech:
+                    self.noise_floor_db += self.floor_adaptation * (energy - self.noise_floor_db)
+
+            heard_speech = heard_speech or self.in_speech
+
+        return heard_speech
@@ -0,0 +1,34 @@
+from typing import TYPE_CHECKING
+from typing import Iterable
+
+from pi_robot.phrase_spotter import PhraseSpotter
+
+if TYPE_CHECKING:
+    import vosk
+
+
+def wake_phrases(name: str) -> list[str]:
+    name = name.lower()
+    return [name, f"hey {name}", f"okay {name}"]
+
+
+class WakeWordDetector(PhraseSpotter):
+    """
+    Listens for the robot's name, so speech that isn't addressed to it is never
+    sent to the realtime API.
+
+    The phrases default to the name alone or after "hey" or "okay". Vosk leaves
+    words its model doesn't know out of the grammar, so a name that isn't an
+    English word needs `phrases` made of words the model knows.
+    """
+
+    def __init__(
+        self,
+        model: "vosk.Model",
+        sample_rate: int,
+        name: str,
+        phrases: Iterable[str] | None = None,
+        min_confidence: float = 0.7,
+        stable_chunks: int = 4,
+    ) -> None:
+        super().__init__(model, sample_rate, phrases or wake_phrases(name), min_confidence, stable_chunks)
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+
+from pi_robot.logging import logger
+from pi_robot.telemetry import SPAN_BUCKETS
+from pi_robot.telemetry import SpanStats
+from pi_robot.telemetry import Tracer
+from pi_robot.telemetry import get_tracer
+
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def call_site(stack: traceback.StackSummary) -> str:
+    """The innermost frame in pi_robot's own code, which is what to fix, else the innermost frame."""
+    frames = [f for f in stack if f.filename.startswith(PACKAGE_DIR) and f.filename != __file__]
+    frame = frames[-1] if frames else stack[-1]
+    filename = frame.filename
+    if filename.startswith(PACKAGE_DIR):
+        filename = os.path.relpath(filename, os.path.dirname(PACKAGE_DIR))
+    return f"{filename}:{frame.lineno} in {frame.name}"
+
+
+class LoopWatchdog:
+    """
+    Finds what blocks the event loop.
+
+    A heartbeat task wakes every `sample_interval` and measures how late it
+    woke. Meanwhile a monitor thread checks the heartbeat; once it is more than
+    `stall_threshold` overdue, the loop thread's stack is captured, since
+    whatever is running there is what's blocking it. When the loop comes back,
+    the stall's duration is added to a histogram for that call site and sent to
+    the tracer as a "loop_stall" span.
+    """
+
+    sample_interval: float
+    stall_threshold: float
+    tracer: Tracer
+    lag_stats: SpanStats
+    stalls: dict[str, SpanStats]
+    stacks: dict[str, str]
+
+    def __init__(
+        self,
+        stall_threshold: float = 0.05,
+        sample_interval: float = 0.005,
+        tracer: Tracer | None = None,
+    ) -> None:
+        self.stall_threshold = stall_threshold
+        self.sample_interval = sample_interval
+        self.tracer = tracer or get_tracer()
+        self.lag_stats = SpanStats()
+        self.stalls = {}
+        self.stacks = {}
+
+        self.lock = threading.Lock()
+        self.deadline = 0.0
+        self.stall_stack: traceback.StackSummary | None = None
+        self.running = False
+        self.heartbeat_task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start watching the running loop. Call from the event loop."""
+        self.loop_thread_id = threading.get_ident()
+        self.deadline = time.perf_counter() + self.sample_interval
+        self.running = True
+        self.heartbeat_task = asyncio.create_task(self.heartbeat())
+        threading.Thread(target=self.monitor, name="loop-watchdog", daemon=True).start()
+
+        self.tracer.add_collector("loop_stalls_total", lambda: sum(s.count for s in self.stalls.values()))
+        self.tracer.add_collector("loop_stall_seconds_total", lambda: sum(s.total for s in self.stalls.values()))
+        self.tracer.add_collector("loop_lag_max_seconds", lambda: self.lag_stats.max)
+
+    def stop(self) -> None:
+        self.running = False
+        if self.heartbeat_task:
+            self.heartbeat_task.cancel()
+            self.heartbeat_task = None
+
+    async def heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.sample_interval)
+            lag = time.perf_counter() - self.deadline
+
+            with self.lock:
+                self.deadline = time.perf_counter() + self.sample_interval
+                stack = self.stall_stack
+                self.stall_stack = None
+                self.lag_stats.add(max(0.0, lag))
+
+            if lag > self.stall_threshold:
+                # A stall shorter than one sample can end before the monitor sees it.
+                site = call_site(stack) if stack else "unknown (ended before it was sampled)"
+                self.add_stall(site, lag, stack)
+
+    def monitor(self) -> None:
+        while self.running:
+            time.sleep(self.sample_interval)
+            with self.lock:
+                overdue = time.perf_counter() - self.deadline
+                if overdue <= self.stall_threshold or self.stall_stack is not None:
+                    continue
+                frame = sys._current_frames().get(self.loop_thread_id)
+                if frame is not None:
+                    self.stall_stack = traceback.extract_stack(frame)
+
+    def add_stall(self, site: str, duration: float, stack: traceback.StackSummary | None) -> None:
+        with self.lock:
+            first = site not in self.stalls
+            self.stalls.setdefault(site, SpanStats()).add(duration)
+            if first and stack:
+                self.stacks[site] = "".join(stack.format())
+
+        logger.warning(f"Event loop blocked for {duration * 1000:.0f} ms at {site}")
+        if first and stack:
+            logger.debug(f"Stack of the first stall at {site}:\n{self.stacks[site]}")
+        self.tracer.record("loop_stall", duration, site=site)
+
+    def report(self) -> str:
+        """Stalls per call site, worst first, with their duration histograms."""
+        with self.lock:
+            stalls = sorted(self.stalls.items(), key=lambda item: item[1].total, reverse=True)
+        lines = [f"Event loop stalls over {self.stall_threshold * 1000:.0f} ms, by call site:"]
+        for site, stats in stalls:
+            lines.append(
+                f"  {site}: {stats.count} stalls, {stats.total * 1000:.0f} ms total, {stats.max * 1000:.0f} ms max"
+            )
+            # The buckets are cumulative, so each one's own count is the difference from the previous.
+            previous = 0
+            histogram = []
+            for bound, cumulative in zip(SPAN_BUCKETS, stats.buckets):
+                if cumulative > previous:
+                    histogram.append(f"<={bound * 1000:g} ms: {cumulative - previous}")
+                previous = cumulative
+            if stats.count > previous:
+                histogram.append(f">{SPAN_BUCKETS[-1] * 1000:g} ms: {stats.count - previous}")
+            lines.append(f"    {', '.join(histogram)}")
+        if not stalls:
+            lines.append("  none")
+        return "\n".join(lines)